@@ -0,0 +1 @@
+"""Offline benchmarks and local stand-ins for the NIRF pipeline's external services."""
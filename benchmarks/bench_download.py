@@ -0,0 +1,71 @@
+"""Compares the old one-by-one PDF loop against PDFDownloader on a local fake server.
+
+The pooled engine is run twice against the same manifest: the second pass
+shows the cost of an incremental re-crawl where nothing has changed.
+
+Usage: python -m benchmarks.bench_download --num-pdfs 200 --latency 0.05 --workers 8
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import requests
+
+from benchmarks.fake_nirf_server import FakeNIRFServer
+from download_manifest import DownloadManifest
+from pdf_downloader import PDFDownloader, summarize
+
+
+def sequential_download(urls, dest_dir):
+    """The original nirf_scraper.py loop: no session, whole body in memory."""
+    total = 0
+    for url in urls:
+        pdf_response = requests.get(url)
+        with open(os.path.join(dest_dir, url.split("/")[-1]), "wb") as f:
+            f.write(pdf_response.content)
+        total += len(pdf_response.content)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--num-pdfs", type=int, default=200)
+    parser.add_argument("--pdf-size", type=int, default=256 * 1024)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--per-host", type=int, default=8)
+    parser.add_argument("--skip-sequential", action="store_true")
+    args = parser.parse_args()
+
+    server = FakeNIRFServer(num_pdfs=args.num_pdfs, pdf_size=args.pdf_size, latency=args.latency,
+                            failure_rate=args.failure_rate).start()
+    urls = [f"{server.base_url}/pdf/report_{i}.pdf" for i in range(args.num_pdfs)]
+    try:
+        if not args.skip_sequential:
+            with tempfile.TemporaryDirectory() as tmp:
+                start = time.perf_counter()
+                total = sequential_download(urls, tmp)
+                elapsed = time.perf_counter() - start
+                print(f"sequential : {len(urls)} PDFs, {total / (1024 * 1024):.1f} MB in {elapsed:.2f}s "
+                      f"({len(urls) / elapsed:.1f} PDFs/s)")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            manifest = DownloadManifest(os.path.join(tmp, "manifest.sqlite3"))
+            jobs = [(url, os.path.join(tmp, url.split("/")[-1])) for url in urls]
+            for label in ("pooled", "re-crawl"):
+                with PDFDownloader(max_workers=args.workers, per_host_limit=args.per_host, backoff=0.05,
+                                   manifest=manifest) as downloader:
+                    start = time.perf_counter()
+                    results = downloader.download_all(jobs, progress_every=0)
+                    print(f"{label:<8} x{args.workers:<2}: {summarize(results, time.perf_counter() - start)}")
+            manifest.close()
+    finally:
+        server.stop()
+    print(f"server     : {server.stats['requests']} requests, {server.stats['failures']} injected failures, "
+          f"{server.stats['not_modified']} not modified, {server.stats['bytes_sent'] / (1024 * 1024):.1f} MB sent")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""End-to-end offline benchmark: scraper -> extractor -> converter on a synthetic corpus.
+
+Serves N institutes per category (ranking pages plus readable data-capture
+PDFs) from benchmarks.fake_nirf_server. It then runs the real command-line
+steps in a scratch directory, with the fake LLM backend (--fake-llm) and
+in-memory Google Sheets (--fake-sheets). Each step runs as its own process,
+so its wall time and peak memory (including its extraction workers) are
+measured separately. With --mode pipeline, `python -m nirf run` is measured
+as a single step instead.
+
+Every run is appended to benchmarks/results/bench_pipeline.jsonl with the
+git commit it ran on, so runs at the same scale can be compared across
+commits with --compare.
+
+Usage: python -m benchmarks.bench_pipeline --institutes 1000 [--mode pipeline] [--compare]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.fake_nirf_server import FakeNIRFServer
+from pdf_extractor import LLM_BATCH_DOCS
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", "bench_pipeline.jsonl")
+PDF_CATEGORIES = 4   # Overall, Engineering, University and Law link PDFs; Research is table-only
+
+
+def git_commit():
+    """(short commit hash, whether the tree has uncommitted changes)."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_ROOT,
+                                    capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+    return commit, dirty
+
+
+def run_step(name, args, workdir):
+    """Runs one step as a child process; returns (wall seconds, peak RSS in MB, its metrics report)."""
+    metrics_file = os.path.join(workdir, f"metrics-{name}.json")
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    with open(os.path.join(workdir, f"{name}.log"), "w") as log:
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, *args, "--metrics-out", metrics_file], cwd=workdir, env=env,
+                                   stdout=log, stderr=subprocess.STDOUT)
+        # wait4's ru_maxrss covers the step and the largest of its own children (the extraction pool)
+        _, status, usage = os.wait4(process.pid, 0)
+        elapsed = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode:
+        raise RuntimeError(f"{name} exited with {process.returncode}; see {log.name}")
+    rss_kb = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+    with open(metrics_file) as f:
+        report = json.load(f)
+    return elapsed, rss_kb / 1024, report
+
+
+def stage_summary(report):
+    """The per-stage percentiles and counters of a step's metrics report, without per-document rows."""
+    return {"stages": {stage: {key: s[key] for key in ("count", "failed", "p50", "p95", "p99", "docs_per_second")}
+                       for stage, s in report["stages"].items()},
+            "counters": report["counters"]}
+
+
+def run_benchmark(args):
+    server = FakeNIRFServer(num_pdfs=args.institutes, latency=args.latency, dcs=True).start()
+    workdir = args.workdir or tempfile.mkdtemp(prefix="nirf-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    year = ["--year", str(args.year)]
+    fake_llm = ["--fake-llm", str(args.llm_latency), "--batch-docs", str(args.batch_docs)]
+    if args.mode == "pipeline":
+        steps = [("pipeline", ["-m", "nirf", "run", *year, "--base-url", server.base_url, *fake_llm, "--fake-sheets"])]
+    else:
+        steps = [("scrape", [os.path.join(REPO_ROOT, "nirf_scraper.py"), *year, "--base-url", server.base_url]),
+                 ("extract", [os.path.join(REPO_ROOT, "pdf_extractor.py"), *year, *fake_llm]),
+                 ("convert", [os.path.join(REPO_ROOT, "dataframe_converter.py"), *year, "--fake-sheets"])]
+
+    commit, dirty = git_commit()
+    pdfs = args.institutes * PDF_CATEGORIES
+    result = {"commit": commit, "dirty": dirty, "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+              "mode": args.mode, "institutes": args.institutes, "pdfs": pdfs,
+              "params": {"latency": args.latency, "llm_latency": args.llm_latency, "batch_docs": args.batch_docs,
+                         "cpus": os.cpu_count()},
+              "steps": {}}
+    print(f"Benchmarking {args.mode} on {args.institutes} institute(s) per category ({pdfs} PDFs) in {workdir}")
+    try:
+        for name, step_args in steps:
+            elapsed, peak_mb, report = run_step(name, step_args, workdir)
+            result["steps"][name] = {"wall_seconds": elapsed, "peak_rss_mb": peak_mb,
+                                     "pdfs_per_second": pdfs / elapsed if elapsed else 0.0, **stage_summary(report)}
+            print(f"  {name:<9} {elapsed:>8.1f}s {peak_mb:>8.1f} MB peak {pdfs / elapsed:>8.1f} PDFs/s")
+    finally:
+        server.stop()
+    result["total_seconds"] = sum(step["wall_seconds"] for step in result["steps"].values())
+    print(f"  total     {result['total_seconds']:>8.1f}s")
+    if not args.workdir:
+        print(f"  logs and metrics reports: {workdir}")
+    return result
+
+
+def save_result(result, path=RESULTS_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a") as f:
+        f.write(json.dumps(result) + "\n")
+
+
+def compare(mode, institutes, path=RESULTS_FILE, last=10):
+    """Prints the latest runs at this mode and scale, one line per run, oldest first."""
+    if not os.path.exists(path):
+        print(f"No results in '{path}' yet.")
+        return
+    with open(path) as f:
+        runs = [run for run in map(json.loads, f) if run["mode"] == mode and run["institutes"] == institutes]
+    if not runs:
+        print(f"No {mode} results for {institutes} institute(s) yet.")
+        return
+    names = list(runs[-1]["steps"])
+    print(f"\n{'commit':<12} {'when':<19} " + " ".join(f"{name + ' s':>11} {'MB':>7}" for name in names)
+          + f" {'total s':>9}")
+    for run in runs[-last:]:
+        commit = run["commit"] + ("+" if run["dirty"] else "")
+        cells = " ".join(f"{run['steps'][name]['wall_seconds']:>11.1f} {run['steps'][name]['peak_rss_mb']:>7.1f}"
+                         if name in run["steps"] else f"{'-':>11} {'-':>7}" for name in names)
+        print(f"{commit:<12} {run['timestamp']:<19} {cells} {run['total_seconds']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--institutes", type=int, default=100, help="Institutes per category, e.g. 100, 1000, 10000")
+    parser.add_argument("--mode", choices=["steps", "pipeline"], default="steps")
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--latency", type=float, default=0.01, help="Fake server latency per request (seconds)")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Fake LLM latency per request (seconds)")
+    parser.add_argument("--batch-docs", type=int, default=LLM_BATCH_DOCS,
+                        help="Reports per LLM request (1 sends each on its own)")
+    parser.add_argument("--workdir", help="Run here and keep the outputs (default: a new temporary directory)")
+    parser.add_argument("--no-save", action="store_true", help=f"Do not append the result to {RESULTS_FILE}")
+    parser.add_argument("--compare", action="store_true", help="Only print earlier results at this scale and mode")
+    args = parser.parse_args()
+
+    if not args.compare:
+        result = run_benchmark(args)
+        if not args.no_save:
+            save_result(result)
+    compare(args.mode, args.institutes)
+
+
+if __name__ == "__main__":
+    main()
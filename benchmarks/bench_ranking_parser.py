@@ -0,0 +1,96 @@
+"""Benchmarks ranking-table parsing: parse time and peak memory per backend.
+
+Compares the scraper's original BeautifulSoup/html.parser code (a find()
+and find_all() per row and per hidden sub-table) with ranking_parser's
+streaming stdlib and lxml backends. It runs on the pages in
+benchmarks/fixtures/html/ (generated by fake_nirf_server.ranking_page_html)
+and on a synthetic page of --rows rows.
+
+Every measurement runs in a fresh process, so peak memory (growth of the
+process's maximum RSS while parsing) includes lxml's C allocations.
+
+Usage: python -m benchmarks.bench_ranking_parser --rows 3000 --repeat 3
+"""
+import argparse
+import glob
+import multiprocessing
+import os
+import resource
+import time
+
+from bs4 import BeautifulSoup
+
+from benchmarks.fake_nirf_server import ranking_page_html
+from ranking_parser import available_backends, parse_ranking_table
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "html")
+
+
+def parse_with_bs4(html, category):
+    """Mirrors the Research branch of the original nirf_scraper.py."""
+    rows = []
+    soup = BeautifulSoup(html, "html.parser")
+    main_table = soup.find('table', id='tbl_overall')
+    if not main_table:
+        return rows
+    main_rows = main_table.find('tbody').find_all('tr') if main_table.find('tbody') else []
+    for row in main_rows:
+        main_cols = row.find_all('td', recursive=False)
+        if len(main_cols) < 6: continue
+        institute_name = main_cols[1].find(text=True, recursive=False).strip()
+        if not institute_name: continue
+        hidden_div = main_cols[1].find('div', class_='tbl_hidden')
+        if not hidden_div: continue
+        nested_table = hidden_div.find('table')
+        if not nested_table: continue
+        nested_cols = nested_table.find('tbody').find_all('td') if nested_table.find('tbody') else []
+        if len(nested_cols) < 5: continue
+        rows.append({"rank": main_cols[5].text.strip(), "institute_name": institute_name,
+                     "nirf_id": main_cols[0].text.strip(), "scores": [c.text.strip() for c in nested_cols[:5]]})
+    return rows
+
+
+def _max_rss_kb():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if os.uname().sysname == "Darwin" else rss
+
+
+def _measure(parser, html, category, repeat):
+    """Runs in a child process: returns (best seconds, rows, peak memory growth in KiB)."""
+    baseline = _max_rss_kb()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        if parser == "bs4":
+            rows = parse_with_bs4(html, category)
+        else:
+            rows = parse_ranking_table(html, category, backend=parser)
+        best = min(best, time.perf_counter() - start)
+    return best, len(rows), _max_rss_kb() - baseline
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=3000, help="Rows in the synthetic large page")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "*Ranking.html"))):
+        with open(path, "rb") as f:
+            pages.append((os.path.basename(path), os.path.basename(path)[:-len("Ranking.html")], f.read()))
+    pages.append((f"synthetic ({args.rows} rows)", "Research", ranking_page_html("Research", args.rows).encode()))
+
+    context = multiprocessing.get_context("spawn")
+    print(f"{'page':<26} {'parser':<8} {'KB':>7} {'rows':>6} {'ms':>9} {'peak MB':>8}")
+    for name, category, html in pages:
+        for backend in ["bs4", *available_backends()]:
+            with context.Pool(1) as pool:
+                seconds, rows, peak_kb = pool.apply(_measure, (backend, html, category, args.repeat))
+            print(f"{name:<26} {backend:<8} {len(html) / 1024:>7.0f} {rows:>6} {seconds * 1000:>9.1f} "
+                  f"{peak_kb / 1024:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""Compares the rule-based DCS parser with the LLM path on the fixture corpus.
+
+For each fixture report (benchmarks/fixtures/dcs/*.txt with a matching
+*.json of expected values) it measures field accuracy and per-document
+latency of: the rule parser alone, the full-document LLM prompt, the
+hybrid path (rules first, LLM only for fields the rules left empty, with
+the prompt filtered to the sections those fields need), and
+"dcs-only", the hybrid path that does not ask for fields the DCS PDF never
+contains (pdf_extractor.LLM_FOR_FIELDS_NOT_IN_DCS = False).
+
+By default the LLM is a local fake with --latency seconds per call that
+answers from the expected values, so only speed and prompt size are
+meaningful. Pass --gemini (with GEMINI_API_KEY set) to score the real model.
+
+The accuracy figure is NOT a measure against real reports. The fixtures
+in fixtures/dcs/ are hand-typed transcriptions whose expected values were
+written by the parser's author, so a perfect score only shows that the
+rules match that transcription of the layout. Fixtures in
+fixtures/dcs/pypdf2/ hold PyPDF2's verbatim output of downloaded reports,
+with expected values typed from the PDF itself; they are scored
+separately, and only they say anything about real-world accuracy. Add one
+with --capture, then fill in its .json by reading the PDF (never from the
+parser's output).
+
+Until a downloaded report is captured, fixtures/dcs/pypdf2/ holds
+--render captures: a hand-typed fixture drawn into a PDF by
+benchmarks.synthetic_corpus and read back by PyPDF2, with the hand-typed
+expected values. Their .json has "_origin": "rendered" and they are scored
+as "pypdf2-rendered". They check the rules against PyPDF2's own text
+output (lines joined across page breaks, spacing), not against the table
+layout of real reports.
+
+Usage: python -m benchmarks.bench_rule_extractor [--gemini] [--repeat 200]
+       python -m benchmarks.bench_rule_extractor --capture nirf_reports/2025/Overall/IR-O-U-0456.pdf
+       python -m benchmarks.bench_rule_extractor --render IR-O-U-0456
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import tempfile
+import time
+
+from llm_client import AsyncLLMExtractor, FakeLLMBackend, GeminiBackend, estimate_tokens
+from pdf_extractor import FIELD_TEMPLATES, MODEL_NAME, build_prompt, extract_text_from_pdf
+from prompt_filter import filter_text_for_fields
+from rule_extractor import extract_fields_with_rules, missing_fields
+from benchmarks.synthetic_corpus import text_pdf
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "dcs")
+PYPDF2_FIXTURE_DIR = os.path.join(FIXTURE_DIR, "pypdf2")   # Verbatim PyPDF2 output of downloaded reports
+SOURCES = {"hand-typed": FIXTURE_DIR, "pypdf2": PYPDF2_FIXTURE_DIR}
+RENDERED = "rendered"   # "_origin" of a --render capture; scored as "pypdf2-rendered"
+
+
+def load_fixtures():
+    """(name, source, text, expected) per fixture; expected values still null are not scored."""
+    fixtures = []
+    for source, fixture_dir in SOURCES.items():
+        for text_path in sorted(glob.glob(os.path.join(fixture_dir, "*.txt"))):
+            with open(text_path) as f:
+                text = f.read()
+            with open(text_path[:-len(".txt")] + ".json") as f:
+                expected = json.load(f)
+            origin = expected.pop("_origin", None)
+            expected = {key: value for key, value in expected.items() if value is not None}
+            if {"nirf_id", "category"} <= expected.keys():
+                fixtures.append((os.path.basename(text_path), f"{source}-{origin}" if origin else source, text,
+                                 expected))
+    return fixtures
+
+
+def capture(pdf_path, fixture_dir=PYPDF2_FIXTURE_DIR):
+    """Saves PyPDF2's text of a downloaded report as a fixture, with a blank expected-values file."""
+    os.makedirs(fixture_dir, exist_ok=True)
+    name = os.path.splitext(os.path.basename(pdf_path))[0]
+    text_path = os.path.join(fixture_dir, f"{name}.txt")
+    with open(text_path, "w") as f:
+        f.write(extract_text_from_pdf(pdf_path))
+    json_path = os.path.join(fixture_dir, f"{name}.json")
+    if not os.path.exists(json_path):
+        with open(json_path, "w") as f:
+            json.dump({key: None for key in FIELD_TEMPLATES["Shared"]}, f, indent=4)
+    print(f"Wrote {text_path}. Fill in {json_path} by reading the PDF; null values are not scored.")
+
+
+def render(name, fixture_dir=PYPDF2_FIXTURE_DIR):
+    """Draws hand-typed fixture `name` into a PDF and saves PyPDF2's text of it, with the fixture's expected values."""
+    os.makedirs(fixture_dir, exist_ok=True)
+    with open(os.path.join(FIXTURE_DIR, f"{name}.txt")) as f:
+        pdf = text_pdf(f.read())
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, f"{name}.pdf")
+        with open(pdf_path, "wb") as f:
+            f.write(pdf)
+        text = extract_text_from_pdf(pdf_path)
+    with open(os.path.join(FIXTURE_DIR, f"{name}.json")) as f:
+        expected = json.load(f)
+    with open(os.path.join(fixture_dir, f"{name}.txt"), "w") as f:
+        f.write(text)
+    with open(os.path.join(fixture_dir, f"{name}.json"), "w") as f:
+        json.dump({"_origin": RENDERED, **expected}, f, indent=4)
+    print(f"Wrote PyPDF2's text of the rendered {name} to {fixture_dir}.")
+
+
+def score(data, expected):
+    """Returns (correct, wrong) counts over the expected fields; numbers compare numerically."""
+    correct = 0
+    for key, value in expected.items():
+        got = (data or {}).get(key)
+        try:
+            same = float(str(got).replace(",", "")) == float(value)
+        except (TypeError, ValueError):
+            same = str(got).strip().lower() == str(value).strip().lower()
+        correct += same
+    return correct, len(expected) - correct
+
+
+async def run_llm(extractor, text, category, fields):
+    start = time.perf_counter()
+    data = await extractor.extract(build_prompt(text, category, fields))
+    return data, time.perf_counter() - start
+
+
+def hybrid_prompt(text, category, fields):
+    return build_prompt(filter_text_for_fields(text, fields), category, fields)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--gemini", action="store_true", help="Use the real Gemini API for the LLM paths")
+    parser.add_argument("--latency", type=float, default=2.0, help="Fake LLM seconds per call")
+    parser.add_argument("--repeat", type=int, default=200, help="Rule parser repetitions per fixture for timing")
+    parser.add_argument("--capture", metavar="PDF", help="Save a downloaded report's PyPDF2 text as a fixture and exit")
+    parser.add_argument("--render", metavar="FIXTURE", help="Save PyPDF2's text of a hand-typed fixture drawn as a PDF")
+    args = parser.parse_args()
+    if args.capture:
+        capture(args.capture)
+        return
+    if args.render:
+        render(args.render)
+        return
+
+    fields = FIELD_TEMPLATES["Shared"]
+    fixtures = load_fixtures()
+    expected_by_id = {}
+
+    def oracle(prompt):
+        for nirf_id, expected in expected_by_id.items():
+            if nirf_id in prompt:
+                return json.dumps(expected)
+        return "{}"
+
+    if args.gemini:
+        backend = GeminiBackend(MODEL_NAME, os.environ.get("GEMINI_API_KEY"))
+    else:
+        backend = FakeLLMBackend(oracle, latency=args.latency, jitter=0.0)
+    extractor = AsyncLLMExtractor(backend, max_concurrency=1)
+
+    paths = ("rules", "llm", "hybrid", "dcs-only")
+    # correct, wrong, secs, tokens, documents per (source, path)
+    sources = [*SOURCES, f"pypdf2-{RENDERED}"]
+    totals = {(source, path): [0, 0, 0.0, 0, 0] for source in sources for path in paths}
+    print(f"{'fixture':<20} {'path':<8} {'accuracy':>9} {'ms/doc':>10} {'prompt tok':>11}")
+    for name, source, text, expected in fixtures:
+        expected_by_id[expected["nirf_id"]] = expected
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            rules = extract_fields_with_rules(text, expected["category"], fields)
+        rules_secs = (time.perf_counter() - start) / args.repeat
+
+        llm, llm_secs = asyncio.run(run_llm(extractor, text, expected["category"], fields))
+
+        missing = missing_fields(rules, fields)
+        filled, fill_secs = (asyncio.run(run_llm(extractor, filter_text_for_fields(text, missing),
+                                                 expected["category"], missing)) if missing else ({}, 0.0))
+        hybrid = {**{key: (filled or {}).get(key) for key in missing}, **rules}
+
+        dcs_missing = missing_fields(rules, fields, include_not_in_dcs=False)
+        dcs_filled, dcs_secs = (asyncio.run(run_llm(extractor, filter_text_for_fields(text, dcs_missing),
+                                                    expected["category"], dcs_missing)) if dcs_missing else ({}, 0.0))
+        dcs_only = {**{key: (dcs_filled or {}).get(key) for key in dcs_missing}, **rules}
+
+        rows = [("rules", rules, rules_secs, 0),
+                ("llm", llm, llm_secs, estimate_tokens(build_prompt(text, expected["category"], fields))),
+                ("hybrid", hybrid, rules_secs + fill_secs,
+                 estimate_tokens(hybrid_prompt(text, expected["category"], missing)) if missing else 0),
+                ("dcs-only", dcs_only, rules_secs + dcs_secs,
+                 estimate_tokens(hybrid_prompt(text, expected["category"], dcs_missing)) if dcs_missing else 0)]
+        for path, data, secs, tokens in rows:
+            correct, wrong = score(data, expected)
+            total = totals[source, path]
+            total[0] += correct
+            total[1] += wrong
+            total[2] += secs
+            total[3] += tokens
+            total[4] += 1
+            print(f"{name:<20} {path:<8} {correct:>4}/{len(expected):<4} {secs * 1000:>10.2f} {tokens:>11}")
+
+    print()
+    for (source, path), (correct, wrong, secs, tokens, docs) in totals.items():
+        if docs:
+            print(f"{'ALL ' + source:<20} {path:<8} {correct / (correct + wrong):>9.1%} {secs / docs * 1000:>10.2f} "
+                  f"{tokens // docs:>11}")
+    print(f"\nThe LLM is {'Gemini' if args.gemini else 'a fake oracle (LLM accuracy not meaningful)'}. "
+          "Hand-typed fixtures only show that the rules match their own transcription of the layout.")
+    if not totals["pypdf2", "rules"][4]:
+        print(f"No fixtures from real PyPDF2 output in {PYPDF2_FIXTURE_DIR} yet, so there is no measure of "
+              "accuracy on real reports; add one with --capture.")
+
+
+if __name__ == "__main__":
+    main()
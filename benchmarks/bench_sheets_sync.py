@@ -0,0 +1,72 @@
+"""Benchmarks the Google Sheets upload against an in-memory worksheet.
+
+Compares clearing and rewriting the whole sheet (the old upload) with
+sync_worksheet, which writes only changed cells, when a few institutes'
+values change between runs.
+
+Usage: python -m benchmarks.bench_sheets_sync --institutes 200 --changed 3
+"""
+import argparse
+import random
+
+import pandas as pd
+
+from dataframe_converter import ROW_TEMPLATES
+from sheets_sync import FakeWorksheet, dataframe_to_grid, sync_worksheet
+
+
+def synthetic_wide_df(institutes, seed=0):
+    """A DataFrame shaped like load_and_prepare_data()'s output: metrics as rows, institutes as columns."""
+    rng = random.Random(seed)
+    metrics = ROW_TEMPLATES["Overall"]
+    data = {f"Institute {i:04d}": [rng.randint(0, 10_000_000) for _ in metrics] for i in range(institutes)}
+    df = pd.DataFrame(data, index=metrics)
+    df.columns.name = "Name of the Institute"
+    return df
+
+
+def full_rewrite(worksheet, grid):
+    """Mirrors the old worksheet.clear() + set_with_dataframe() upload."""
+    worksheet.clear()
+    worksheet.resize(rows=max(worksheet.row_count, len(grid)), cols=max(worksheet.col_count, len(grid[0])))
+    worksheet.batch_update([{"range": "A1", "values": grid}])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--institutes", type=int, default=200)
+    parser.add_argument("--changed", type=int, default=3, help="Institutes whose values change between runs")
+    parser.add_argument("--added", type=int, default=1, help="Institutes appended between runs")
+    args = parser.parse_args()
+
+    before = synthetic_wide_df(args.institutes)
+    after = synthetic_wide_df(args.institutes + args.added, seed=1)
+    after.iloc[:, :args.institutes] = before.values
+    for column in random.Random(2).sample(range(args.institutes), args.changed):
+        after.iloc[5:15, column] += 1
+
+    grid_before, grid_after = dataframe_to_grid(before), dataframe_to_grid(after)
+    print(f"Sheet: {len(grid_after)} rows x {len(grid_after[0])} columns; "
+          f"{args.changed} institute(s) changed, {args.added} added\n")
+
+    old_sheet = FakeWorksheet(row_count=500, col_count=300)
+    full_rewrite(old_sheet, grid_before)
+    old_sheet.cells_written = 0
+    full_rewrite(old_sheet, grid_after)
+
+    new_sheet = FakeWorksheet(row_count=500, col_count=300)
+    sync_worksheet(new_sheet, grid_before)
+    new_sheet.cells_written = 0
+    new_sheet.calls = dict.fromkeys(new_sheet.calls, 0)
+    result = sync_worksheet(new_sheet, grid_after)
+    assert new_sheet.get_all_values() == grid_after, "diff sync left the sheet out of date"
+
+    print(f"  full rewrite: {old_sheet.cells_written} cells written, sheet {old_sheet.row_count}x{old_sheet.col_count}")
+    print(f"  diff sync:    {new_sheet.cells_written} cells written in {result.ranges} range(s), "
+          f"{result.requests} batch_update call(s), sheet {new_sheet.row_count}x{new_sheet.col_count}")
+    second = sync_worksheet(new_sheet, grid_after)
+    print(f"  re-sync with no changes: {second.cells_changed} cells, {second.requests} request(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""A local HTTP stand-in for nirfindia.org used by the offline benchmarks.
+
+Serves ranking pages with an N-row ranking table that link to N synthetic PDFs. Latency, bandwidth and
+a fraction of transient 503 failures can be injected so the download engine
+can be measured without touching the real site. PDFs carry an ETag and
+Last-Modified header and honour If-None-Match and Range requests.
+
+With dcs=True, each category's page links to /pdf/<category>/report_<i>.pdf,
+served as a readable data-capture report from benchmarks.synthetic_corpus
+instead of filler bytes.
+"""
+import argparse
+import random
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.synthetic_corpus import dcs_pdf
+
+PDF_HEADER = b"%PDF-1.4\n% synthetic NIRF report\n"
+
+
+def synthetic_pdf(index, size):
+    """Returns `size` bytes of deterministic PDF-looking content for report `index`."""
+    body = PDF_HEADER + f"% report {index}\n".encode()
+    filler = (b"0123456789abcdef" * (size // 16 + 1))[: max(0, size - len(body) - 6)]
+    return body + filler + b"\n%%EOF"
+
+
+def ranking_page_html(category, num_rows, pdf_base="/pdf/report_", seed=0):
+    """A ranking page shaped like nirfindia.org's: a "tbl_overall" table with a collapsed
+    parameter-score sub-table in each name cell, followed by the PDF links."""
+    rng = random.Random(seed)
+    parameters = (["QNR", "QLR", "SFC", "OI", "PERCEPTION"] if category == "Research"
+                  else ["TLR", "RPC", "GO", "OI", "PERCEPTION"])
+    header = "".join(f"<th>{p} (100)</th>" for p in parameters)
+    rows = []
+    for i in range(num_rows):
+        scores = "".join(f"<td>{rng.uniform(10, 100):.2f}</td>" for _ in parameters)
+        rows.append(
+            f'<tr><td>IR-{category[0]}-U-{i:04d}</td>'
+            f'<td>Institute of Synthetic Studies {i}'
+            f'<a href="#" class="more">More Details</a>'
+            f'<div class="tbl_hidden"><table class="table"><thead><tr>{header}</tr></thead>'
+            f'<tbody><tr>{scores}</tr></tbody></table></div></td>'
+            f'<td>City {i % 50}</td><td>State {i % 28}</td><td>{rng.uniform(40, 90):.2f}</td><td>{i + 1}</td></tr>\n')
+    links = "".join(f'<a href="{pdf_base}{i}.pdf">Report {i}</a>\n' for i in range(num_rows))
+    return (f"<html><head><title>{category} Ranking</title></head><body>"
+            f'<table id="tbl_overall" class="table"><thead><tr><th>Institute ID</th><th>Name</th><th>City</th>'
+            f"<th>State</th><th>Score</th><th>Rank</th></tr></thead><tbody>\n{''.join(rows)}</tbody></table>\n"
+            f"{links}</body></html>")
+
+
+class FakeNIRFHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, so connection reuse is measurable
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type, extra_headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (extra_headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        with server.stats_lock:
+            server.stats["requests"] += 1
+        time.sleep(server.latency)
+
+        if self.path.endswith("Ranking.html"):
+            category = self.path.rsplit("/", 1)[-1][:-len("Ranking.html")]
+            pdf_base = f"/pdf/{category}/report_" if server.dcs else "/pdf/report_"
+            self._send(200, ranking_page_html(category, server.num_pdfs, pdf_base).encode(), "text/html")
+            return
+
+        if self.path.startswith("/pdf/") and "/report_" in self.path and self.path.endswith(".pdf"):
+            if random.random() < server.failure_rate:
+                with server.stats_lock:
+                    server.stats["failures"] += 1
+                self._send(503, b"busy", "text/plain", {"Retry-After": "0"})
+                return
+            folder, name = self.path[len("/pdf/"):].rpartition("/")[::2]
+            index = int(name[len("report_"):-len(".pdf")])
+            etag = f'"report-{folder + "-" if folder else ""}{index}-{server.pdf_size}"'
+            validators = {"ETag": etag, "Last-Modified": server.last_modified}
+            if self.headers.get("If-None-Match") == etag:
+                with server.stats_lock:
+                    server.stats["not_modified"] += 1
+                self.send_response(304)
+                for key, value in validators.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                return
+
+            body = dcs_pdf(folder, index) if server.dcs and folder else synthetic_pdf(index, server.pdf_size)
+            status = 200
+            range_header = self.headers.get("Range", "")
+            if range_header.startswith("bytes=") and self.headers.get("If-Range", etag) in (etag, server.last_modified):
+                first = int(range_header[len("bytes="):].split("-")[0])
+                validators["Content-Range"] = f"bytes {first}-{len(body) - 1}/{len(body)}"
+                body = body[first:]
+                status = 206
+            self.send_response(status)
+            self.send_header("Content-Type", "application/pdf")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in validators.items():
+                self.send_header(key, value)
+            self.end_headers()
+            with server.stats_lock:
+                server.stats["bytes_sent"] += len(body)
+            # Throttle to the configured bandwidth in 64 KB slices
+            step = 64 * 1024
+            for offset in range(0, len(body), step):
+                self.wfile.write(body[offset:offset + step])
+                if server.bandwidth:
+                    time.sleep(step / server.bandwidth)
+            return
+
+        self._send(404, b"not found", "text/plain")
+
+
+class FakeNIRFServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port=0, num_pdfs=100, pdf_size=256 * 1024, latency=0.05, bandwidth=0, failure_rate=0.0,
+                 dcs=False):
+        super().__init__(("127.0.0.1", port), FakeNIRFHandler)
+        self.num_pdfs = num_pdfs
+        self.pdf_size = pdf_size
+        self.latency = latency
+        self.bandwidth = bandwidth  # Bytes/second per response; 0 means unlimited
+        self.failure_rate = failure_rate
+        self.dcs = dcs  # Serve synthetic data-capture reports per category instead of filler PDFs
+        self.last_modified = formatdate(time.time(), usegmt=True)
+        self.stats = {"requests": 0, "failures": 0, "not_modified": 0, "bytes_sent": 0}
+        self.stats_lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        """Serves requests on a background thread and returns self."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a fake NIRF ranking page and synthetic PDFs.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--num-pdfs", type=int, default=100)
+    parser.add_argument("--pdf-size", type=int, default=256 * 1024)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--dcs", action="store_true", help="Serve readable data-capture reports per category")
+    args = parser.parse_args()
+
+    server = FakeNIRFServer(args.port, args.num_pdfs, args.pdf_size, args.latency, failure_rate=args.failure_rate,
+                            dcs=args.dcs)
+    print(f"Serving fake NIRF site at {server.base_url}/Rankings/2025/OverallRanking.html")
+    server.serve_forever()
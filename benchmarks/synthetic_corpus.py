@@ -0,0 +1,103 @@
+"""Synthetic NIRF data-capture reports for the offline benchmarks.
+
+Each report is one of the three fixture layouts in benchmarks/fixtures/dcs/
+(picked by category) with the institute's name and NIRF ID substituted,
+written as a real text PDF that PyPDF2 and the rule-based parser read like
+a downloaded report. The PDF writer is hand-rolled (Helvetica, one content
+stream per page), so generating a corpus needs no extra packages.
+
+The institute IDs and names match benchmarks.fake_nirf_server's ranking
+pages, so ranks from the ranking tables line up with the extracted records.
+
+Usage: python -m benchmarks.synthetic_corpus --institutes 100 --out corpus/
+"""
+import argparse
+import os
+from functools import lru_cache
+
+DCS_FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "dcs")
+# Fixture report used as the layout for each category; other categories use Overall's
+TEMPLATES = {"Overall": "IR-O-U-0456", "University": "IR-U-U-0220", "Engineering": "IR-E-I-1074"}
+LINES_PER_PAGE = 60
+
+
+def institute_id(category, index):
+    return f"IR-{category[0]}-U-{index:04d}"
+
+
+def institute_name(index):
+    return f"Institute of Synthetic Studies {index}"
+
+
+@lru_cache(maxsize=None)
+def _template(category):
+    nirf_id = TEMPLATES.get(category, TEMPLATES["Overall"])
+    with open(os.path.join(DCS_FIXTURE_DIR, f"{nirf_id}.txt"), encoding="utf-8") as f:
+        text = f.read()
+    header = next(line for line in text.splitlines() if line.startswith("Institute Name:"))
+    return text, header
+
+
+def dcs_text(category, index):
+    """The text of institute `index`'s data-capture report in `category`."""
+    text, header = _template(category)
+    return text.replace(header, f"Institute Name: {institute_name(index)} [{institute_id(category, index)}]", 1)
+
+
+def _pdf_string(line):
+    escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return escaped.encode("latin-1", errors="replace")
+
+
+def text_pdf(text, lines_per_page=LINES_PER_PAGE):
+    """A minimal PDF showing `text` line by line, `lines_per_page` lines to a page."""
+    lines = text.splitlines() or [""]
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)]
+    # Objects: 1 catalog, 2 page tree, 3 font, then a (page, content stream) pair per page
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>",
+               b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % (4 + 2 * i) for i in range(len(pages)))
+               + b"] /Count %d >>" % len(pages),
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"]
+    for i, page in enumerate(pages):
+        stream = b"BT /F1 9 Tf 36 806 Td 12 TL " + b" ".join(b"(" + _pdf_string(line) + b") '" for line in page) + b" ET"
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> "
+                       b"/Contents %d 0 R >>" % (5 + 2 * i))
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def dcs_pdf(category, index):
+    return text_pdf(dcs_text(category, index))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic corpus of NIRF data-capture PDFs to disk.")
+    parser.add_argument("--institutes", type=int, default=100, help="Reports per category")
+    parser.add_argument("--categories", nargs="+", default=["Overall", "University", "Engineering"])
+    parser.add_argument("--out", default="synthetic_corpus")
+    args = parser.parse_args()
+
+    total = 0
+    for category in args.categories:
+        category_dir = os.path.join(args.out, category)
+        os.makedirs(category_dir, exist_ok=True)
+        for index in range(args.institutes):
+            pdf = dcs_pdf(category, index)
+            with open(os.path.join(category_dir, f"report_{index}.pdf"), "wb") as f:
+                f.write(pdf)
+            total += len(pdf)
+    print(f"Wrote {args.institutes * len(args.categories)} report(s), {total / 1024 ** 2:.1f} MB, to '{args.out}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import json
+import os
+import time
+
+from nirf_years import DEFAULT_YEAR, checkpoint_file
+
+# --- 1. Configuration ---
+DEFAULT_CHECKPOINT_FILE = checkpoint_file(DEFAULT_YEAR)
+DEFAULT_FSYNC_EVERY = 20       # Records written between fsyncs
+DEFAULT_FSYNC_INTERVAL = 5.0   # ...or seconds, whichever comes first
+
+
+# --- 2. Writing ---
+class CheckpointWriter:
+    """Appends one JSON record per line as soon as it is extracted.
+
+    Every line is flushed to the OS immediately; fsync is batched so a crash
+    loses at most the last few records while disk syncs stay cheap.
+    """
+
+    def __init__(self, path=DEFAULT_CHECKPOINT_FILE, fsync_every=DEFAULT_FSYNC_EVERY,
+                 fsync_interval=DEFAULT_FSYNC_INTERVAL):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.written = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._file = open(path, "a", encoding="utf-8")
+        if self._file.tell() and not _ends_with_newline(path):
+            # Terminate a line cut short by a crash so the next record starts cleanly
+            self._file.write("\n")
+
+    def append(self, category, source, sha256, data):
+        """Writes one extracted record; `source` is the PDF's file name."""
+        # extracted_at lets readers of several logs (e.g. one per shard) keep the newest record of a report
+        record = {"category": category, "source": source, "sha256": sha256, "extracted_at": time.time(),
+                  "data": data}
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self.written += 1
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        if self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        self.sync()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _ends_with_newline(path):
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+# --- 3. Reading ---
+def iter_checkpoint(path=DEFAULT_CHECKPOINT_FILE):
+    """Yields records one line at a time, skipping a line left half-written by a crash."""
+    if not os.path.exists(path):
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def processed_sources(path=DEFAULT_CHECKPOINT_FILE):
+    """The set of (category, source file name) pairs already in the log."""
+    return {(record["category"], record["source"]) for record in iter_checkpoint(path)}
@@ -1,143 +1,206 @@
-import pandas as pd
+import argparse
+import glob
+import os
 import json
 import gspread
 from gspread_dataframe import set_with_dataframe
 from google.oauth2.service_account import Credentials
+from checkpoint_log import iter_checkpoint
+from sheets_sync import FakeSpreadsheet, dataframe_to_grid, sync_worksheet
+from run_metrics import RunMetrics, format_summary
+from tidy_store import build_schema, typed_frame, wide_view, write_tidy
+from history_store import DEFAULT_HISTORY_FILE, HistoryStore
+from nirf_years import (DEFAULT_YEAR, checkpoint_file, citation_years, default_year, financial_years,
+                        publication_years, ranking_tables_file, research_file, yearly_fields)
 
 # --- 1. Configuration ---
 # IMPORTANT: Change this to the exact name of the Google Sheet you created and shared.
-GOOGLE_SHEET_NAME = "NIRF Analysis 2025 - 51 to 100"
+# "{year}" is replaced with the ranking year being uploaded.
+GOOGLE_SHEET_NAME = "NIRF Analysis {year} - 51 to 100"
 CREDENTIALS_FILE = 'credentials.json'
-PDF_JSON_FILE = 'nirf_data_2.json'
-RESEARCH_JSON_FILE = 'research_data.json'
+PDF_JSON_FILE = 'nirf_data_2.json'         # Older single-file 2025 output, used if there is no 2025 checkpoint log
+SYNC_MODE = 'diff'  # 'diff' writes only changed cells; 'full' clears and rewrites each sheet
+TIDY_STORE_DIR = 'nirf_store'  # Typed Parquet tables, partitioned by year and category (needs pyarrow)
+HISTORY_FILE = DEFAULT_HISTORY_FILE  # Every year's records, merged by (year, category, nirf_id)
 
 
 # --- 2. Define the Final Structure and Mapping ---
-# These are the exact row names you want in your final sheets, in order.
-ROW_TEMPLATES = {
-    "Overall": [
-        "rank", "Name of the Institute", "Institute / University ID (as per NIRF)",
-        "Category: Overall/Engineering/Law/Management, etc.,", "Approved Intake (UG)", "Approved Intake (PG)",
-        "Approved Intake (PG-Integrated)", "Total Approved Intake", "No.of. Students UG Strength",
-        "No.of. Students PG Strength", "No.of.students PG Integrated", "Total Students Strength (Excluding Ph.D)",
-        "Ph.D Full-time", "Ph.D Part-time", "Number of students (including Ph.D. students) = SS=",
-        "Number of faculty members", "Annual capital expenditure (2023-24)", "Annual capital expenditure (2022-23)",
-        "Annual capital expenditure (2021-22)", "Annual operating expenditure (2023-24)",
-        "Annual operating expenditure (2022-23)", "Annual operating expenditure (2021-22)", "Online education",
-        "Number of students offered online courses", "Number of credits transferred", "Number of courses",
-        "Number of students who are economically backward", "Number of students who are socially challenged",
-        "Number of students who are not receiving full tuition fee reimbursement",
-        "Number of full-time Ph.D. awarded in the last 3 years", "Number of part-time Ph.D. awarded in the last 3 years",
-        "Publications (2023)", "Publications (2022)", "Publications (2021)",
-        "Citations (2021-22)", "Citations (2020-21)", "Citations (2019-20)",
-        "Sponsored projects - Total amount received (2023-24)", "Sponsored projects - Total amount received (2022-23)",
-        "Sponsored projects - Total amount received (2021-22)", "Consultancy projects - Total amount received (2023-24)",
-        "Consultancy projects - Total amount received (2022-23)", "Consultancy projects - Total amount received (2021-22)",
-        "Earnings from Executive Development Programme (2023-24)", "Earnings from Executive Development Programme (2022-23)",
-        "Earnings from Executive Development Programme (2021-22)", "Valid NBA Accrediatation", "Valid NAAC Accrediatation"
-    ],
-    "Research": [
-        "rank", "Name of the Institute", "Institute / University ID (as per NIRF)",
-        "Category: Overall/Engineering/Law/Management, etc.,", "QNR(100)", "QLR(100)",
-        "SFC(100)", "OI(100)", "PERCEPTION(100)"
-    ]
-}
-# Reuse the comprehensive 'Overall' template for other similar categories
-ROW_TEMPLATES["University"] = ROW_TEMPLATES["Overall"]
-ROW_TEMPLATES["Engineering"] = ROW_TEMPLATES["Overall"]
-ROW_TEMPLATES["Law"] = ROW_TEMPLATES["Overall"]
-
-# This dictionary maps the clean JSON keys to the final, user-friendly row names
-JSON_TO_USER_MAPPING = {
-    'rank': 'rank', 'institute_name': 'Name of the Institute', 'nirf_id': 'Institute / University ID (as per NIRF)',
-    'category': 'Category: Overall/Engineering/Law/Management, etc.,', 'approved_intake_ug': 'Approved Intake (UG)',
-    'approved_intake_pg': 'Approved Intake (PG)', 'approved_intake_pg_integrated': 'Approved Intake (PG-Integrated)',
-    'total_approved_intake': 'Total Approved Intake', 'students_ug_strength': 'No.of. Students UG Strength',
-    'students_pg_strength': 'No.of. Students PG Strength', 'students_pg_integrated': 'No.of.students PG Integrated',
-    'total_students_strength_excluding_phd': 'Total Students Strength (Excluding Ph.D)',
-    'phd_full_time': 'Ph.D Full-time', 'phd_part_time': 'Ph.D Part-time',
-    'total_students_including_phd': 'Number of students (including Ph.D. students) = SS=',
-    'total_faculty': 'Number of faculty members', 'capital_expenditure_23_24': 'Annual capital expenditure (2023-24)',
-    'capital_expenditure_22_23': 'Annual capital expenditure (2022-23)',
-    'capital_expenditure_21_22': 'Annual capital expenditure (2021-22)',
-    'operating_expenditure_23_24': 'Annual operating expenditure (2023-24)',
-    'operating_expenditure_22_23': 'Annual operating expenditure (2022-23)',
-    'operating_expenditure_21_22': 'Annual operating expenditure (2021-22)',
-    'online_education_offered': 'Online education', 'online_students_offered_courses': 'Number of students offered online courses',
-    'online_credits_transferred': 'Number of credits transferred', 'online_courses_count': 'Number of courses',
-    'students_economically_backward': 'Number of students who are economically backward',
-    'students_socially_challenged': 'Number of students who are socially challenged',
-    'students_not_receiving_reimbursement': 'Number of students who are not receiving full tuition fee reimbursement',
-    'phd_awarded_full_time_last_3_years': 'Number of full-time Ph.D. awarded in the last 3 years',
-    'phd_awarded_part_time_last_3_years': 'Number of part-time Ph.D. awarded in the last 3 years',
-    'publications_2023': 'Publications (2023)', 'publications_2022': 'Publications (2022)', 'publications_2021': 'Publications (2021)',
-    'citations_21_22': 'Citations (2021-22)', 'citations_20_21': 'Citations (2020-21)', 'citations_19_20': 'Citations (2019-20)',
-    'sponsored_projects_23_24': 'Sponsored projects - Total amount received (2023-24)',
-    'sponsored_projects_22_23': 'Sponsored projects - Total amount received (2022-23)',
-    'sponsored_projects_21_22': 'Sponsored projects - Total amount received (2021-22)',
-    'consultancy_projects_23_24': 'Consultancy projects - Total amount received (2023-24)',
-    'consultancy_projects_22_23': 'Consultancy projects - Total amount received (2022-23)',
-    'consultancy_projects_21_22': 'Consultancy projects - Total amount received (2021-22)',
-    'edp_earnings_23_24': 'Earnings from Executive Development Programme (2023-24)',
-    'edp_earnings_22_23': 'Earnings from Executive Development Programme (2022-23)',
-    'edp_earnings_21_22': 'Earnings from Executive Development Programme (2021-22)',
-    'nba_accreditation': 'Valid NBA Accrediatation', 'naac_accreditation': 'Valid NAAC Accrediatation',
-    # Research specific fields
-    'qnr_100': 'QNR(100)', 'qlr_100': 'QLR(100)', 'sfc_100': 'SFC(100)', 'oi_100': 'OI(100)', 'perception_100': 'PERCEPTION(100)'
-}
+# This dictionary maps the clean JSON keys to the final, user-friendly row names.
+# Year-wise rows follow the ranking year, e.g. "(2023-24)" in 2025.
+def json_to_user_mapping(year):
+    return {
+        'rank': 'rank', 'institute_name': 'Name of the Institute', 'nirf_id': 'Institute / University ID (as per NIRF)',
+        'category': 'Category: Overall/Engineering/Law/Management, etc.,', 'approved_intake_ug': 'Approved Intake (UG)',
+        'approved_intake_pg': 'Approved Intake (PG)', 'approved_intake_pg_integrated': 'Approved Intake (PG-Integrated)',
+        'total_approved_intake': 'Total Approved Intake', 'students_ug_strength': 'No.of. Students UG Strength',
+        'students_pg_strength': 'No.of. Students PG Strength', 'students_pg_integrated': 'No.of.students PG Integrated',
+        'total_students_strength_excluding_phd': 'Total Students Strength (Excluding Ph.D)',
+        'phd_full_time': 'Ph.D Full-time', 'phd_part_time': 'Ph.D Part-time',
+        'total_students_including_phd': 'Number of students (including Ph.D. students) = SS=',
+        'total_faculty': 'Number of faculty members',
+        **yearly_fields('capital_expenditure', 'Annual capital expenditure', financial_years(year)),
+        **yearly_fields('operating_expenditure', 'Annual operating expenditure', financial_years(year)),
+        'online_education_offered': 'Online education', 'online_students_offered_courses': 'Number of students offered online courses',
+        'online_credits_transferred': 'Number of credits transferred', 'online_courses_count': 'Number of courses',
+        'students_economically_backward': 'Number of students who are economically backward',
+        'students_socially_challenged': 'Number of students who are socially challenged',
+        'students_not_receiving_reimbursement': 'Number of students who are not receiving full tuition fee reimbursement',
+        'phd_awarded_full_time_last_3_years': 'Number of full-time Ph.D. awarded in the last 3 years',
+        'phd_awarded_part_time_last_3_years': 'Number of part-time Ph.D. awarded in the last 3 years',
+        **yearly_fields('publications', 'Publications', publication_years(year)),
+        **yearly_fields('citations', 'Citations', citation_years(year)),
+        **yearly_fields('sponsored_projects', 'Sponsored projects - Total amount received', financial_years(year)),
+        **yearly_fields('consultancy_projects', 'Consultancy projects - Total amount received', financial_years(year)),
+        **yearly_fields('edp_earnings', 'Earnings from Executive Development Programme', financial_years(year)),
+        'nba_accreditation': 'Valid NBA Accrediatation', 'naac_accreditation': 'Valid NAAC Accrediatation',
+        # Research specific fields
+        'qnr_100': 'QNR(100)', 'qlr_100': 'QLR(100)', 'sfc_100': 'SFC(100)', 'oi_100': 'OI(100)', 'perception_100': 'PERCEPTION(100)'
+    }
+
+
+RESEARCH_SCORE_KEYS = ['qnr_100', 'qlr_100', 'sfc_100', 'oi_100', 'perception_100']
+
+
+def row_templates(year):
+    """The exact row names you want in each final sheet, in order."""
+    mapping = json_to_user_mapping(year)
+    templates = {
+        "Overall": [label for key, label in mapping.items() if key not in RESEARCH_SCORE_KEYS],
+        "Research": [mapping[key] for key in ['rank', 'institute_name', 'nirf_id', 'category', *RESEARCH_SCORE_KEYS]],
+    }
+    # Reuse the comprehensive 'Overall' template for other similar categories
+    templates["University"] = templates["Overall"]
+    templates["Engineering"] = templates["Overall"]
+    templates["Law"] = templates["Overall"]
+    return templates
+
+
+JSON_TO_USER_MAPPING = json_to_user_mapping(DEFAULT_YEAR)
+ROW_TEMPLATES = row_templates(DEFAULT_YEAR)
 
 
 # --- 3. Data Loading and Processing Function ---
-def load_and_prepare_data():
-    """Loads, merges, and transforms data from JSON files into the final 'wide' format."""
-    print("--- Starting Data Processing ---")
-    
-    # Load data from PDF extraction
+def load_checkpoint_records(paths):
+    """Stream-reads the extractor's JSON-lines logs into {category: [records]}.
+
+    If a report was extracted more than once, in one log or across several,
+    the record with the newest extracted_at wins. Lines written before
+    records were timestamped count as oldest; among those, the later line
+    (in `paths` order) wins.
+    """
+    by_source = {}
+    for path in paths:
+        for record in iter_checkpoint(path):
+            key = (record["category"], record["source"])
+            extracted_at = record.get("extracted_at", 0.0)
+            if key not in by_source or extracted_at >= by_source[key][0]:
+                by_source[key] = (extracted_at, record["data"])
+    all_data = {}
+    for (category, _), (_, data) in by_source.items():
+        all_data.setdefault(category, []).append(data)
+    return all_data
+
+
+def fill_ranks(all_data, ranking_tables):
+    """Sets each record's missing rank from its category's ranking table, matched by NIRF ID."""
+    filled = 0
+    for category, records in all_data.items():
+        ranks = {row["nirf_id"]: row["rank"] for row in ranking_tables.get(category, [])}
+        for record in records:
+            if not record.get("rank") and record.get("nirf_id") in ranks:
+                record["rank"] = ranks[record["nirf_id"]]
+                filled += 1
+    return filled
+
+
+def load_records(year):
+    """Loads and merges one ranking year's raw extracted records as {category: [record dicts]}."""
+    # Load data from PDF extraction (one checkpoint log per shard)
+    root, ext = os.path.splitext(checkpoint_file(year))
+    checkpoint_files = sorted(glob.glob(f"{root}{ext}") + glob.glob(f"{root}.shard*{ext}"))
+    if checkpoint_files:
+        all_data = load_checkpoint_records(checkpoint_files)
+        print(f" Successfully loaded {', '.join(repr(p) for p in checkpoint_files)}")
+    elif year == DEFAULT_YEAR:
+        try:
+            with open(PDF_JSON_FILE, 'r') as f:
+                all_data = json.load(f)
+            print(f" Successfully loaded '{PDF_JSON_FILE}'")
+        except FileNotFoundError:
+            print(f" Warning: '{PDF_JSON_FILE}' not found. Starting with an empty dataset.")
+            all_data = {}
+    else:
+        # The legacy file only ever held DEFAULT_YEAR's records; never load them as another year's
+        print(f" Warning: no '{checkpoint_file(year)}' found. Starting with an empty dataset.")
+        all_data = {}
+
+    # Rank is not in the PDFs; take it from the scraped ranking tables where a record has none
     try:
-        with open(PDF_JSON_FILE, 'r') as f:
-            all_data = json.load(f)
-        print(f" Successfully loaded '{PDF_JSON_FILE}'")
+        with open(ranking_tables_file(year), 'r') as f:
+            filled = fill_ranks(all_data, json.load(f))
+        print(f" Filled {filled} rank(s) from '{ranking_tables_file(year)}'")
     except FileNotFoundError:
-        print(f" Warning: '{PDF_JSON_FILE}' not found. Starting with an empty dataset.")
-        all_data = {}
+        pass
 
     # Load and merge data from the Research HTML table scrape
+    research_json_file = research_file(year)
     try:
-        with open(RESEARCH_JSON_FILE, 'r') as f:
+        with open(research_json_file, 'r') as f:
             research_data = json.load(f)
         if "Research" in research_data:
             all_data["Research"] = research_data["Research"]
-            print(f" Successfully loaded and merged '{RESEARCH_JSON_FILE}'")
+            print(f" Successfully loaded and merged '{research_json_file}'")
     except FileNotFoundError:
-        print(f" Info: '{RESEARCH_JSON_FILE}' not found. Skipping merge.")
-    
-    # Process the merged data into the final format
-    final_dataframes = {}
-    for category, metric_order in ROW_TEMPLATES.items():
-        if category in all_data and all_data.get(category):
-            # Create a standard DataFrame (institutions are rows)
-            tidy_df = pd.DataFrame(all_data[category])
-            # Rename columns from simple JSON keys to final user-friendly names
-            tidy_df.rename(columns=JSON_TO_USER_MAPPING, inplace=True)
-
-            if 'Name of the Institute' in tidy_df.columns:
-                # Set institute name as the index, transpose, and reorder to match the template
-                tidy_df = tidy_df.set_index('Name of the Institute')
-                wide_df = tidy_df.T
-                final_df = wide_df.reindex(metric_order)
-                final_dataframes[category] = final_df
-                print(f" Created and structured DataFrame for '{category}'.")
-    
-    return final_dataframes
+        print(f" Info: '{research_json_file}' not found. Skipping merge.")
+    return all_data
 
-# --- 4. Main Upload Logic ---
-if __name__ == "__main__":
-    dataframes_to_upload = load_and_prepare_data()
 
-    if not dataframes_to_upload:
-        print("\n No data was processed. Halting upload.")
-        exit()
+def build_tidy_tables(all_data, year):
+    """Parses the records of every known category into typed tidy tables (one row per institute)."""
+    # Column types come from the year's mapping
+    schema = build_schema(json_to_user_mapping(year))
+    tidy_tables = {}
+    for category in row_templates(year):
+        if all_data.get(category):
+            tidy_tables[category] = typed_frame(all_data[category], schema)
+            print(f" Parsed {len(tidy_tables[category])} typed record(s) for '{category}'.")
+    return tidy_tables
+
+
+def render_wide(category, tidy_df, year):
+    """The sheet layout for one category: metric names as rows, institutes as columns."""
+    return wide_view(tidy_df, row_templates(year)[category], json_to_user_mapping(year))
 
+
+def load_and_prepare_data(year=DEFAULT_YEAR):
+    """Loads, merges, and transforms data from JSON files into the final 'wide' format."""
+    print("--- Starting Data Processing ---")
+    tidy_tables = build_tidy_tables(load_records(year), year)
+    return {category: render_wide(category, df, year) for category, df in tidy_tables.items()}
+
+
+def merge_into_history(tidy_tables, year, path=HISTORY_FILE):
+    """Upserts the year's records into the history store, replacing only this year's rows."""
+    with HistoryStore(path) as history:
+        for category, df in tidy_tables.items():
+            records = df.astype(object).where(df.notna(), None).to_dict("records")
+            written, skipped = history.upsert(year, category, records)
+            note = f" ({skipped} without a NIRF ID skipped)" if skipped else ""
+            print(f" Merged {written} '{category}' record(s) for {year} into '{path}'{note}.")
+
+
+def write_parquet(tidy_tables, year, root=TIDY_STORE_DIR):
+    """Replaces the year's partitions in the Parquet store; skipped with a warning without pyarrow."""
+    try:
+        rows = write_tidy(tidy_tables, year, root)
+        print(f" Wrote {rows} typed row(s) to '{root}' (year={year}).")
+    except ImportError as e:
+        print(f" Warning: skipping the Parquet store. {e}")
+
+
+def open_spreadsheet(year):
+    """Authenticates and opens the year's Google Sheet; returns None (after saying why) if it cannot."""
+    sheet_name = GOOGLE_SHEET_NAME.format(year=year)
     print("\n--- Authenticating with Google Sheets API ---")
     try:
         scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
@@ -146,31 +209,89 @@ if __name__ == "__main__":
     except FileNotFoundError:
         print(f" FATAL ERROR: Credentials file '{CREDENTIALS_FILE}' not found.")
         print("Please complete the one-time API setup and place the file in the project folder.")
-        exit()
+        return None
     except Exception as e:
         print(f" FATAL ERROR: An issue occurred during authentication: {e}")
-        exit()
+        return None
 
     try:
-        spreadsheet = client.open(GOOGLE_SHEET_NAME)
-        print(f" Successfully opened Google Sheet: '{GOOGLE_SHEET_NAME}'")
+        spreadsheet = client.open(sheet_name)
+        print(f" Successfully opened Google Sheet: '{sheet_name}'")
     except gspread.SpreadsheetNotFound:
-        print(f" FATAL ERROR: Spreadsheet named '{GOOGLE_SHEET_NAME}' not found in your Google Drive.")
+        print(f" FATAL ERROR: Spreadsheet named '{sheet_name}' not found in your Google Drive.")
         print("Please ensure the sheet exists and has been shared with the service account's email.")
-        exit()
+        return None
+    return spreadsheet
 
-    print("\n--- Uploading Data to Google Sheets ---")
-    for category, df in dataframes_to_upload.items():
-        try:
-            worksheet = spreadsheet.worksheet(category)
-            print(f"Updating existing sub-sheet: '{category}'...")
-        except gspread.WorksheetNotFound:
-            print(f"Creating new sub-sheet: '{category}'...")
-            worksheet = spreadsheet.add_worksheet(title=category, rows=500, cols=300)
-        
+
+def upload_category(spreadsheet, category, tidy_df, year):
+    """Writes one category's sheet view to its sub-sheet, per SYNC_MODE."""
+    # The wide view exists only for the sheet; analysis should read the Parquet store
+    df = render_wide(category, tidy_df, year)
+    grid = dataframe_to_grid(df)
+    try:
+        worksheet = spreadsheet.worksheet(category)
+        print(f"Updating existing sub-sheet: '{category}'...")
+    except gspread.WorksheetNotFound:
+        print(f"Creating new sub-sheet: '{category}'...")
+        worksheet = spreadsheet.add_worksheet(title=category, rows=len(grid), cols=len(grid[0]))
+
+    if SYNC_MODE == 'full':
         worksheet.clear()
         # 'include_index=True' is crucial for writing the metric names in the first column
-        set_with_dataframe(worksheet, df, include_index=True)
+        set_with_dataframe(worksheet, df, include_index=True, resize=True)
         print(f" Successfully uploaded data for '{category}'.")
+        return
+
+    result = sync_worksheet(worksheet, grid)
+    if result.cells_changed:
+        print(f" Synced '{category}': {result.cells_changed} changed cell(s) in {result.ranges} range(s), "
+              f"{result.requests} request(s), sheet is {result.shape[0]}x{result.shape[1]}.")
+    else:
+        print(f" '{category}' is already up to date.")
+
+
+# --- 4. Main Upload Logic ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the typed tables and upload them to Google Sheets.")
+    parser.add_argument("--year", type=int, default=default_year(),
+                        help="Ranking year to process (default: $NIRF_YEAR or %(default)s)")
+    parser.add_argument("--no-upload", action="store_true", help="Only update the local stores")
+    parser.add_argument("--fake-sheets", action="store_true",
+                        help="Sync to in-memory worksheets instead of Google Sheets (for benchmarks)")
+    parser.add_argument("--metrics-out", help="JSON run report (default: run_reports/convert-<timestamp>.json)")
+    args = parser.parse_args()
+    year = args.year
+    metrics = RunMetrics("convert", {"year": year})
+
+    print(f"--- Starting Data Processing ({year}) ---")
+    with metrics.timer("load"):
+        all_data = load_records(year)
+    with metrics.timer("tidy"):
+        tidy_tables = build_tidy_tables(all_data, year)
+
+    if not tidy_tables:
+        print("\n No data was processed. Halting upload.")
+        exit()
+    metrics.count("records", sum(len(df) for df in tidy_tables.values()))
+
+    with metrics.timer("history"):
+        merge_into_history(tidy_tables, year)
+    with metrics.timer("parquet"):
+        write_parquet(tidy_tables, year)
+
+    spreadsheet = None
+    if args.fake_sheets:
+        spreadsheet = FakeSpreadsheet()
+    elif not args.no_upload:
+        spreadsheet = open_spreadsheet(year)
+        if spreadsheet is None:
+            exit()
 
-    print("\n Project Complete! Your Google Sheet has been populated.")
\ No newline at end of file
+    if spreadsheet is not None:
+        print("\n--- Uploading Data to Google Sheets ---")
+        for category, tidy_df in tidy_tables.items():
+            with metrics.timer("upload", category):
+                upload_category(spreadsheet, category, tidy_df, year)
+        print("\n Project Complete! Your Google Sheet has been populated.")
+    print(format_summary(metrics.write_json(args.metrics_out)))
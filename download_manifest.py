@@ -0,0 +1,87 @@
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+# --- 1. Configuration ---
+DEFAULT_MANIFEST_FILE = "nirf_reports/manifest.sqlite3"
+
+STATUS_PARTIAL = "partial"
+STATUS_COMPLETE = "complete"
+
+
+@dataclass
+class ManifestEntry:
+    """What we know about one downloaded report."""
+    url: str
+    path: str
+    status: str
+    etag: str = ""
+    last_modified: str = ""
+    size: int = 0
+    sha256: str = ""
+    updated_at: float = 0.0
+
+
+# --- 2. Manifest Store ---
+class DownloadManifest:
+    """A small SQLite table recording URL, validators, size and hash for every report.
+
+    The downloader consults it to send conditional requests on later runs and
+    to resume interrupted downloads with Range requests. It is safe to share
+    between the downloader's worker threads.
+    """
+
+    def __init__(self, path=DEFAULT_MANIFEST_FILE):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS downloads (
+                url TEXT PRIMARY KEY,
+                path TEXT NOT NULL,
+                status TEXT NOT NULL,
+                etag TEXT NOT NULL DEFAULT '',
+                last_modified TEXT NOT NULL DEFAULT '',
+                size INTEGER NOT NULL DEFAULT 0,
+                sha256 TEXT NOT NULL DEFAULT '',
+                updated_at REAL NOT NULL
+            )""")
+        self._conn.commit()
+
+    def get(self, url):
+        """Returns the ManifestEntry for url, or None if it has never been seen."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, path, status, etag, last_modified, size, sha256, updated_at FROM downloads WHERE url = ?",
+                (url,)).fetchone()
+        return ManifestEntry(*row) if row else None
+
+    def record(self, entry):
+        """Inserts or replaces the entry for entry.url."""
+        entry.updated_at = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO downloads VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (entry.url, entry.path, entry.status, entry.etag, entry.last_modified,
+                 entry.size, entry.sha256, entry.updated_at))
+            self._conn.commit()
+
+    def entries(self, status=None):
+        """Returns all entries, optionally only those with the given status."""
+        query = "SELECT url, path, status, etag, last_modified, size, sha256, updated_at FROM downloads"
+        params = ()
+        if status:
+            query += " WHERE status = ?"
+            params = (status,)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [ManifestEntry(*row) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
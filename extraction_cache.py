@@ -0,0 +1,179 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+# --- 1. Configuration ---
+DEFAULT_CACHE_FILE = os.path.join(".nirf_cache", "cache.sqlite3")
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3  # 2 GB; least recently used entries are evicted beyond this
+
+KIND_TEXT = "text"  # PDF text, keyed by the PDF's content hash
+KIND_LLM = "llm"    # Parsed LLM output, keyed by PDF hash + prompt hash + model name
+
+
+# --- 2. Key Helpers ---
+def file_sha256(path, chunk_size=1024 * 1024):
+    """Returns the hex SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def text_sha256(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def llm_cache_key(pdf_sha256, prompt_sha256, model_name):
+    """Key for an LLM result: changes whenever the PDF, the prompt or the model changes."""
+    return text_sha256(f"{pdf_sha256}:{prompt_sha256}:{model_name}")
+
+
+# --- 3. Cache Store ---
+class ExtractionCache:
+    """A content-addressed disk cache for extracted PDF text and LLM responses.
+
+    Values are JSON-serialisable objects stored in SQLite alongside their size
+    and last access time. When the total size exceeds max_bytes the least
+    recently used entries are evicted. Hits and misses are counted per kind
+    for the run summary.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_FILE, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = Counter()
+        self.misses = Counter()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (kind, key)
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_access)")
+        self._conn.commit()
+
+    def get(self, kind, key):
+        """Returns the cached value, or None on a miss."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM entries WHERE kind = ? AND key = ?", (kind, key)).fetchone()
+            if row is None:
+                self.misses[kind] += 1
+                return None
+            self._conn.execute("UPDATE entries SET last_access = ? WHERE kind = ? AND key = ?",
+                               (time.time(), kind, key))
+            self._conn.commit()
+            self.hits[kind] += 1
+        return json.loads(row[0])
+
+    def put(self, kind, key, value):
+        """Stores value under (kind, key), then evicts LRU entries if over the size cap."""
+        payload = json.dumps(value)
+        now = time.time()
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                               (kind, key, payload, len(payload.encode("utf-8")), now, now))
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT kind, key, size FROM entries ORDER BY last_access").fetchall()
+        doomed = []
+        for kind, key, size in rows:
+            if total <= self.max_bytes:
+                break
+            doomed.append((kind, key))
+            total -= size
+        self._conn.executemany("DELETE FROM entries WHERE kind = ? AND key = ?", doomed)
+
+    def stats(self):
+        """Returns {kind: (entries, bytes)} for everything on disk."""
+        with self._lock:
+            rows = self._conn.execute("SELECT kind, COUNT(*), SUM(size) FROM entries GROUP BY kind").fetchall()
+        return {kind: (count, size) for kind, count, size in rows}
+
+    def entries(self, kind=None):
+        """Returns (kind, key, size, created_at, last_access) rows, most recently used first."""
+        query = "SELECT kind, key, size, created_at, last_access FROM entries"
+        params = ()
+        if kind:
+            query += " WHERE kind = ?"
+            params = (kind,)
+        with self._lock:
+            return self._conn.execute(query + " ORDER BY last_access DESC", params).fetchall()
+
+    def purge(self, kind=None, older_than_days=None):
+        """Deletes entries, optionally only of one kind and/or unused for N days. Returns the count."""
+        clauses, params = [], []
+        if kind:
+            clauses.append("kind = ?")
+            params.append(kind)
+        if older_than_days is not None:
+            clauses.append("last_access < ?")
+            params.append(time.time() - older_than_days * 86400)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM entries" + where, params).rowcount
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+        return deleted
+
+    def summary(self):
+        """One line per kind with this run's hit/miss counters."""
+        kinds = sorted(set(self.hits) | set(self.misses))
+        if not kinds:
+            return "  cache: not used"
+        return "\n".join(f"  cache[{kind}]: {self.hits[kind]} hit(s), {self.misses[kind]} miss(es)" for kind in kinds)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# --- 4. Command Line ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or purge the PDF text / LLM response cache.")
+    parser.add_argument("--cache-file", default=DEFAULT_CACHE_FILE)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="Show entry counts and sizes per kind")
+    list_parser = sub.add_parser("list", help="List entries, most recently used first")
+    list_parser.add_argument("--kind", choices=[KIND_TEXT, KIND_LLM])
+    list_parser.add_argument("--limit", type=int, default=50)
+    purge_parser = sub.add_parser("purge", help="Delete entries")
+    purge_parser.add_argument("--kind", choices=[KIND_TEXT, KIND_LLM])
+    purge_parser.add_argument("--older-than-days", type=float)
+    args = parser.parse_args()
+
+    cache = ExtractionCache(args.cache_file)
+    if args.command == "stats":
+        stats = cache.stats()
+        if not stats:
+            print("Cache is empty.")
+        for kind, (count, size) in sorted(stats.items()):
+            print(f"{kind}: {count} entries, {size / (1024 * 1024):.1f} MB")
+        print(f"cap: {cache.max_bytes / (1024 * 1024):.0f} MB")
+    elif args.command == "list":
+        for kind, key, size, created_at, last_access in cache.entries(args.kind)[:args.limit]:
+            used = time.strftime("%Y-%m-%d %H:%M", time.localtime(last_access))
+            print(f"{kind:<5} {key[:16]}  {size:>10,} B  last used {used}")
+    elif args.command == "purge":
+        deleted = cache.purge(args.kind, args.older_than_days)
+        print(f"Purged {deleted} entries.")
+    cache.close()
@@ -0,0 +1,176 @@
+import argparse
+import re
+import sqlite3
+import threading
+import time
+
+# --- 1. Configuration ---
+DEFAULT_HISTORY_FILE = "nirf_history.sqlite3"
+
+# Year-wise keys are stored as (metric, period): capital_expenditure_23_24 ->
+# ("capital_expenditure", "2023-24"), publications_2023 -> ("publications", "2023").
+ACADEMIC_YEAR_KEY = re.compile(r"^(.+)_(\d{2})_(\d{2})$")
+CALENDAR_YEAR_KEY = re.compile(r"^(.+)_((?:19|20)\d{2})$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS institutes (
+    year INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    nirf_id TEXT NOT NULL,
+    institute_name TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (year, category, nirf_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS metrics (
+    year INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    nirf_id TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    period TEXT NOT NULL,
+    value,
+    PRIMARY KEY (year, category, nirf_id, metric, period)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS metrics_by_institute ON metrics (nirf_id, metric, period, year);
+CREATE INDEX IF NOT EXISTS metrics_by_metric ON metrics (metric, year, category, period);
+"""
+
+
+def split_metric_key(key):
+    """Splits a record key into (metric, period); period is "" for keys without a year."""
+    match = ACADEMIC_YEAR_KEY.match(key)
+    if match:
+        return match.group(1), f"20{match.group(2)}-{match.group(3)}"
+    match = CALENDAR_YEAR_KEY.match(key)
+    if match:
+        return match.group(1), match.group(2)
+    return key, ""
+
+
+def _plain(value):
+    """numpy/pandas scalars -> Python values sqlite3 can bind."""
+    return value.item() if hasattr(value, "item") else value
+
+
+# --- 2. Store ---
+class HistoryStore:
+    """Every ranking year's records in one SQLite file, keyed on (year, category, nirf_id).
+
+    Re-running a year replaces that year's rows for the institutes it
+    contains and leaves every other year untouched. Metrics are stored one
+    per row and indexed by institute and by metric, so trend and league-table
+    queries read only the rows they need.
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def upsert(self, year, category, records):
+        """Merges one category's records for `year`; returns (written, skipped without nirf_id)."""
+        written = skipped = 0
+        now = time.time()
+        with self._lock, self._conn:
+            for record in records:
+                nirf_id = record.get("nirf_id")
+                if not nirf_id:
+                    skipped += 1
+                    continue
+                key = (year, category, nirf_id)
+                self._conn.execute(
+                    "INSERT INTO institutes (year, category, nirf_id, institute_name, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?) ON CONFLICT (year, category, nirf_id) DO UPDATE SET "
+                    "institute_name = excluded.institute_name, updated_at = excluded.updated_at",
+                    (*key, record.get("institute_name"), now))
+                # Replace rather than update, so fields missing from the new record do not linger
+                self._conn.execute("DELETE FROM metrics WHERE year = ? AND category = ? AND nirf_id = ?", key)
+                self._conn.executemany(
+                    "INSERT INTO metrics (year, category, nirf_id, metric, period, value) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(*key, *split_metric_key(name), _plain(value)) for name, value in record.items()
+                     if value is not None and name not in ("nirf_id", "institute_name", "category")])
+                written += 1
+        return written, skipped
+
+    def years(self):
+        """(year, category, institutes) for everything in the store."""
+        return self._conn.execute("SELECT year, category, COUNT(*) FROM institutes "
+                                  "GROUP BY year, category ORDER BY year, category").fetchall()
+
+    def trend(self, nirf_id, metric, category=None):
+        """Returns [(period, value, reported in year)] for one institute's metric, oldest first.
+
+        Year-wise metrics give one value per period; a period reported by
+        several ranking years takes the latest report. Other metrics (rank,
+        total_faculty, ...) give one value per ranking year.
+        """
+        query = "SELECT period, value, year FROM metrics WHERE nirf_id = ? AND metric = ?"
+        params = [nirf_id, metric]
+        if category:
+            query += " AND category = ?"
+            params.append(category)
+        latest = {}
+        for period, value, year in self._conn.execute(query + " ORDER BY year", params):
+            latest[period or str(year)] = (value, year)
+        return [(period, value, year) for period, (value, year) in sorted(latest.items())]
+
+    def top(self, year, category, metric, period=None, limit=10, ascending=False):
+        """The institutes with the highest (or, with ascending=True, lowest) value of a metric.
+
+        For year-wise metrics, `period` defaults to the most recent one reported.
+        """
+        if period is None:
+            row = self._conn.execute("SELECT MAX(period) FROM metrics WHERE metric = ? AND year = ? AND category = ?",
+                                     (metric, year, category)).fetchone()
+            period = row[0] or ""
+        return self._conn.execute(
+            "SELECT m.nirf_id, i.institute_name, m.value FROM metrics m "
+            "JOIN institutes i ON i.year = m.year AND i.category = m.category AND i.nirf_id = m.nirf_id "
+            "WHERE m.metric = ? AND m.year = ? AND m.category = ? AND m.period = ? "
+            f"ORDER BY m.value {'ASC' if ascending else 'DESC'} LIMIT ?",
+            (metric, year, category, period, limit)).fetchall()
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --- 3. Command Line ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the multi-year NIRF history store.")
+    parser.add_argument("--history-file", default=DEFAULT_HISTORY_FILE)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("years", help="Institutes stored per year and category")
+    trend_parser = sub.add_parser("trend", help="One institute's metric across years")
+    trend_parser.add_argument("nirf_id")
+    trend_parser.add_argument("metric", help="e.g. rank, total_faculty, capital_expenditure")
+    trend_parser.add_argument("--category")
+    top_parser = sub.add_parser("top", help="Highest values of a metric in one year and category")
+    top_parser.add_argument("year", type=int)
+    top_parser.add_argument("category")
+    top_parser.add_argument("metric")
+    top_parser.add_argument("--period", help="e.g. 2023-24 (default: most recent)")
+    top_parser.add_argument("--limit", type=int, default=10)
+    top_parser.add_argument("--ascending", action="store_true", help="Lowest first (e.g. for rank)")
+    args = parser.parse_args()
+
+    store = HistoryStore(args.history_file)
+    start = time.perf_counter()
+    if args.command == "years":
+        for year, category, count in store.years():
+            print(f"{year} {category:<12} {count} institute(s)")
+    elif args.command == "trend":
+        for period, value, year in store.trend(args.nirf_id, args.metric, args.category):
+            print(f"{period:<8} {value}  (reported {year})")
+    elif args.command == "top":
+        for nirf_id, name, value in store.top(args.year, args.category, args.metric, args.period,
+                                              args.limit, args.ascending):
+            print(f"{nirf_id:<14} {value:>16}  {name}")
+    print(f"({(time.perf_counter() - start) * 1000:.1f} ms)")
+    store.close()
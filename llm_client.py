@@ -0,0 +1,369 @@
+import asyncio
+import json
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+
+# --- 1. Configuration ---
+DEFAULT_CONCURRENCY = 8     # Upper bound on requests in flight
+DEFAULT_RPM = 1000          # Requests per minute allowed by the API tier
+DEFAULT_TPM = 1_000_000     # Prompt + response tokens per minute allowed by the API tier
+DEFAULT_MAX_RETRIES = 5     # Retries for 429/5xx responses
+DEFAULT_PARSE_RETRIES = 2   # Extra attempts when the model returns unparseable JSON
+DEFAULT_BACKOFF = 1.0       # Seconds; doubled on every retry, plus jitter
+DEFAULT_BATCH_LINGER = 0.5  # Seconds a partly filled batch waits for more requests before it is sent
+
+
+@dataclass
+class LLMResponse:
+    text: str
+    prompt_tokens: int = 0
+    response_tokens: int = 0
+
+
+class RateLimitError(Exception):
+    """The backend rejected the request because of a quota (HTTP 429)."""
+
+
+class TransientLLMError(Exception):
+    """A server-side failure (HTTP 5xx, deadline) that is worth retrying."""
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token) used to reserve TPM budget."""
+    return len(text) // 4 + 1
+
+
+def parse_json_response(text):
+    """Parses the model's reply, tolerating ```json fences around it."""
+    cleaned_text = text.strip().replace("```json", "").replace("```", "")
+    return json.loads(cleaned_text)
+
+
+JSON_TYPES = {"object": dict, "array": list, "string": str, "number": (int, float), "integer": int,
+              "boolean": bool}
+
+
+def validate_json(value, schema, path="$"):
+    """Checks `value` against the JSON Schema subset used for structured output.
+
+    Understands type, nullable, properties, required, items and enum, which
+    is what Gemini's response_schema accepts. Returns a list of problems,
+    empty when the value conforms.
+    """
+    if value is None:
+        return [] if schema.get("nullable") else [f"{path}: null is not allowed"]
+    expected = JSON_TYPES.get(schema.get("type"), object)
+    # bool is a subclass of int, but true is not a number in JSON
+    if not isinstance(value, expected) or (isinstance(value, bool) and schema.get("type") != "boolean"):
+        return [f"{path}: expected {schema.get('type')}, got {type(value).__name__}"]
+    if "enum" in schema and value not in schema["enum"]:
+        return [f"{path}: {value!r} is not one of {schema['enum']}"]
+    problems = []
+    if isinstance(value, dict):
+        problems += [f"{path}: missing '{key}'" for key in schema.get("required", ()) if key not in value]
+        for key, subschema in schema.get("properties", {}).items():
+            if key in value:
+                problems += validate_json(value[key], subschema, f"{path}.{key}")
+    elif isinstance(value, list) and "items" in schema:
+        for i, item in enumerate(value):
+            problems += validate_json(item, schema["items"], f"{path}[{i}]")
+    return problems
+
+
+# --- 2. Backends ---
+class GeminiBackend:
+    """Calls Gemini through one GenerativeModel shared by every request."""
+
+    def __init__(self, model_name, api_key=None, generation_config=None):
+        import google.generativeai as genai
+        from google.api_core import exceptions as google_exceptions
+
+        if api_key:
+            genai.configure(api_key=api_key) # type: ignore
+        self.model_name = model_name
+        self._model = genai.GenerativeModel(model_name, generation_config=generation_config) # type: ignore
+        self._rate_limited = (google_exceptions.ResourceExhausted, google_exceptions.TooManyRequests)
+        self._transient = (google_exceptions.ServiceUnavailable, google_exceptions.InternalServerError,
+                           google_exceptions.DeadlineExceeded, google_exceptions.GatewayTimeout)
+
+    async def generate(self, prompt, response_schema=None):
+        # With a schema, Gemini's structured output mode returns JSON matching it
+        config = ({"response_mime_type": "application/json", "response_schema": response_schema}
+                  if response_schema else None)
+        try:
+            response = await self._model.generate_content_async(prompt, generation_config=config)
+        except self._rate_limited as e:
+            raise RateLimitError(str(e)) from e
+        except self._transient as e:
+            raise TransientLLMError(str(e)) from e
+        usage = getattr(response, "usage_metadata", None)
+        return LLMResponse(response.text,
+                           getattr(usage, "prompt_token_count", 0) or 0,
+                           getattr(usage, "candidates_token_count", 0) or 0)
+
+
+class FakeLLMBackend:
+    """A local stand-in for Gemini that simulates latency and quota throttling.
+
+    `responder(prompt)` produces the reply text (any response schema is
+    left to the responder's output). Requests beyond `rpm_quota`
+    in any 60 second window fail with RateLimitError, and `error_rate` of
+    requests fail with TransientLLMError.
+    """
+
+    def __init__(self, responder=None, latency=0.5, jitter=0.2, rpm_quota=None, error_rate=0.0, model_name="fake"):
+        self.responder = responder or (lambda prompt: "{}")
+        self.latency = latency
+        self.jitter = jitter
+        self.rpm_quota = rpm_quota
+        self.error_rate = error_rate
+        self.model_name = model_name
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._recent = deque()
+
+    async def generate(self, prompt, response_schema=None):
+        self.calls += 1
+        now = time.monotonic()
+        while self._recent and now - self._recent[0] > 60:
+            self._recent.popleft()
+        if self.rpm_quota is not None and len(self._recent) >= self.rpm_quota:
+            await asyncio.sleep(0.01)
+            raise RateLimitError("429 quota exceeded (fake)")
+        self._recent.append(now)
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+            if random.random() < self.error_rate:
+                raise TransientLLMError("503 service unavailable (fake)")
+            text = self.responder(prompt)
+        finally:
+            self.in_flight -= 1
+        return LLMResponse(text, estimate_tokens(prompt), estimate_tokens(text))
+
+
+# --- 3. Rate Limiting ---
+class TokenBucket:
+    """Refills `per_minute` units evenly over a minute; acquire() waits for enough units.
+
+    throttle() halves the refill rate when the server pushes back and
+    recover() grows it back towards the configured rate one step at a time.
+    """
+
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.tokens = float(per_minute)
+        self.max_rate = per_minute / 60.0
+        self.rate = self.max_rate
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def throttle(self):
+        self._refill()
+        self.rate = max(self.max_rate / 1000, self.rate / 2)
+        # Drop the burst allowance so the lower rate takes effect immediately
+        self.tokens = min(self.tokens, 1.0)
+
+    def recover(self):
+        self.rate = min(self.max_rate, self.rate + self.max_rate / 100)
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount=1):
+        amount = min(amount, self.capacity)  # An oversized request still gets through eventually
+        async with self._lock:
+            self._refill()
+            while self.tokens < amount:
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= amount
+
+
+class AdaptiveLimiter:
+    """Caps requests in flight, halving the cap on throttling and growing it back on success (AIMD)."""
+
+    def __init__(self, max_limit, min_limit=1):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.limit = max_limit
+        self.in_flight = 0
+        self._successes = 0
+        self._cond = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    async def __aexit__(self, *exc):
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self):
+        self._successes += 1
+        if self._successes >= self.limit and self.limit < self.max_limit:
+            self.limit += 1
+            self._successes = 0
+
+    def on_throttle(self):
+        self.limit = max(self.min_limit, self.limit // 2)
+        self._successes = 0
+
+
+# --- 4. Extraction Stage ---
+class AsyncLLMExtractor:
+    """Keeps up to N LLM requests in flight within RPM/TPM limits and returns parsed JSON.
+
+    429 and 5xx errors are retried with exponential backoff (and shrink the
+    concurrency cap on 429); replies that are not valid JSON are re-requested
+    up to `parse_retries` times.
+    """
+
+    def __init__(self, backend, max_concurrency=DEFAULT_CONCURRENCY, rpm=DEFAULT_RPM, tpm=DEFAULT_TPM,
+                 max_retries=DEFAULT_MAX_RETRIES, parse_retries=DEFAULT_PARSE_RETRIES, backoff=DEFAULT_BACKOFF):
+        self.backend = backend
+        self.limiter = AdaptiveLimiter(max_concurrency)
+        self.request_bucket = TokenBucket(rpm)
+        self.token_bucket = TokenBucket(tpm)
+        self.max_retries = max_retries
+        self.parse_retries = parse_retries
+        self.backoff = backoff
+        self.stats = {"requests": 0, "retries": 0, "rate_limited": 0, "parse_failures": 0,
+                      "failed": 0, "prompt_tokens": 0, "response_tokens": 0}
+
+    async def _generate(self, prompt, response_schema=None):
+        """One successful backend call, retrying throttling and server errors."""
+        for attempt in range(self.max_retries + 1):
+            await self.request_bucket.acquire()
+            await self.token_bucket.acquire(estimate_tokens(prompt))
+            try:
+                async with self.limiter:
+                    self.stats["requests"] += 1
+                    response = await self.backend.generate(prompt, response_schema)
+                self.limiter.on_success()
+                self.request_bucket.recover()
+                self.stats["prompt_tokens"] += response.prompt_tokens
+                self.stats["response_tokens"] += response.response_tokens
+                return response
+            except RateLimitError:
+                self.stats["rate_limited"] += 1
+                self.limiter.on_throttle()
+                self.request_bucket.throttle()
+            except TransientLLMError:
+                pass
+            if attempt < self.max_retries:
+                self.stats["retries"] += 1
+                delay = self.backoff * (2 ** attempt)
+                await asyncio.sleep(delay + random.uniform(0, self.backoff))
+        raise TransientLLMError(f"gave up after {self.max_retries + 1} attempts")
+
+    async def extract(self, prompt, response_schema=None):
+        """Returns the parsed JSON object for prompt, or None if it could not be obtained.
+
+        `response_schema` asks the backend for structured output; checking
+        the parsed value against it is left to the caller.
+        """
+        response = None
+        for attempt in range(self.parse_retries + 1):
+            try:
+                response = await self._generate(prompt, response_schema)
+                return parse_json_response(response.text)
+            except (RateLimitError, TransientLLMError) as e:
+                print(f"  -> An error occurred with the LLM API: {e}")
+                break
+            except ValueError:
+                self.stats["parse_failures"] += 1
+            except Exception as e:
+                # Anything else (bad request, permission denied, prompt too large) fails this prompt only
+                print(f"  -> An error occurred with the LLM API: {type(e).__name__}: {e}")
+                break
+        self.stats["failed"] += 1
+        if response and response.text:
+            print(f"  -> Raw Response Text (on error): {response.text[:100]}...")
+        return None
+
+    def summary(self):
+        s = self.stats
+        return (f"  llm: {s['requests']} request(s), {s['retries']} retries, {s['rate_limited']} throttled, "
+                f"{s['parse_failures']} bad JSON, {s['failed']} failed; {s['prompt_tokens']} prompt / "
+                f"{s['response_tokens']} response tokens; final concurrency {self.limiter.limit}, "
+                f"{self.request_bucket.rate * 60:.0f} rpm")
+
+
+# --- 5. Request Batching ---
+class _Batch:
+    def __init__(self):
+        self.items = []
+        self.futures = []
+        self.tokens = 0
+        self.timer = None
+
+
+class RequestBatcher:
+    """Packs concurrent requests into shared batches under an item and token budget.
+
+    submit() adds an item to the open batch of its group and waits for the
+    item's result. A batch is sent as soon as it holds `max_items` items or
+    another item would take it over `token_budget` estimated prompt tokens,
+    and otherwise `linger` seconds after its first item arrived. Sending is
+    `await send(group, items)`, which returns one result per item; only
+    items of the same group share a batch.
+    """
+
+    def __init__(self, send, max_items, token_budget, linger=DEFAULT_BATCH_LINGER):
+        self.send = send
+        self.max_items = max_items
+        self.token_budget = token_budget
+        self.linger = linger
+        self.stats = {"batches": 0, "batched_items": 0}
+        self._open = {}
+        self._sending = set()
+
+    async def submit(self, group, item, tokens):
+        loop = asyncio.get_running_loop()
+        batch = self._open.get(group)
+        if batch is not None and batch.tokens + tokens > self.token_budget:
+            self._flush(group, batch)
+            batch = None
+        if batch is None:
+            batch = self._open[group] = _Batch()
+            batch.timer = loop.call_later(self.linger, self._flush, group, batch)
+        future = loop.create_future()
+        batch.items.append(item)
+        batch.futures.append(future)
+        batch.tokens += tokens
+        if len(batch.items) >= self.max_items:
+            self._flush(group, batch)
+        return await future
+
+    def _flush(self, group, batch):
+        if self._open.get(group) is not batch:
+            return  # Already sent when it filled up
+        del self._open[group]
+        batch.timer.cancel()
+        task = asyncio.ensure_future(self._send(group, batch))
+        self._sending.add(task)
+        task.add_done_callback(self._sending.discard)
+
+    async def _send(self, group, batch):
+        self.stats["batches"] += 1
+        self.stats["batched_items"] += len(batch.items)
+        try:
+            results = await self.send(group, batch.items)
+        except Exception as e:
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for future, result in zip(batch.futures, results):
+            if not future.done():  # Its caller may have been cancelled meanwhile
+                future.set_result(result)
@@ -0,0 +1,357 @@
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+
+import requests
+
+from checkpoint_log import CheckpointWriter, processed_sources
+from dataframe_converter import (build_tidy_tables, fill_ranks, load_checkpoint_records, merge_into_history,
+                                 open_spreadsheet, upload_category, write_parquet)
+from download_manifest import DownloadManifest
+from extraction_cache import ExtractionCache
+from llm_client import AsyncLLMExtractor, FakeLLMBackend, GeminiBackend
+from nirf_scraper import (BASE_URL, CATEGORIES, MANIFEST_FILE, PER_HOST_LIMIT, research_records,
+                          save_tables, scrape_ranking_page)
+from nirf_years import checkpoint_file, default_year, reports_dir
+from pdf_downloader import PDFDownloader
+from pdf_extractor import (CACHE_FILE, CACHE_MAX_BYTES, CATEGORIES_TO_PROCESS, EXTRACT_TIMEOUT, EXTRACT_WORKERS,
+                           LLM_BATCH_DOCS, LLM_CONCURRENCY, LLM_RPM, LLM_TPM, MODEL_NAME, BatchedLLMExtractor,
+                           ExtractionStats, api_key, extract_record, extract_text_async, field_templates,
+                           placeholder_responder)
+from prompt_filter import PromptStats
+from run_metrics import RunMetrics, enable_worker_profiling, format_summary, profiled
+from sheets_sync import FakeSpreadsheet
+
+# --- 1. Configuration ---
+DOWNLOAD_WORKERS = 8   # PDFs downloading at once (still capped per host by PER_HOST_LIMIT)
+QUEUE_DEPTH = 2        # Items buffered between stages, per worker of the stage that consumes them
+
+
+@dataclass
+class Document:
+    """One report travelling through the pipeline."""
+    category: str
+    url: str
+    path: str
+    extracted: object = None   # ExtractedText once the text stage has run
+
+
+@dataclass
+class StageStats:
+    name: str
+    workers: int
+    items: int = 0
+    failed: int = 0
+    busy: float = 0.0   # Seconds spent working, summed over the stage's workers
+
+    def report(self):
+        # busy / workers is how long the stage would take on its own at this concurrency
+        alone = self.busy / self.workers if self.workers else 0.0
+        return (f"  {self.name:<9} {self.workers:>3} worker(s) {self.items:>6} item(s) {self.failed:>4} failed "
+                f"{self.busy:>9.1f}s busy {alone:>8.1f}s alone")
+
+
+# --- 2. Pipeline ---
+class Pipeline:
+    """Scrape -> download -> text -> LLM -> publish, every stage running at once.
+
+    Stages are joined by bounded asyncio queues, so a PDF is parsed as soon as
+    it lands and sent to the LLM as soon as its text is ready. A full queue
+    makes the stage before it wait, so a slow LLM holds back the downloads
+    instead of letting parsed text pile up in memory. Each stage has its own
+    worker count, and end-to-end time approaches that of the slowest stage
+    rather than the sum of all of them.
+
+    A category is published (history store, Parquet and, optionally, its
+    sub-sheet) as soon as its last report has been settled.
+    """
+
+    def __init__(self, year, downloader, extractor, cache, checkpoint, spreadsheet=None, base=BASE_URL,
+                 extract_workers=EXTRACT_WORKERS, limit=None, prompt_stats=None, metrics=None, batcher=None):
+        self.year = year
+        self.downloader = downloader
+        self.extractor = extractor
+        self.cache = cache
+        self.checkpoint = checkpoint
+        self.spreadsheet = spreadsheet
+        self.base = base
+        self.limit = limit
+        self.prompt_stats = prompt_stats
+        self.batcher = batcher
+        self.metrics = metrics or RunMetrics("run", {"year": year})
+        self.fields = field_templates(year)["Shared"]
+        self.done = processed_sources(checkpoint.path)
+        self.extraction_stats = ExtractionStats()
+
+        # With batching, enough workers to fill a batch for every request in flight
+        llm_workers = extractor.limiter.max_limit * (batcher.max_docs if batcher else 1)
+        self.stats = {name: StageStats(name, workers) for name, workers in [
+            ("scrape", 1), ("download", downloader.max_workers), ("text", extract_workers),
+            ("llm", llm_workers), ("publish", 1)]}
+        self.download_queue = asyncio.Queue(maxsize=downloader.max_workers * QUEUE_DEPTH)
+        self.text_queue = asyncio.Queue(maxsize=extract_workers * QUEUE_DEPTH)
+        self.llm_queue = asyncio.Queue(maxsize=llm_workers * QUEUE_DEPTH)
+        self.publish_queue = asyncio.Queue()
+        self.download_pool = ThreadPoolExecutor(downloader.max_workers)
+        self.extract_pool = ProcessPoolExecutor(extract_workers)
+
+        self.ranking_tables = {}
+        self.research = []
+        self.pending = {}      # Reports of each category not yet settled
+        self.scraped = set()   # Categories whose every report has been queued
+
+    # --- Stage work: each returns the document for the next stage, or None when it is settled ---
+    async def download(self, doc):
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self.download_pool, self.downloader.download, doc.url, doc.path)
+        if not result.ok:
+            print(f"    -> Error downloading {result.url}: {result.error}")
+            self.stats["download"].failed += 1
+            return None
+        if doc.category not in CATEGORIES_TO_PROCESS or (doc.category, os.path.basename(doc.path)) in self.done:
+            return None
+        return doc
+
+    async def extract_text(self, doc):
+        doc.extracted = await extract_text_async(doc.path, self.extract_pool, EXTRACT_TIMEOUT,
+                                                 self.extraction_stats, self.cache, self.metrics)
+        if doc.extracted.error:
+            self.stats["text"].failed += 1
+            return None
+        return doc
+
+    async def extract_fields(self, doc):
+        print(f"Extracting data from: {os.path.basename(doc.path)}")
+        data = await extract_record(doc.extracted, doc.category, self.extractor, self.cache, self.fields,
+                                    self.prompt_stats, self.metrics, self.batcher)
+        if data:
+            # Written straight away, so a crash later in the run loses nothing already done
+            self.checkpoint.append(doc.category, os.path.basename(doc.path), doc.extracted.sha256, data)
+        else:
+            self.stats["llm"].failed += 1
+        return None
+
+    # --- Plumbing ---
+    async def _worker(self, stage, inbox, work, outbox=None):
+        stats = self.stats[stage]
+        while True:
+            doc = await inbox.get()
+            start = time.perf_counter()
+            try:
+                doc_next = await work(doc)
+            except Exception as e:
+                print(f"  -> {stage} failed for {os.path.basename(doc.path)}: {e}")
+                stats.failed += 1
+                doc_next = None
+            stats.busy += time.perf_counter() - start
+            stats.items += 1
+            if doc_next is not None:
+                # Waits while the next stage is full: this is the backpressure
+                await outbox.put(doc_next)
+            else:
+                self._settle(doc.category)
+            inbox.task_done()
+
+    def _settle(self, category):
+        self.pending[category] -= 1
+        self._maybe_publish(category)
+
+    def _maybe_publish(self, category):
+        if category in self.scraped and self.pending.get(category, 0) == 0:
+            self.scraped.discard(category)
+            self.publish_queue.put_nowait(category)
+
+    async def scrape(self, category):
+        loop = asyncio.get_running_loop()
+        stats = self.stats["scrape"]
+        start = time.perf_counter()
+        try:
+            table_rows, pdf_urls = await loop.run_in_executor(
+                self.download_pool, scrape_ranking_page, self.downloader, self.base, self.year, category)
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching page for {category}: {e}")
+            stats.failed += 1
+            table_rows = None
+        seconds = time.perf_counter() - start
+        stats.busy += seconds
+        stats.items += 1
+        self.metrics.record("page", seconds, category, table_rows is not None)
+        if table_rows is None:
+            return
+        self.ranking_tables[category] = table_rows
+        print(f"{category}: {len(table_rows)} ranking row(s), {len(pdf_urls)} PDF(s).")
+
+        self.pending[category] = 0
+        if category == "Research":
+            self.research = research_records(table_rows)
+        else:
+            category_dir = os.path.join(reports_dir(self.year), category)
+            os.makedirs(category_dir, exist_ok=True)
+            for pdf_url in pdf_urls[:self.limit]:
+                self.pending[category] += 1
+                await self.download_queue.put(Document(category, pdf_url,
+                                                       os.path.join(category_dir, pdf_url.split("/")[-1])))
+        self.scraped.add(category)
+        self._maybe_publish(category)
+
+    def publish(self, category):
+        """Runs in a thread: merges the category's records into the local stores and its sub-sheet."""
+        if category == "Research":
+            records = self.research
+        else:
+            records = load_checkpoint_records([self.checkpoint.path]).get(category, [])
+        fill_ranks({category: records}, self.ranking_tables)
+        tidy_tables = build_tidy_tables({category: records}, self.year)
+        if not tidy_tables:
+            return
+        merge_into_history(tidy_tables, self.year)
+        write_parquet(tidy_tables, self.year)
+        if self.spreadsheet is not None:
+            upload_category(self.spreadsheet, category, tidy_tables[category], self.year)
+
+    async def _publisher(self):
+        loop = asyncio.get_running_loop()
+        stats = self.stats["publish"]
+        while True:
+            category = await self.publish_queue.get()
+            start = time.perf_counter()
+            ok = False
+            try:
+                await loop.run_in_executor(None, self.publish, category)
+                ok = True
+            except Exception as e:
+                print(f"  -> publish failed for {category}: {e}")
+                stats.failed += 1
+            self.metrics.record("publish", time.perf_counter() - start, category, ok)
+            stats.busy += time.perf_counter() - start
+            stats.items += 1
+            self.publish_queue.task_done()
+
+    async def run(self, categories=CATEGORIES):
+        """Runs every stage to completion; returns the wall-clock seconds taken."""
+        start = time.perf_counter()
+        workers = [
+            *(asyncio.create_task(self._worker("download", self.download_queue, self.download, self.text_queue))
+              for _ in range(self.stats["download"].workers)),
+            *(asyncio.create_task(self._worker("text", self.text_queue, self.extract_text, self.llm_queue))
+              for _ in range(self.stats["text"].workers)),
+            *(asyncio.create_task(self._worker("llm", self.llm_queue, self.extract_fields))
+              for _ in range(self.stats["llm"].workers)),
+            asyncio.create_task(self._publisher()),
+        ]
+        try:
+            await asyncio.gather(*(self.scrape(category) for category in categories))
+            # Each queue only drains once everything upstream of it has
+            for queue in (self.download_queue, self.text_queue, self.llm_queue, self.publish_queue):
+                await queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self.download_pool.shutdown()
+            self.extract_pool.shutdown()
+        save_tables(self.year, self.ranking_tables, self.research)
+        return time.perf_counter() - start
+
+    def report(self, elapsed):
+        print("\n--- Pipeline ---")
+        for stats in self.stats.values():
+            print(stats.report())
+        sequential = sum(s.busy / s.workers for s in self.stats.values() if s.workers)
+        print(f"  wall time {elapsed:.1f}s; the stages one after another would take about {sequential:.1f}s")
+
+
+# --- 3. Command Line ---
+def parse_args():
+    parser = argparse.ArgumentParser(prog="python -m nirf", description="Run the NIRF pipeline end to end.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_parser = sub.add_parser("run", help="Scrape, download, extract and publish with every stage overlapped")
+    run_parser.add_argument("--year", type=int, default=default_year(),
+                            help="Ranking year to process (default: $NIRF_YEAR or %(default)s)")
+    run_parser.add_argument("--base-url", default=BASE_URL,
+                            help="Site to scrape (e.g. a local copy or benchmarks.fake_nirf_server)")
+    run_parser.add_argument("--categories", nargs="+", default=CATEGORIES)
+    run_parser.add_argument("--limit", type=int, help="Process at most this many PDFs per category")
+    run_parser.add_argument("--checkpoint", help="JSON-lines output (default: nirf_data_<year>.jsonl)")
+    run_parser.add_argument("--download-workers", type=int, default=DOWNLOAD_WORKERS)
+    run_parser.add_argument("--per-host-limit", type=int, default=PER_HOST_LIMIT)
+    run_parser.add_argument("--extract-workers", type=int, default=EXTRACT_WORKERS,
+                            help="Processes extracting PDF text (default: one per CPU core)")
+    run_parser.add_argument("--llm-concurrency", type=int, default=LLM_CONCURRENCY,
+                            help="LLM requests in flight (halved automatically on 429s)")
+    run_parser.add_argument("--batch-docs", type=int, default=LLM_BATCH_DOCS,
+                            help="Reports packed into one LLM request (default: %(default)s; 1 turns batching off)")
+    run_parser.add_argument("--fake-llm", type=float, metavar="SECONDS",
+                            help="Use the local fake LLM backend with this latency instead of Gemini")
+    run_parser.add_argument("--no-upload", action="store_true", help="Only update the local stores")
+    run_parser.add_argument("--fake-sheets", action="store_true",
+                            help="Sync to in-memory worksheets instead of Google Sheets (for benchmarks)")
+    run_parser.add_argument("--metrics-out", help="JSON run report (default: run_reports/run-<timestamp>.json)")
+    run_parser.add_argument("--profile", metavar="DIR",
+                            help="Write cProfile stats for this process and every extraction worker to DIR")
+    args = parser.parse_args()
+    args.checkpoint = args.checkpoint or checkpoint_file(args.year)
+    return args
+
+
+def main():
+    args = parse_args()
+    spreadsheet = None
+    if args.fake_sheets:
+        spreadsheet = FakeSpreadsheet()
+    elif not args.no_upload:
+        spreadsheet = open_spreadsheet(args.year)
+        if spreadsheet is None:
+            return 1
+
+    backend = (FakeLLMBackend(placeholder_responder, latency=args.fake_llm) if args.fake_llm is not None
+               else GeminiBackend(MODEL_NAME, api_key))
+    extractor = AsyncLLMExtractor(backend, max_concurrency=args.llm_concurrency, rpm=LLM_RPM, tpm=LLM_TPM)
+    batcher = BatchedLLMExtractor(extractor, args.batch_docs) if args.batch_docs > 1 else None
+    cache = ExtractionCache(CACHE_FILE, CACHE_MAX_BYTES)
+    metrics = RunMetrics("run", {"year": args.year, "base_url": args.base_url, "categories": args.categories,
+                                 "download_workers": args.download_workers, "extract_workers": args.extract_workers,
+                                 "llm_concurrency": args.llm_concurrency, "batch_docs": args.batch_docs,
+                                 "model": backend.model_name})
+    manifest = DownloadManifest(MANIFEST_FILE)
+    downloader = PDFDownloader(max_workers=args.download_workers, per_host_limit=args.per_host_limit,
+                               manifest=manifest, metrics=metrics)
+    prompt_stats = PromptStats()
+    if args.profile:
+        enable_worker_profiling(args.profile)
+
+    print(f"--- NIRF pipeline ({args.year}) ---")
+    with CheckpointWriter(args.checkpoint) as checkpoint, \
+            profiled(args.profile and os.path.join(args.profile, "main.prof")):
+        pipeline = Pipeline(args.year, downloader, extractor, cache, checkpoint, spreadsheet, args.base_url,
+                            args.extract_workers, args.limit, prompt_stats, metrics, batcher)
+        elapsed = asyncio.run(pipeline.run(args.categories))
+
+    pipeline.report(elapsed)
+    pipeline.extraction_stats.report()
+    print(extractor.summary())
+    if batcher:
+        print(batcher.summary())
+    print(prompt_stats.summary())
+    print(cache.summary())
+    metrics.count("records_written", checkpoint.written)
+    metrics.add_counters(extractor.stats, prefix="llm_")
+    if batcher:
+        metrics.add_counters(batcher.batcher.stats, prefix="llm_")
+        metrics.add_counters(batcher.stats, prefix="llm_")
+    metrics.add_counters(cache.hits, prefix="cache_hits_")
+    metrics.add_counters(cache.misses, prefix="cache_misses_")
+    metrics.meta["stage_busy_seconds"] = {name: stats.busy for name, stats in pipeline.stats.items()}
+    print(format_summary(metrics.write_json(args.metrics_out, backend.model_name)))
+    downloader.close()
+    manifest.close()
+    cache.close()
+    print(f"\n {checkpoint.written} new record(s) appended to {args.checkpoint}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
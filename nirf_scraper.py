@@ -1,112 +1,127 @@
 import os
+import argparse
 import requests
 import json
-from bs4 import BeautifulSoup
+import time
 from urllib.parse import urljoin
+from pdf_downloader import PDFDownloader, summarize
+from download_manifest import DownloadManifest
+from nirf_years import default_year, ranking_page, ranking_tables_file, reports_dir, research_file
+from ranking_parser import iter_ranking_rows, pdf_links
+from run_metrics import RunMetrics, format_summary
 
 # --- Configuration ---
-BASE = "https://www.nirfindia.org"
-CATEGORIES = {
-    "Overall": "/Rankings/2025/OverallRanking.html",
-    "Engineering": "/Rankings/2025/EngineeringRanking.html",
-    "University": "/Rankings/2025/UniversityRanking.html",
-    "Law": "/Rankings/2025/LawRanking.html",
-    "Research": "/Rankings/2025/ResearchRanking.html",
-} #Add/remove categories and their links
-
-# This list will hold data scraped from the Research HTML table
-research_data_list = []
-
-print("--- Starting Hybrid NIRF Scraper ---")
-
-print("--- Starting Hybrid NIRF Scraper ---")
-
-for category, ranking_path in CATEGORIES.items():
-    url = urljoin(BASE, ranking_path)
-    print(f"\nProcessing Category: {category}")
-    print(f"URL: {url}")
-
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, "html.parser")
-
-        # --- SPECIAL LOGIC: Deeply scrape HTML table ONLY for "Research" category ---
-        if category == "Research":
-            # Find the main table by its specific ID
-            main_table = soup.find('table', id='tbl_overall')
-            if main_table:
-                print("-> HTML table found for Research category. Scraping data...")
-                # Find all data rows within the main table's body
-                main_rows = main_table.find('tbody').find_all('tr') if main_table.find('tbody') else [] # type: ignore
-
-                for row in main_rows:
-                    main_cols = row.find_all('td', recursive=False)
-                    if len(main_cols) < 6: continue
-
-                    # Precisely extract the institute name, ignoring nested tags
-                    institute_name = main_cols[1].find(text=True, recursive=False).strip()
-                    if not institute_name: continue
-
-                    # Find the hidden sub-table within the row
-                    hidden_div = main_cols[1].find('div', class_='tbl_hidden')
-                    if not hidden_div: continue
-                    
-                    nested_table = hidden_div.find('table')
-                    if not nested_table: continue
-
-                    # Extract the score values from the nested table
-                    nested_cols = nested_table.find('tbody').find_all('td') if nested_table.find('tbody') else []
-                    
-                    if len(nested_cols) < 5: continue
-
-                    # Create a dictionary with all required fields from both tables
-                    research_entry = {
-                        "rank": main_cols[5].text.strip(),
-                        "institute_name": institute_name,
-                        "nirf_id": main_cols[0].text.strip(),
-                        "category": category,
-                        "qnr_100": nested_cols[0].text.strip(),
-                        "qlr_100": nested_cols[1].text.strip(),
-                        "sfc_100": nested_cols[2].text.strip(),
-                        "oi_100": nested_cols[3].text.strip(),
-                        "perception_100": nested_cols[4].text.strip()
-                    }
-                    research_data_list.append(research_entry)
-                print(f"  -> Successfully scraped {len(research_data_list)} entries from the complex table.")
+BASE_URL = "https://www.nirfindia.org"
+CATEGORIES = ["Overall", "Engineering", "University", "Law", "Research"] #Add/remove categories
+DOWNLOAD_WORKERS = 8  # Parallel PDF downloads (shared connection pool)
+PER_HOST_LIMIT = 4    # Max simultaneous connections to a single host
+MANIFEST_FILE = os.path.join("nirf_reports", "manifest.sqlite3")  # Lets re-runs skip unchanged PDFs
+
+RESEARCH_FIELDS = ["rank", "institute_name", "nirf_id", "category",
+                   "qnr_100", "qlr_100", "sfc_100", "oi_100", "perception_100"]
+
+
+def scrape_ranking_page(downloader, base, year, category):
+    """Fetches one category's ranking page; returns (table rows, absolute PDF URLs)."""
+    url = urljoin(base, ranking_page(year, category))
+    response = downloader.session.get(url, timeout=downloader.timeout)
+    response.raise_for_status()
+    # Every ranking page has the same table; keep each category's rows and parameter scores
+    table_rows = [dict(row, category=category) for row in iter_ranking_rows(response.content, category)]
+    pdf_urls = [urljoin(url, href) for href in pdf_links(response.content)]
+    return table_rows, pdf_urls
+
+
+def research_records(table_rows):
+    """The Research category's records come from its HTML table alone."""
+    return [{key: row[key] for key in RESEARCH_FIELDS} for row in table_rows if "qnr_100" in row]
+
+
+def save_tables(year, ranking_tables, research_data_list):
+    """Writes the Research records and every scraped category's ranking table for `year`.
+
+    Categories not scraped this time keep the rows saved by an earlier run.
+    """
+    if research_data_list:
+        with open(research_file(year), "w") as f:
+            json.dump({"Research": research_data_list}, f, indent=4)
+        print(f"\nSuccessfully saved scraped table data to {research_file(year)}")
+
+    if ranking_tables:
+        try:
+            with open(ranking_tables_file(year), "r") as f:
+                ranking_tables = {**json.load(f), **ranking_tables}
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+        with open(ranking_tables_file(year), "w") as f:
+            json.dump(ranking_tables, f, indent=4)
+        print(f"Saved every category's ranking table to {ranking_tables_file(year)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download NIRF ranking PDFs and scrape the Research table.")
+    parser.add_argument("--year", type=int, default=default_year(),
+                        help="Ranking year to scrape (default: $NIRF_YEAR or %(default)s)")
+    parser.add_argument("--base-url", default=BASE_URL,
+                        help="Site to scrape (e.g. a local copy or benchmarks.fake_nirf_server)")
+    parser.add_argument("--metrics-out", help="JSON run report (default: run_reports/scrape-<timestamp>.json)")
+    args = parser.parse_args()
+    YEAR = args.year
+    BASE = args.base_url
+
+    # This list will hold data scraped from the Research HTML table
+    research_data_list = []
+    # Rank, score and parameter scores of every category's ranking table
+    ranking_tables = {}
+
+    print(f"--- Starting Hybrid NIRF Scraper ({YEAR}) ---")
+
+    # One pooled session for every ranking page and PDF, so connections are reused.
+    # The manifest remembers ETag/Last-Modified so unchanged PDFs are not re-downloaded.
+    manifest = DownloadManifest(MANIFEST_FILE)
+    metrics = RunMetrics("scrape", {"year": YEAR, "base_url": BASE})
+    downloader = PDFDownloader(max_workers=DOWNLOAD_WORKERS, per_host_limit=PER_HOST_LIMIT, manifest=manifest,
+                               metrics=metrics)
+
+    for category in CATEGORIES:
+        print(f"\nProcessing Category: {category}")
+        print(f"URL: {urljoin(BASE, ranking_page(YEAR, category))}")
+
+        try:
+            with metrics.timer("page", category):
+                table_rows, pdf_urls = scrape_ranking_page(downloader, BASE, YEAR, category)
+            ranking_tables[category] = table_rows
+            print(f"-> Parsed {len(table_rows)} row(s) from the ranking table.")
+
+            # --- SPECIAL LOGIC: The Research category's data comes from its HTML table alone ---
+            if category == "Research":
+                if table_rows:
+                    research_data_list.extend(research_records(table_rows))
+                    print(f"  -> Successfully scraped {len(research_data_list)} entries from the complex table.")
+                else:
+                    print("  -> Warning: Could not find an HTML table with id='tbl_overall' on the Research page.")
+
+            # --- STANDARD LOGIC: Download PDFs for ALL OTHER categories ---
             else:
-                print("  -> Warning: Could not find an HTML table with id='tbl_overall' on the Research page.")
-                
-        # --- STANDARD LOGIC: Download PDFs for ALL OTHER categories ---
-        else:
-            category_dir = os.path.join("nirf_reports", category)
-            if not os.path.exists(category_dir):
-                os.makedirs(category_dir)
-            
-            pdf_links = [urljoin(url, a['href']) for a in soup.find_all("a", href=True) if a['href'].endswith(".pdf")] # type: ignore
-            
-            print(f"-> Found {len(pdf_links)} PDF(s) to download.")
-            for i, pdf_url in enumerate(pdf_links):
-                try:
-                    pdf_response = requests.get(pdf_url)
-                    filename = os.path.join(category_dir, pdf_url.split("/")[-1])
-                    with open(filename, "wb") as f:
-                        f.write(pdf_response.content)
-                    if (i + 1) % 10 == 0 or (i + 1) == len(pdf_links):
-                        print(f"  -> Downloaded {i + 1}/{len(pdf_links)} PDFs...")
-                except requests.exceptions.RequestException as e:
-                    print(f"    -> Error downloading {pdf_url}: {e}")
-            print(f"  -> Finished downloading all PDFs for {category}.")
-
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching page for {category}: {e}")
-
-# --- Save the Scraped Research Data to its own JSON file ---
-if research_data_list:
-    final_research_json = {"Research": research_data_list}
-    
-    with open("research_data.json", "w") as f:
-        json.dump(final_research_json, f, indent=4)
-    print("\nSuccessfully saved scraped table data to research_data.json")
-
-print("\n--- Scraper Finished ---")
\ No newline at end of file
+                category_dir = os.path.join(reports_dir(YEAR), category)
+                if not os.path.exists(category_dir):
+                    os.makedirs(category_dir)
+
+                print(f"-> Found {len(pdf_urls)} PDF(s) to download.")
+                jobs = [(pdf_url, os.path.join(category_dir, pdf_url.split("/")[-1])) for pdf_url in pdf_urls]
+                start = time.perf_counter()
+                results = downloader.download_all(jobs)
+                print(f"  -> {summarize(results, time.perf_counter() - start)}")
+                print(f"  -> Finished downloading all PDFs for {category}.")
+
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching page for {category}: {e}")
+
+    downloader.close()
+    manifest.close()
+
+    # --- Save the Scraped Research Data and ranking tables to their own JSON files ---
+    save_tables(YEAR, ranking_tables, research_data_list)
+    print(format_summary(metrics.write_json(args.metrics_out)))
+
+    print("\n--- Scraper Finished ---")
@@ -0,0 +1,68 @@
+import os
+
+# --- 1. Configuration ---
+DEFAULT_YEAR = 2025        # Ranking year used when neither --year nor NIRF_YEAR is given
+REPORTS_ROOT = "nirf_reports"
+
+
+def default_year():
+    """The ranking year to work on: $NIRF_YEAR if set, else DEFAULT_YEAR."""
+    return int(os.environ.get("NIRF_YEAR", DEFAULT_YEAR))
+
+
+# --- 2. Year-relative Periods ---
+# A ranking year reports the three financial years ending two years before it
+# (the 2025 ranking covers 2023-24 back to 2021-22), publications for the
+# matching calendar years and citations two years further back.
+def academic_year(start):
+    """2023 -> "2023-24"."""
+    return f"{start}-{(start + 1) % 100:02d}"
+
+
+def period_key(period):
+    """Key suffix for a period: "2023-24" -> "23_24", 2023 -> "2023"."""
+    if isinstance(period, int):
+        return str(period)
+    first, second = period.split("-")
+    return f"{first[-2:]}_{second}"
+
+
+def financial_years(year):
+    return [academic_year(year - 2 - i) for i in range(3)]
+
+
+def publication_years(year):
+    return [year - 2 - i for i in range(3)]
+
+
+def citation_years(year):
+    return [academic_year(year - 4 - i) for i in range(3)]
+
+
+def yearly_fields(prefix, label, periods):
+    """{"<prefix>_<period key>": "<label> (<period>)"} for each period, most recent first."""
+    return {f"{prefix}_{period_key(period)}": f"{label} ({period})" for period in periods}
+
+
+# --- 3. Per-year Locations ---
+def ranking_page(year, category):
+    """Path of a category's ranking page on nirfindia.org."""
+    return f"/Rankings/{year}/{category}Ranking.html"
+
+
+def reports_dir(year):
+    """Downloaded PDFs live in nirf_reports/<year>/<category>/ so years never overwrite each other."""
+    return os.path.join(REPORTS_ROOT, str(year))
+
+
+def checkpoint_file(year):
+    return f"nirf_data_{year}.jsonl"
+
+
+def research_file(year):
+    return f"research_data_{year}.json"
+
+
+def ranking_tables_file(year):
+    """Rank, score and parameter scores scraped from every category's ranking page."""
+    return f"ranking_tables_{year}.json"
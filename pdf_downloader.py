@@ -0,0 +1,297 @@
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from download_manifest import STATUS_COMPLETE, STATUS_PARTIAL, ManifestEntry
+from run_metrics import doc_key
+
+# --- 1. Configuration ---
+DEFAULT_WORKERS = 8          # Total downloads in flight across all hosts
+DEFAULT_PER_HOST_LIMIT = 4   # Be polite to nirfindia.org: never more than this per host
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BACKOFF = 0.5        # Seconds; doubled on every retry, plus jitter
+DEFAULT_CHUNK_SIZE = 64 * 1024
+DEFAULT_TIMEOUT = (10, 60)   # (connect, read) seconds
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# DownloadResult.status values
+DOWNLOADED = "downloaded"
+RESUMED = "resumed"
+NOT_MODIFIED = "not_modified"
+FAILED = "failed"
+
+
+@dataclass
+class DownloadResult:
+    """Outcome of a single PDF download."""
+    url: str
+    path: str
+    ok: bool
+    status: str = ""
+    bytes_written: int = 0   # Bytes transferred in this run (0 for not-modified files)
+    attempts: int = 0
+    seconds: float = 0.0
+    error: str = ""
+
+
+def content_range_start(value):
+    """First byte position of a Content-Range header like "bytes 500-999/1000", or None."""
+    match = re.match(r"bytes\s+(\d+)-\d+/(?:\d+|\*)$", value.strip())
+    return int(match.group(1)) if match else None
+
+
+def content_range_total(value):
+    """Complete length from a Content-Range header like "bytes */1000" (as sent with a 416), or None."""
+    match = re.match(r"bytes\s+(?:\*|\d+-\d+)/(\d+)$", value.strip())
+    return int(match.group(1)) if match else None
+
+
+# --- 2. Download Engine ---
+class RetryableStatus(requests.exceptions.HTTPError):
+    """Raised for HTTP statuses (429/5xx) that are worth retrying."""
+
+    def __init__(self, response):
+        super().__init__(f"{response.status_code} {response.reason} for url: {response.url}", response=response)
+
+
+class PDFDownloader:
+    """Downloads PDFs in parallel over one pooled HTTP session.
+
+    A thread pool bounds the total number of requests in flight, a semaphore
+    per host bounds how hard any one server is hit, and every response is
+    streamed to disk in chunks instead of being held in memory.
+
+    When a DownloadManifest is supplied, unchanged reports are skipped with
+    conditional requests (If-None-Match / If-Modified-Since) and interrupted
+    downloads are resumed from their .part file with a Range request.
+
+    With a RunMetrics, every download's time, bytes and retries are recorded.
+    """
+
+    def __init__(self, max_workers=DEFAULT_WORKERS, per_host_limit=DEFAULT_PER_HOST_LIMIT,
+                 max_retries=DEFAULT_MAX_RETRIES, backoff=DEFAULT_BACKOFF,
+                 chunk_size=DEFAULT_CHUNK_SIZE, timeout=DEFAULT_TIMEOUT, session=None, manifest=None,
+                 metrics=None):
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.session = session or self._build_session()
+        self.manifest = manifest
+        self.metrics = metrics
+        self._host_slots = {}
+        self._host_lock = threading.Lock()
+
+    def _build_session(self):
+        """Creates a session whose connection pool is large enough for every worker."""
+        session = requests.Session()
+        # Retries are handled by _fetch so that streaming errors are retried too.
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers, max_retries=0)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _slot_for(self, url):
+        """Returns the semaphore limiting concurrent requests to the URL's host."""
+        host = urlsplit(url).netloc
+        with self._host_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_slots[host]
+
+    def _sleep_before_retry(self, attempt, response=None):
+        """Sleeps with exponential backoff, honouring a server's Retry-After header."""
+        delay = self.backoff * (2 ** (attempt - 1))
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                delay = max(delay, int(retry_after))
+        time.sleep(delay + random.uniform(0, self.backoff))
+
+    def _request_headers(self, url, dest_path, tmp_path):
+        """Builds conditional/Range headers from the manifest; returns (headers, resume_offset)."""
+        entry = self.manifest.get(url) if self.manifest else None
+        if entry is None:
+            return {}, 0
+        validator = entry.etag or entry.last_modified
+        if entry.status == STATUS_COMPLETE and os.path.exists(dest_path) \
+                and os.path.getsize(dest_path) == entry.size:
+            headers = {}
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+            return headers, 0
+        if entry.status == STATUS_PARTIAL and validator and os.path.exists(tmp_path):
+            offset = os.path.getsize(tmp_path)
+            if offset:
+                # If-Range makes the server send the whole file if it changed meanwhile
+                return {"Range": f"bytes={offset}-", "If-Range": validator}, offset
+        return {}, 0
+
+    def _fetch(self, url, dest_path, resume=True):
+        """Streams one URL to disk; returns (status, bytes transferred)."""
+        tmp_path = dest_path + ".part"
+        headers, offset = self._request_headers(url, dest_path, tmp_path) if resume else ({}, 0)
+        with self.session.get(url, stream=True, timeout=self.timeout, headers=headers) as response:
+            if response.status_code == 304:
+                return NOT_MODIFIED, 0
+            if response.status_code in RETRY_STATUS_CODES:
+                raise RetryableStatus(response)
+            if offset and response.status_code == 416:
+                # The .part file may already hold the whole body, leaving nothing to request
+                if content_range_total(response.headers.get("Content-Range", "")) == offset:
+                    return self._finish_partial(url, dest_path, tmp_path, offset)
+            else:
+                response.raise_for_status()
+
+            resuming = offset and response.status_code == 206
+            if response.status_code != 416 and (
+                    not resuming or content_range_start(response.headers.get("Content-Range", "")) == offset):
+                return self._save(response, url, dest_path, tmp_path, offset if resuming else 0)
+        # A 206 that does not continue at our offset, or a 416 for a .part file of the wrong size,
+        # cannot be completed from what is on disk; fetch the whole file instead
+        os.remove(tmp_path)
+        return self._fetch(url, dest_path, resume=False)
+
+    def _finish_partial(self, url, dest_path, tmp_path, size):
+        """Completes a download whose .part file already holds all `size` bytes."""
+        digest = hashlib.sha256()
+        with open(tmp_path, "rb") as f:
+            for chunk in iter(lambda: f.read(self.chunk_size), b""):
+                digest.update(chunk)
+        os.replace(tmp_path, dest_path)
+        if self.manifest:
+            entry = self.manifest.get(url)
+            entry.path = dest_path
+            entry.status = STATUS_COMPLETE
+            entry.size = size
+            entry.sha256 = digest.hexdigest()
+            self.manifest.record(entry)
+        return RESUMED, 0
+
+    def _save(self, response, url, dest_path, tmp_path, offset):
+        """Streams the response body after the `offset` bytes already in the .part file."""
+        digest = hashlib.sha256()
+        if offset:
+            with open(tmp_path, "rb") as f:
+                for chunk in iter(lambda: f.read(self.chunk_size), b""):
+                    digest.update(chunk)
+        entry = ManifestEntry(url, dest_path, STATUS_PARTIAL,
+                              etag=response.headers.get("ETag", ""),
+                              last_modified=response.headers.get("Last-Modified", ""))
+        if self.manifest:
+            # Saved before streaming so an interrupted download can be resumed
+            self.manifest.record(entry)
+
+        written = 0
+        with open(tmp_path, "ab" if offset else "wb") as f:
+            for chunk in response.iter_content(chunk_size=self.chunk_size):
+                if chunk:
+                    f.write(chunk)
+                    digest.update(chunk)
+                    written += len(chunk)
+        # Only expose complete files under the final name
+        os.replace(tmp_path, dest_path)
+        if self.manifest:
+            entry.status = STATUS_COMPLETE
+            entry.size = offset + written
+            entry.sha256 = digest.hexdigest()
+            self.manifest.record(entry)
+        return (RESUMED if offset else DOWNLOADED), written
+
+    def download(self, url, dest_path):
+        """Downloads a single URL to dest_path, retrying transient failures."""
+        result = self._download(url, dest_path)
+        if self.metrics is not None:
+            self.metrics.record("download", result.seconds, doc_key(dest_path), result.ok)
+            self.metrics.count("bytes_downloaded", result.bytes_written)
+            self.metrics.count("download_retries", max(0, result.attempts - 1))
+            if result.status == NOT_MODIFIED:
+                self.metrics.count("downloads_not_modified")
+        return result
+
+    def _download(self, url, dest_path):
+        start = time.perf_counter()
+        attempt = 0
+        last_error = ""
+        while attempt <= self.max_retries:
+            attempt += 1
+            response = None
+            try:
+                # The host slot is held only while talking to the server, not during the backoff below
+                with self._slot_for(url):
+                    status, written = self._fetch(url, dest_path)
+                return DownloadResult(url, dest_path, True, status, written, attempt, time.perf_counter() - start)
+            except RetryableStatus as e:
+                response = e.response
+                last_error = str(e)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                    requests.exceptions.ChunkedEncodingError) as e:
+                last_error = str(e)
+            except (requests.exceptions.RequestException, OSError) as e:
+                # 4xx and local I/O errors will not get better by retrying
+                last_error = str(e)
+                break
+            if attempt <= self.max_retries:
+                self._sleep_before_retry(attempt, response)
+        self._discard_partial(url, dest_path + ".part")
+        return DownloadResult(url, dest_path, False, FAILED, 0, attempt, time.perf_counter() - start, last_error)
+
+    def _discard_partial(self, url, tmp_path):
+        """Removes a failed download's .part file unless the manifest can resume it on a later run."""
+        entry = self.manifest.get(url) if self.manifest else None
+        if entry and entry.status == STATUS_PARTIAL and (entry.etag or entry.last_modified):
+            return
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+
+    def download_all(self, jobs, progress_every=10):
+        """Downloads (url, dest_path) pairs concurrently and returns their results in completion order."""
+        jobs = list(jobs)
+        results = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [pool.submit(self.download, url, dest) for url, dest in jobs]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if not result.ok:
+                    print(f"    -> Error downloading {result.url}: {result.error}")
+                done = len(results)
+                if progress_every and (done % progress_every == 0 or done == len(jobs)):
+                    print(f"  -> Downloaded {done}/{len(jobs)} PDFs...")
+        return results
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def summarize(results, elapsed):
+    """Returns a one-line throughput summary for a batch of download results."""
+    ok = [r for r in results if r.ok]
+    unchanged = sum(1 for r in ok if r.status == NOT_MODIFIED)
+    resumed = sum(1 for r in ok if r.status == RESUMED)
+    total_bytes = sum(r.bytes_written for r in ok)
+    rate = len(ok) / elapsed if elapsed else 0.0
+    mb_per_s = total_bytes / elapsed / (1024 * 1024) if elapsed else 0.0
+    return (f"{len(ok)}/{len(results)} PDFs ({unchanged} unchanged, {resumed} resumed), "
+            f"{total_bytes / (1024 * 1024):.1f} MB in {elapsed:.1f}s ({rate:.1f} PDFs/s, {mb_per_s:.2f} MB/s)")
@@ -1,74 +1,93 @@
 import os
-import google.generativeai as genai
+import argparse
+import asyncio
 import json
 import PyPDF2
+import re
+import signal
+import threading
 import time
+import zlib
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from extraction_cache import KIND_LLM, KIND_TEXT, ExtractionCache, file_sha256, llm_cache_key, text_sha256
+from llm_client import AsyncLLMExtractor, FakeLLMBackend, GeminiBackend, RequestBatcher, estimate_tokens, validate_json
+from rule_extractor import extract_fields_with_rules, missing_fields
+from prompt_filter import PromptStats, filter_text_for_fields
+from checkpoint_log import CheckpointWriter, processed_sources
+from work_scheduler import WorkQueue, doc_id, in_shard, parse_shard
+from run_metrics import RunMetrics, doc_key, enable_worker_profiling, format_summary, profiled, worker_profile
+from nirf_years import (DEFAULT_YEAR, checkpoint_file, citation_years, default_year, financial_years,
+                        publication_years, reports_dir, yearly_fields)
 
 # --- 1. Configuration ---
-try:
-    # Configure the API key from environment variables for security
-    api_key = "" #Enter the API Key
-    genai.configure(api_key=api_key) # type: ignore
-except KeyError:
-    print(" Error: GEMINI_API_KEY environment variable not set.") 
-    print("Please set it or paste your key directly into the script.")
-    exit()
+# Configure the API key from environment variables for security
+api_key = os.environ.get("GEMINI_API_KEY", "") #Or enter the API Key here
 
 # --- 2. Define the JSON keys and fields for the prompt ---
-# This dictionary is used to build the precise prompt for the LLM.
-FIELD_TEMPLATES = {
-    "Shared": {
-        "rank": "Rank",
-        "institute_name": "Name of the Institute",
-        "nirf_id": "Institute / University ID",
-        "category": "Category",
-        "approved_intake_ug": "Approved Intake (UG)",
-        "approved_intake_pg": "Approved Intake (PG)",
-        "approved_intake_pg_integrated": "Approved Intake (PG-Integrated)",
-        "total_approved_intake": "Total Approved Intake",
-        "students_ug_strength": "No.of. Students UG Strength",
-        "students_pg_strength": "No.of. Students PG Strength",
-        "students_pg_integrated": "No.of.students PG Integrated",
-        "total_students_strength_excluding_phd": "Total Students Strength (Excluding Ph.D)",
-        "phd_full_time": "Ph.D Full-time",
-        "phd_part_time": "Ph.D Part-time",
-        "total_students_including_phd": "Number of students (including Ph.D. students)",
-        "total_faculty": "Number of faculty members",
-        "capital_expenditure_23_24": "Annual capital expenditure (2023-24)",
-        "capital_expenditure_22_23": "Annual capital expenditure (2022-23)",
-        "capital_expenditure_21_22": "Annual capital expenditure (2021-22)",
-        "operating_expenditure_23_24": "Annual operating expenditure (2023-24)",
-        "operating_expenditure_22_23": "Annual operating expenditure (2022-23)",
-        "operating_expenditure_21_22": "Annual operating expenditure (2021-22)",
-        "online_education_offered": "Online education",
-        "online_students_offered_courses": "Number of students offered online courses",
-        "online_credits_transferred": "Number of credits transferred",
-        "online_courses_count": "Number of courses",
-        "students_economically_backward": "Number of students who are economically backward",
-        "students_socially_challenged": "Number of students who are socially challenged",
-        "students_not_receiving_reimbursement": "Number of students who are not receiving full tuition fee reimbursement",
-        "phd_awarded_full_time_last_3_years": "Number of full-time Ph.D. awarded in the last 3 years",
-        "phd_awarded_part_time_last_3_years": "Number of part-time Ph.D. awarded in the last 3 years",
-        "publications_2023": "Publications (2023)",
-        "publications_2022": "Publications (2022)",
-        "publications_2021": "Publications (2021)",
-        "citations_21_22": "Citations (2021-22)",
-        "citations_20_21": "Citations (2020-21)",
-        "citations_19_20": "Citations (2019-20)",
-        "sponsored_projects_23_24": "Sponsored projects - Total amount received (2023-24)",
-        "sponsored_projects_22_23": "Sponsored projects - Total amount received (2022-23)",
-        "sponsored_projects_21_22": "Sponsored projects - Total amount received (2021-22)",
-        "consultancy_projects_23_24": "Consultancy projects - Total amount received (2023-24)",
-        "consultancy_projects_22_23": "Consultancy projects - Total amount received (2022-23)",
-        "consultancy_projects_21_22": "Consultancy projects - Total amount received (2021-22)",
-        "edp_earnings_23_24": "Earnings from Executive Development Programme (2023-24)",
-        "edp_earnings_22_23": "Earnings from Executive Development Programme (2022-23)",
-        "edp_earnings_21_22": "Earnings from Executive Development Programme (2021-22)",
-        "nba_accreditation": "Valid NBA Accreditation",
-        "naac_accreditation": "Valid NAAC Accreditation"
+# These dictionaries are used to build the precise prompt for the LLM.
+# Year-wise keys follow the ranking year, e.g. capital_expenditure_23_24 in 2025.
+def field_templates(year):
+    return {
+        "Shared": {
+            "rank": "Rank",
+            "institute_name": "Name of the Institute",
+            "nirf_id": "Institute / University ID",
+            "category": "Category",
+            "approved_intake_ug": "Approved Intake (UG)",
+            "approved_intake_pg": "Approved Intake (PG)",
+            "approved_intake_pg_integrated": "Approved Intake (PG-Integrated)",
+            "total_approved_intake": "Total Approved Intake",
+            "students_ug_strength": "No.of. Students UG Strength",
+            "students_pg_strength": "No.of. Students PG Strength",
+            "students_pg_integrated": "No.of.students PG Integrated",
+            "total_students_strength_excluding_phd": "Total Students Strength (Excluding Ph.D)",
+            "phd_full_time": "Ph.D Full-time",
+            "phd_part_time": "Ph.D Part-time",
+            "total_students_including_phd": "Number of students (including Ph.D. students)",
+            "total_faculty": "Number of faculty members",
+            **yearly_fields("capital_expenditure", "Annual capital expenditure", financial_years(year)),
+            **yearly_fields("operating_expenditure", "Annual operating expenditure", financial_years(year)),
+            "online_education_offered": "Online education",
+            "online_students_offered_courses": "Number of students offered online courses",
+            "online_credits_transferred": "Number of credits transferred",
+            "online_courses_count": "Number of courses",
+            "students_economically_backward": "Number of students who are economically backward",
+            "students_socially_challenged": "Number of students who are socially challenged",
+            "students_not_receiving_reimbursement": "Number of students who are not receiving full tuition fee reimbursement",
+            "phd_awarded_full_time_last_3_years": "Number of full-time Ph.D. awarded in the last 3 years",
+            "phd_awarded_part_time_last_3_years": "Number of part-time Ph.D. awarded in the last 3 years",
+            **yearly_fields("publications", "Publications", publication_years(year)),
+            **yearly_fields("citations", "Citations", citation_years(year)),
+            **yearly_fields("sponsored_projects", "Sponsored projects - Total amount received", financial_years(year)),
+            **yearly_fields("consultancy_projects", "Consultancy projects - Total amount received",
+                            financial_years(year)),
+            **yearly_fields("edp_earnings", "Earnings from Executive Development Programme", financial_years(year)),
+            "nba_accreditation": "Valid NBA Accreditation",
+            "naac_accreditation": "Valid NAAC Accreditation"
+        }
     }
-}
+
+
+FIELD_TEMPLATES = field_templates(DEFAULT_YEAR)
 CATEGORIES_TO_PROCESS = ["Overall", "University", "Engineering"]
+EXTRACT_WORKERS = os.cpu_count() or 1  # Processes running PyPDF2 in parallel
+EXTRACT_TIMEOUT = 60                   # Seconds allowed per PDF before it is abandoned
+MODEL_NAME = 'gemini-2.5-flash'
+CACHE_FILE = os.path.join(".nirf_cache", "cache.sqlite3")  # Re-runs reuse text and LLM results from here
+CACHE_MAX_BYTES = 2 * 1024 ** 3
+LLM_CONCURRENCY = 8         # Gemini requests kept in flight (halved automatically on 429s)
+LLM_RPM = 1000              # Requests per minute allowed for your API tier
+LLM_TPM = 1_000_000         # Tokens per minute allowed for your API tier
+USE_RULE_EXTRACTOR = True   # Parse the fixed DCS layout locally; only ask the LLM for what it cannot fill
+LLM_FOR_FIELDS_NOT_IN_DCS = True  # Rank, publications and citations are not in the PDF; False skips asking for them
+FILTER_PROMPTS = True       # Send only the report sections needed for the requested fields
+LLM_BATCH_DOCS = 8          # Reports packed into one Gemini request (1 sends every report on its own)
+LLM_BATCH_TOKENS = 16_000   # Estimated tokens of report text allowed in one batched request
+# Answered as text, matching tidy_store.TEXT_FIELDS (rank can be a band like "101-150")
+STRING_FIELDS = ("rank", "institute_name", "nirf_id", "category", "online_education_offered",
+                 "nba_accreditation", "naac_accreditation")
 
 # --- 3. Helper Functions ---
 def extract_text_from_pdf(pdf_path):
@@ -81,13 +100,147 @@ def extract_text_from_pdf(pdf_path):
         print(f"  -> Error reading PDF {os.path.basename(pdf_path)}: {e}")
         return ""
 
-def get_data_from_llm(text, category):
-    """Builds a precise prompt and gets structured data from the Gemini model."""
-    if not text:
-        return None
+@dataclass
+class ExtractedText:
+    """Text pulled from one PDF by an extraction worker."""
+    pdf_path: str
+    text: str
+    pages: int
+    seconds: float
+    worker_pid: int
+    error: str = ""
+    sha256: str = ""
+    cached: bool = False
+
+
+class ExtractionTimeout(Exception):
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise ExtractionTimeout()
+
+
+def _extract_in_worker(pdf_path, timeout):
+    """Runs inside a pool process: extracts one PDF under a hard time limit."""
+    start = time.perf_counter()
+    pages = 0
+    # SIGALRM interrupts PyPDF2 even when it is stuck in a pathological file (POSIX only)
+    use_alarm = timeout and hasattr(signal, "SIGALRM")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        parts = []
+        with worker_profile("extract"), open(pdf_path, "rb") as f:
+            reader = PyPDF2.PdfReader(f)
+            for page in reader.pages:
+                parts.append(page.extract_text() or "")
+                pages += 1
+        return ExtractedText(pdf_path, "".join(parts), pages, time.perf_counter() - start, os.getpid())
+    except ExtractionTimeout:
+        error = f"timed out after {timeout}s"
+    except Exception as e:
+        error = str(e)
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    return ExtractedText(pdf_path, "", pages, time.perf_counter() - start, os.getpid(), error)
+
+
+def _finish_extraction(result, stats, cache, metrics):
+    """Records a pool result in the stats, metrics and cache (failed files are not cached)."""
+    if stats is not None:
+        stats.add(result)
+    if metrics is not None:
+        metrics.record("text", result.seconds, doc_key(result.pdf_path), not result.error)
+        metrics.count("pages_parsed", result.pages)
+    if result.error:
+        print(f"  -> Error reading PDF {os.path.basename(result.pdf_path)}: {result.error}")
+    elif cache:
+        cache.put(KIND_TEXT, result.sha256, {"text": result.text, "pages": result.pages})
+
+
+def iter_extracted_texts(pdf_paths, workers=EXTRACT_WORKERS, timeout=EXTRACT_TIMEOUT, stats=None, cache=None,
+                         metrics=None):
+    """Extracts PDFs in a process pool, yielding each ExtractedText as soon as it is ready.
+
+    At most two files per worker are queued ahead of the consumer, so the
+    pool keeps parsing while the caller is busy with the LLM, without
+    buffering the whole corpus in memory. With a cache, files whose content
+    hash was already parsed are yielded straight from it.
+    """
+    pdf_paths = iter(pdf_paths)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+        while True:
+            while len(pending) < workers * 2:
+                pdf_path = next(pdf_paths, None)
+                if pdf_path is None:
+                    break
+                sha256 = file_sha256(pdf_path) if cache else ""
+                cached = cache.get(KIND_TEXT, sha256) if cache else None
+                if cached is not None:
+                    yield ExtractedText(pdf_path, cached["text"], cached["pages"], 0.0, os.getpid(),
+                                        sha256=sha256, cached=True)
+                    continue
+                pending[pool.submit(_extract_in_worker, pdf_path, timeout)] = sha256
+            if not pending:
+                return
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                result.sha256 = pending.pop(future)
+                _finish_extraction(result, stats, cache, metrics)
+                yield result
+
+
+async def extract_text_async(pdf_path, pool, timeout=EXTRACT_TIMEOUT, stats=None, cache=None, metrics=None):
+    """Extracts one PDF in `pool` without blocking the event loop; the awaitable form of iter_extracted_texts."""
+    loop = asyncio.get_running_loop()
+    sha256 = await loop.run_in_executor(None, file_sha256, pdf_path) if cache else ""
+    cached = cache.get(KIND_TEXT, sha256) if cache else None
+    if cached is not None:
+        return ExtractedText(pdf_path, cached["text"], cached["pages"], 0.0, os.getpid(), sha256=sha256, cached=True)
+    result = await loop.run_in_executor(pool, _extract_in_worker, pdf_path, timeout)
+    result.sha256 = sha256
+    _finish_extraction(result, stats, cache, metrics)
+    return result
+
+
+class ExtractionStats:
+    """Pages and time spent per extraction worker process."""
+
+    def __init__(self):
+        self.pages = defaultdict(int)
+        self.seconds = defaultdict(float)
+        self.files = defaultdict(int)
+        self.failures = 0
 
-    template_key = "Shared"
-    fields_to_extract = FIELD_TEMPLATES[template_key]
+    def add(self, result):
+        self.pages[result.worker_pid] += result.pages
+        self.seconds[result.worker_pid] += result.seconds
+        self.files[result.worker_pid] += 1
+        if result.error:
+            self.failures += 1
+
+    def report(self):
+        """Prints pages/second for each worker and for the pool as a whole."""
+        print("\n--- PDF Text Extraction ---")
+        for pid in sorted(self.pages):
+            rate = self.pages[pid] / self.seconds[pid] if self.seconds[pid] else 0.0
+            print(f"  worker {pid}: {self.files[pid]} files, {self.pages[pid]} pages, {rate:.1f} pages/s")
+        total_pages = sum(self.pages.values())
+        busy = sum(self.seconds.values())
+        print(f"  total: {total_pages} pages, {self.failures} failed file(s), "
+              f"{total_pages / busy if busy else 0.0:.1f} pages/s per worker on average")
+
+
+def build_prompt(text, category, fields_to_extract=None):
+    """Builds the precise extraction prompt for one report's text (all template fields by default)."""
+    if fields_to_extract is None:
+        template_key = "Shared"
+        fields_to_extract = FIELD_TEMPLATES[template_key]
     prompt_fields = "\n".join([f"- {json_key}: for the metric '{desc}'" for json_key, desc in fields_to_extract.items()])
 
     prompt = f"""
@@ -106,58 +259,362 @@ def get_data_from_llm(text, category):
     TEXT TO ANALYZE:
     {text}
     """
-    
-    model = genai.GenerativeModel('gemini-2.5-flash') # type: ignore
-    response = None
-    try:
-        response = model.generate_content(prompt)
-        cleaned_text = response.text.strip().replace("```json", "").replace("```", "")
-        return json.loads(cleaned_text)
-    except Exception as e:
-        print(f"  -> An error occurred with the Gemini API: {e}")
-        if response and response.text:
-            print(f"  -> Raw Response Text (on error): {response.text[:100]}...")
+    return prompt
+
+
+def record_schema(fields):
+    """Gemini response schema for one report: every field of `fields` optional and nullable."""
+    return {"type": "object",
+            "properties": {key: {"type": "string" if key in STRING_FIELDS else "number", "nullable": True}
+                           for key in fields}}
+
+
+def batch_schema(fields):
+    """Gemini response schema for a batch: one record per report, tagged with the report's label."""
+    record = record_schema(fields)
+    record = {**record, "properties": {"doc": {"type": "string"}, **record["properties"]}, "required": ["doc"]}
+    return {"type": "object", "properties": {"records": {"type": "array", "items": record}},
+            "required": ["records"]}
+
+
+def batch_label(index):
+    return f"DOC {index + 1}"
+
+
+def build_batch_prompt(items, fields_to_extract):
+    """One prompt for several reports' `(text, category)`, listing the fields to extract only once."""
+    prompt_fields = "\n".join([f"- {json_key}: for the metric '{desc}'" for json_key, desc in fields_to_extract.items()])
+    reports = "\n\n".join(f"=== {batch_label(i)} ('{category}' category) ===\n{text}"
+                           for i, (text, category) in enumerate(items))
+
+    prompt = f"""
+    Below are the texts of {len(items)} NIRF reports, each from a different institution. Extract the data for every institution.
+    CRITICAL INSTRUCTIONS:
+    1. Return one record per report in "records", with "doc" set to the report's label (e.g. "{batch_label(0)}").
+    2. Take each record's values ONLY from its own report's text, and ONLY for the fields listed below.
+    3. For any metric with multiple years (e.g., expenditures), extract data for the MOST RECENT available year ONLY.
+    4. Give numbers as plain numbers (no currency symbols, commas or words), and null for a value that is not in the report.
+    5. If there're two UG/PG fields varying just in number of years, except Integrated ones, have to be added together for final value.
+
+
+    FIELDS TO EXTRACT:
+    {prompt_fields}
+
+    REPORTS TO ANALYZE:
+    {reports}
+    """
+    return prompt
+
+
+PROMPT_FIELD = re.compile(r"^\s*- (\w+): for the metric", re.M)
+PROMPT_REPORT = re.compile(r"^\s*=== (DOC \d+) \(", re.M)
+
+
+def placeholder_responder(prompt):
+    """Reply of the fake LLM backend: a stable made-up value, typed as in record_schema(), for every field asked for."""
+    numbers = {key: zlib.crc32(key.encode()) % 10000 for key in PROMPT_FIELD.findall(prompt)}
+    record = {key: str(n) if key in STRING_FIELDS else n for key, n in numbers.items()}
+    labels = PROMPT_REPORT.findall(prompt)
+    if labels:
+        return json.dumps({"records": [{"doc": label, **record} for label in labels]})
+    return json.dumps(record)
+
+
+async def get_data_from_llm(text, category, extractor, fields_to_extract=None):
+    """Builds a precise prompt and gets structured data from the LLM via the shared extractor."""
+    if not text:
         return None
+    return await extractor.extract(build_prompt(text, category, fields_to_extract))
 
-# --- 4. Main Execution Logic ---
-# This dictionary will hold the final data, structured by category.
-all_data = {cat: [] for cat in CATEGORIES_TO_PROCESS}
-
-for category in CATEGORIES_TO_PROCESS:
-    category_dir = os.path.join("nirf_reports", category)
-    if os.path.exists(category_dir):
-        print(f"\n--- Processing category: {category} ---")
-        
-        # Get all PDF files in the directory
-        pdf_files = [os.path.join(category_dir, f) for f in os.listdir(category_dir) if f.endswith(".pdf")]
-        
-        # **Sort the files by modification time (oldest first)**
+
+class BatchedLLMExtractor:
+    """Sends several reports' LLM requests as one structured-output Gemini request.
+
+    Requests for the same category are packed together, up to `max_docs`
+    reports and `token_budget` estimated tokens of report text, so the field
+    instructions are sent once per batch instead of once per report. A batch
+    asks for the union of its reports' missing fields, and each report keeps
+    only the fields it asked for. The reply must match batch_schema(); a
+    report whose record is missing or fails validation is re-queued as a
+    request of its own.
+    """
+
+    def __init__(self, extractor, max_docs=LLM_BATCH_DOCS, token_budget=LLM_BATCH_TOKENS):
+        self.extractor = extractor
+        self.max_docs = max_docs
+        self.batcher = RequestBatcher(self._send, max_docs, token_budget)
+        self.stats = {"requeued": 0, "invalid_records": 0}
+
+    async def extract(self, text, category, fields_to_extract):
+        """The validated record for one report's text, or None."""
+        if not text:
+            return None
+        # The rule parser leaves a different set of fields to each report, so batches are per
+        # category (one field template) and ask for the union of their reports' fields
+        return await self.batcher.submit(category, (text, category, dict(fields_to_extract)), estimate_tokens(text))
+
+    async def _send(self, group, items):
+        if len(items) == 1:
+            return [await self._extract_single(*items[0])]
+        fields = {}
+        for _, _, item_fields in items:
+            fields.update(item_fields)
+        schema = batch_schema(fields)
+        reply = await self.extractor.extract(build_batch_prompt([item[:2] for item in items], fields), schema)
+        records = {}
+        for record in (reply or {}).get("records", []) if isinstance(reply, dict) else []:
+            if validate_json(record, schema["properties"]["records"]["items"]):
+                self.stats["invalid_records"] += 1
+            else:
+                records[record.pop("doc")] = record
+        results = []
+        for i, (_, _, item_fields) in enumerate(items):
+            record = records.get(batch_label(i))
+            results.append(None if record is None else {key: record[key] for key in item_fields if key in record})
+        retry = [i for i, record in enumerate(results) if record is None]
+        self.stats["requeued"] += len(retry)
+        retried = await asyncio.gather(*(self._extract_single(*items[i]) for i in retry))
+        for i, record in zip(retry, retried):
+            results[i] = record
+        return results
+
+    async def _extract_single(self, text, category, fields):
+        schema = record_schema(fields)
+        record = await self.extractor.extract(build_prompt(text, category, fields), schema)
+        if record is not None and validate_json(record, schema):
+            self.stats["invalid_records"] += 1
+            return None
+        return record
+
+    def summary(self):
+        s, b = self.stats, self.batcher.stats
+        return (f"  llm batching: {b['batched_items']} report(s) in {b['batches']} batch(es) "
+                f"({b['batched_items'] / b['batches'] if b['batches'] else 0.0:.1f} per batch), "
+                f"{s['invalid_records']} invalid record(s), {s['requeued']} re-queued singly")
+
+
+async def extract_record(extracted, category, extractor, cache, fields, prompt_stats=None, metrics=None,
+                         batcher=None):
+    """Fills one report's `fields`: rule-based parser first, cached or live LLM for the rest.
+
+    With a BatchedLLMExtractor as `batcher`, the LLM request shares a batch with other reports'.
+    """
+    doc = doc_key(extracted.pdf_path)
+    start = time.perf_counter()
+    data = extract_fields_with_rules(extracted.text, category, fields) if USE_RULE_EXTRACTOR else {}
+    if metrics is not None and USE_RULE_EXTRACTOR:
+        metrics.record("rules", time.perf_counter() - start, doc)
+    missing = missing_fields(data, fields, include_not_in_dcs=LLM_FOR_FIELDS_NOT_IN_DCS or not USE_RULE_EXTRACTOR)
+    if not missing:
+        return data
+
+    llm_text = filter_text_for_fields(extracted.text, missing) if FILTER_PROMPTS else extracted.text
+    # The prompt is derived from the PDF, FIELD_TEMPLATES and the filter, so its hash keys the cache
+    prompt = build_prompt(llm_text, category, missing)
+    llm_key = llm_cache_key(extracted.sha256, text_sha256(prompt), extractor.backend.model_name)
+    llm_data = cache.get(KIND_LLM, llm_key)
+    if llm_data is None:
+        if prompt_stats is not None and llm_text:
+            # Same fields on both sides, so the saving is the section filter's alone
+            prompt_stats.record(os.path.basename(extracted.pdf_path), build_prompt(extracted.text, category, missing),
+                                prompt)
+        start = time.perf_counter()
+        if batcher is not None:
+            llm_data = await batcher.extract(llm_text, category, missing)
+        else:
+            llm_data = await get_data_from_llm(llm_text, category, extractor, missing)
+        if metrics is not None:
+            metrics.record("llm", time.perf_counter() - start, doc, bool(llm_data))
+        if llm_data:
+            cache.put(KIND_LLM, llm_key, llm_data)
+    if not llm_data:
+        # Without the LLM, a record is still useful if the parser identified the institute
+        return data if "institute_name" in data else None
+    merged = {**{key: llm_data.get(key) for key in missing}, **data}
+    return {key: merged[key] for key in fields if key in merged}
+
+
+async def renew_lease(work_queue, doc):
+    """Renews this worker's lease on doc every third of the lease period until cancelled or taken over."""
+    while True:
+        await asyncio.sleep(work_queue.lease_seconds / 3)
+        if not work_queue.renew(doc):
+            print(f"  -> Lost the lease on {doc} to another worker")
+            return
+
+
+async def process_category(category, pdf_files, fields, extractor, cache, checkpoint, work_queue, extraction_stats,
+                           prompt_stats=None, metrics=None, batcher=None):
+    """Feeds the process-pool text extraction into concurrent LLM calls, checkpointing each record.
+
+    Documents are claimed from the work queue only as the extraction pool
+    pulls them, and marked done or failed as soon as their record is settled.
+    """
+    loop = asyncio.get_running_loop()
+    # Enough consumers to fill a batch for every request in flight
+    consumers = extractor.limiter.max_limit * (batcher.max_docs if batcher else 1)
+    # Bounded, so the extraction pool pauses when the LLM stage falls behind
+    queue = asyncio.Queue(maxsize=consumers * 2)
+
+    failure = loop.create_future()
+
+    def produce():
         try:
-            pdf_files.sort(key=os.path.getmtime)
-            pdf_files = pdf_files[50:]
-            print(f"Found {len(pdf_files)} PDF(s). Processing in order of download time.")
+            claimed = work_queue.iter_claimed(pdf_files, key=lambda path: doc_id(category, path))
+            for extracted in iter_extracted_texts(claimed, stats=extraction_stats, cache=cache, metrics=metrics):
+                asyncio.run_coroutine_threadsafe(queue.put(extracted), loop).result()
         except Exception as e:
-            print(f"Could not sort files by time, processing in default order. Error: {e}")
-        i = 50
-        # Process the sorted list of files
-        for pdf_path in pdf_files:
-            if i <= 0:
-                break
-            print(f"Extracting data from: {os.path.basename(pdf_path)}")
-            text = extract_text_from_pdf(pdf_path)
-            
-            # Add a 1-second delay to avoid overwhelming the API
-            time.sleep(1) 
-            
-            data = get_data_from_llm(text, category)
+            # e.g. BrokenProcessPool after a worker was killed: the run must fail, not end as if complete
+            loop.call_soon_threadsafe(failure.set_exception, e)
+        finally:
+            asyncio.run_coroutine_threadsafe(queue.put(None), loop).result()
+
+    async def consume():
+        while True:
+            extracted = await queue.get()
+            if extracted is None:
+                await queue.put(None)  # Let the other consumers see the end too
+                return
+            print(f"Extracting data from: {os.path.basename(extracted.pdf_path)}")
+            doc = doc_id(category, extracted.pdf_path)
+            # Keeps the lease fresh while LLM retries and backoff run, so no other worker takes the document over
+            heartbeat = asyncio.create_task(renew_lease(work_queue, doc))
+            try:
+                data = await extract_record(extracted, category, extractor, cache, fields, prompt_stats, metrics,
+                                            batcher)
+            except Exception as e:
+                # One bad document must not stop the other consumers (or leave the producer blocked)
+                print(f"  -> Extraction failed for {os.path.basename(extracted.pdf_path)}: {e}")
+                work_queue.fail(doc, e)
+                continue
+            finally:
+                heartbeat.cancel()
             if data:
-                # Append the extracted data to the list for the current category
-                all_data[category].append(data)
-            i -= 1
+                # Written straight away, so a crash later in the run loses nothing already done
+                checkpoint.append(category, os.path.basename(extracted.pdf_path), extracted.sha256, data)
+                work_queue.complete(doc)
+            else:
+                work_queue.fail(doc, extracted.error or "no data extracted")
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    await asyncio.gather(*(consume() for _ in range(consumers)))
+    producer.join()
+    # Handed over before the end sentinel, so it has already landed
+    if failure.done():
+        failure.result()
+
+
+async def run_extraction(extractor, cache, checkpoint, work_queue, extraction_stats, prompt_stats=None,
+                         year=DEFAULT_YEAR, shard=(0, 1), shard_by="hash", limit=None, metrics=None, batcher=None):
+    """Processes this worker's shard of every category of one ranking year; `limit` caps the documents per category."""
+    fields = field_templates(year)["Shared"]
+    done = processed_sources(checkpoint.path)
+    for category in CATEGORIES_TO_PROCESS:
+        category_dir = os.path.join(reports_dir(year), category)
+        if os.path.exists(category_dir):
+            print(f"\n--- Processing category: {category} ({year}) ---")
+
+            # This worker's shard of the category, in a stable order on every machine
+            pdf_files = sorted(os.path.join(category_dir, f) for f in os.listdir(category_dir) if f.endswith(".pdf"))
+            pdf_files = [p for p in pdf_files if in_shard(category, p, shard, shard_by)]
+            docs = [doc_id(category, p) for p in pdf_files]
+            print(f"Shard {shard[0]}/{shard[1]}: {len(pdf_files)} PDF(s) ({work_queue.summary(docs)}).")
+
+            # Skip reports already in this worker's checkpoint log (the work queue covers other workers)
+            pdf_files = [p for p in pdf_files if (category, os.path.basename(p)) not in done]
+            if limit is not None:
+                pdf_files = pdf_files[:limit]
+
+            await process_category(category, pdf_files, fields, extractor, cache, checkpoint, work_queue,
+                                   extraction_stats, prompt_stats, metrics, batcher)
+            print(f"Shard {shard[0]}/{shard[1]} now: {work_queue.summary(docs)}.")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Extract NIRF report data from downloaded PDFs.")
+    parser.add_argument("--year", type=int, default=default_year(),
+                        help="Ranking year to process (default: $NIRF_YEAR or %(default)s)")
+    parser.add_argument("--shard", default="0/1", help="Process shard k of N (0-based), e.g. 2/8")
+    parser.add_argument("--shard-by", choices=["hash", "category"], default="hash",
+                        help="Split the corpus by document hash range or by whole category")
+    parser.add_argument("--state-dir",
+                        help="Shared directory for lease/done/failed files (default: nirf_reports/<year>/.work)")
+    parser.add_argument("--worker-id", help="Name recorded in leases (default: hostname-pid)")
+    parser.add_argument("--limit", type=int, help="Process at most this many documents per category")
+    parser.add_argument("--checkpoint", help="JSON-lines output (default: nirf_data_<year>.jsonl, per shard when sharded)")
+    parser.add_argument("--status", action="store_true", help="Print per-category document states and exit")
+    parser.add_argument("--fake-llm", type=float, metavar="SECONDS",
+                        help="Use the local fake LLM backend with this latency instead of Gemini")
+    parser.add_argument("--batch-docs", type=int, default=LLM_BATCH_DOCS,
+                        help="Reports packed into one LLM request (default: %(default)s; 1 turns batching off)")
+    parser.add_argument("--metrics-out", help="JSON run report (default: run_reports/extract-<timestamp>.json)")
+    parser.add_argument("--profile", metavar="DIR",
+                        help="Write cProfile stats for this process and every extraction worker to DIR")
+    args = parser.parse_args()
+    try:
+        args.shard = parse_shard(args.shard)
+    except ValueError as e:
+        parser.error(str(e))
+    if not args.checkpoint:
+        index, count = args.shard
+        root, ext = os.path.splitext(checkpoint_file(args.year))
+        # Workers append to their own log, so no file is ever shared between machines
+        args.checkpoint = checkpoint_file(args.year) if count == 1 else f"{root}.shard{index}of{count}{ext}"
+    if not args.state_dir:
+        args.state_dir = os.path.join(reports_dir(args.year), ".work")
+    return args
+
+
+def print_status(work_queue, year):
+    for category in CATEGORIES_TO_PROCESS:
+        category_dir = os.path.join(reports_dir(year), category)
+        if os.path.exists(category_dir):
+            docs = [doc_id(category, f) for f in sorted(os.listdir(category_dir)) if f.endswith(".pdf")]
+            print(f"{category}: {work_queue.summary(docs)}")
+
+
+# --- 4. Main Execution Logic ---
+if __name__ == "__main__":
+    args = parse_args()
+    work_queue = WorkQueue(args.state_dir, args.worker_id)
+    if args.status:
+        print_status(work_queue, args.year)
+        exit()
+
+    extraction_stats = ExtractionStats()
+    metrics = RunMetrics("extract", {"year": args.year, "shard": f"{args.shard[0]}/{args.shard[1]}"})
+    if args.profile:
+        enable_worker_profiling(args.profile)
+    cache = ExtractionCache(CACHE_FILE, CACHE_MAX_BYTES)
+    # One model client shared by every request, instead of one per PDF
+    backend = (FakeLLMBackend(placeholder_responder, latency=args.fake_llm) if args.fake_llm is not None
+               else GeminiBackend(MODEL_NAME, api_key))
+    extractor = AsyncLLMExtractor(backend, max_concurrency=LLM_CONCURRENCY, rpm=LLM_RPM, tpm=LLM_TPM)
+    batcher = BatchedLLMExtractor(extractor, args.batch_docs) if args.batch_docs > 1 else None
+    prompt_stats = PromptStats()
+
+    # --- 5. Stream each record to the JSON-lines checkpoint as it is extracted ---
+    with CheckpointWriter(args.checkpoint) as checkpoint, \
+            profiled(args.profile and os.path.join(args.profile, "main.prof")):
+        asyncio.run(run_extraction(extractor, cache, checkpoint, work_queue, extraction_stats, prompt_stats,
+                                   year=args.year, shard=args.shard, shard_by=args.shard_by, limit=args.limit,
+                                   metrics=metrics, batcher=batcher))
 
-# --- 5. Save the final, clean, and structured JSON ---
-with open("nirf_data_2.json", "w") as f:
-    # The 'all_data' dictionary is already in the desired "primary key by category" format
-    json.dump(all_data, f, indent=4)
+    extraction_stats.report()
+    print(extractor.summary())
+    if batcher:
+        print(batcher.summary())
+    print(prompt_stats.summary())
+    print(cache.summary())
+    metrics.count("records_written", checkpoint.written)
+    metrics.add_counters(extractor.stats, prefix="llm_")
+    if batcher:
+        metrics.add_counters(batcher.batcher.stats, prefix="llm_")
+        metrics.add_counters(batcher.stats, prefix="llm_")
+    metrics.add_counters(cache.hits, prefix="cache_hits_")
+    metrics.add_counters(cache.misses, prefix="cache_misses_")
+    print(format_summary(metrics.write_json(args.metrics_out, backend.model_name)))
+    cache.close()
 
-print("\n Clean JSON data extraction complete. Output saved to nirf_data_2.json")
\ No newline at end of file
+    print(f"\n Clean JSON data extraction complete. {checkpoint.written} new record(s) appended to {args.checkpoint}")
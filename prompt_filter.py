@@ -0,0 +1,87 @@
+import re
+
+from llm_client import estimate_tokens
+from rule_extractor import split_sections
+
+# --- 1. Field -> Section Mapping ---
+# Which DCS sections (see rule_extractor.SECTION_HEADINGS) hold each field,
+# matched by key prefix. Fields not listed here are not in a known section
+# (rank, publications, citations), so only the report header is sent for them.
+FIELD_SECTIONS = [
+    (("institute_name", "nirf_id", "category", "rank", "publications_", "citations_"), ["header"]),
+    (("approved_intake_", "total_approved_intake"), ["intake"]),
+    (("students_", "total_students_strength_excluding_phd"), ["strength"]),
+    (("total_students_including_phd",), ["strength", "phd"]),
+    (("phd_",), ["phd"]),
+    (("total_faculty",), ["faculty"]),
+    (("capital_expenditure_",), ["capital"]),
+    (("operating_expenditure_",), ["operating"]),
+    (("online_",), ["online"]),
+    (("sponsored_projects_",), ["sponsored"]),
+    (("consultancy_projects_",), ["consultancy"]),
+    (("edp_earnings_",), ["edp"]),
+    (("nba_accreditation", "naac_accreditation"), ["accreditation"]),
+]
+
+NUMBER_WORD = (r"(?:zero|one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve|thirteen|fourteen|fifteen"
+               r"|sixteen|seventeen|eighteen|nineteen|twenty|thirty|forty|fifty|sixty|seventy|eighty|ninety"
+               r"|hundred|thousand|lakhs?|crores?|and|only)")
+AMOUNT_IN_WORDS = re.compile(rf"\s*\(\s*{NUMBER_WORD}(?:[\s-]+{NUMBER_WORD})*\s*\)", re.IGNORECASE)
+# Multi-line, so $ is a line end: the row may wrap over several lines, but stops where the words do
+WORDS_ROW = re.compile(rf"\b(?:Amount Received|Total Annual Earnings) in Words(?:\s*{NUMBER_WORD})+\s*$",
+                       re.IGNORECASE | re.M)
+GROUPED_NUMBER = re.compile(r"\b\d{1,3}(?:,\d{2,3})+\b")
+
+
+# --- 2. Filtering ---
+def sections_for_fields(fields):
+    """Names of the sections needed to answer the given field keys, always including the header."""
+    needed = {"header"}
+    for key in fields:
+        for prefixes, sections in FIELD_SECTIONS:
+            if key.startswith(prefixes):
+                needed.update(sections)
+                break
+    return needed
+
+
+def normalize_section(text):
+    """Drops amounts written out in words and writes Indian-grouped numbers without commas."""
+    text = AMOUNT_IN_WORDS.sub(" ", text)
+    text = WORDS_ROW.sub("", text)
+    text = GROUPED_NUMBER.sub(lambda m: m.group(0).replace(",", ""), text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def filter_text_for_fields(text, fields):
+    """Returns only the normalised report sections needed for `fields`, one section per line.
+
+    Text without any recognisable DCS headings is returned whole (but
+    normalised), so unusual reports still reach the LLM intact.
+    """
+    sections = split_sections(text)
+    if len(sections) == 1:
+        return normalize_section(sections["header"])
+    needed = sections_for_fields(fields)
+    return "\n".join(normalize_section(body) for name, body in sections.items() if name in needed)
+
+
+class PromptStats:
+    """Per-document prompt token counts before and after filtering."""
+
+    def __init__(self):
+        self.documents = []
+
+    def record(self, name, before_prompt, after_prompt):
+        before, after = estimate_tokens(before_prompt), estimate_tokens(after_prompt)
+        self.documents.append((name, before, after))
+        saved = 1 - after / before if before else 0.0
+        print(f"  -> Prompt tokens for {name}: {before} -> {after} ({saved:.0%} saved)")
+
+    def summary(self):
+        if not self.documents:
+            return "  prompts: no LLM calls needed"
+        before = sum(d[1] for d in self.documents)
+        after = sum(d[2] for d in self.documents)
+        return (f"  prompts: {len(self.documents)} document(s), ~{before} -> ~{after} tokens "
+                f"({1 - after / before if before else 0.0:.0%} saved)")
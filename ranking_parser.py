@@ -0,0 +1,276 @@
+import codecs
+import io
+import re
+from html.parser import HTMLParser
+
+# --- 1. Configuration ---
+RANKING_TABLE_ID = "tbl_overall"   # id of the main table on every nirfindia.org ranking page
+HIDDEN_CLASS = "tbl_hidden"        # Collapsed <div> in the name cell holding the parameter-score sub-table
+DEFAULT_CHUNK_SIZE = 64 * 1024
+MAIN_COLUMNS = ["nirf_id", "institute_name", "city", "state", "score", "rank"]
+
+# Parameter scores in sub-table order, used when a sub-table has no header row
+BREAKDOWN_COLUMNS = {
+    "Research": ["qnr_100", "qlr_100", "sfc_100", "oi_100", "perception_100"],
+}
+DEFAULT_BREAKDOWN_COLUMNS = ["tlr_100", "rpc_100", "go_100", "oi_100", "perception_100"]
+
+# Elements that never have a closing tag, so they must not change the nesting depth
+VOID_ELEMENTS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+
+def _clean(text):
+    return " ".join(text.split())
+
+
+def breakdown_key(header):
+    """"TLR (100)" -> "tlr_100", matching the JSON keys used for Research scores."""
+    return re.sub(r"[^a-z0-9]+", "_", header.lower()).strip("_")
+
+
+def _build_row(cells, category):
+    """Turns the parsed cells of one main-table row into a dict, or None for non-data rows.
+
+    Each cell is (direct text, text, sub-table headers, sub-table values). The
+    institute name is the name cell's own text, without the "More Details"
+    link or the collapsed score table.
+    """
+    if len(cells) < len(MAIN_COLUMNS):
+        return None
+    row = {key: _clean(cell[1]) for key, cell in zip(MAIN_COLUMNS, cells)}
+    row["institute_name"] = _clean(cells[1][0])
+    if not row["institute_name"]:
+        return None
+    headers, values = cells[1][2], cells[1][3]
+    if values:
+        names = [breakdown_key(h) for h in headers] if len(headers) == len(values) else \
+            BREAKDOWN_COLUMNS.get(category, DEFAULT_BREAKDOWN_COLUMNS)
+        row.update((name, _clean(value)) for name, value in zip(names, values))
+    return row
+
+
+def _chunks(source, chunk_size, binary):
+    """Yields the document in pieces from a str, bytes or file object."""
+    if isinstance(source, (str, bytes)):
+        source = io.BytesIO(source) if isinstance(source, bytes) else io.StringIO(source)
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    encoder = codecs.getincrementalencoder("utf-8")()
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        if binary and isinstance(chunk, str):
+            chunk = encoder.encode(chunk)
+        elif not binary and isinstance(chunk, bytes):
+            chunk = decoder.decode(chunk)
+        yield chunk
+    if not binary:
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
+
+# --- 2. lxml Backend ---
+def _text(element):
+    return "".join(element.itertext())
+
+
+def _lxml_cell(td):
+    hidden = next((div for div in td.iter("div") if HIDDEN_CLASS in (div.get("class") or "").split()), None)
+    direct = (td.text or "") + "".join(child.tail or "" for child in td)
+    if hidden is None:
+        return direct, _text(td), [], []
+    table = next(hidden.iter("table"), None)
+    headers = [_text(th) for th in table.iter("th")] if table is not None else []
+    values = [_text(cell) for cell in table.iter("td")] if table is not None else []
+    visible = [child for child in td if child is not hidden and hidden not in child.iterdescendants()]
+    text = direct + "".join(_text(child) for child in visible)
+    return direct, text, headers, values
+
+
+def _iter_rows_lxml(source, category, chunk_size):
+    from lxml import etree
+
+    parser = etree.HTMLPullParser(events=("start", "end"))
+    main_table = None
+    for chunk in _chunks(source, chunk_size, binary=True):
+        parser.feed(chunk)
+        for event, element in parser.read_events():
+            if event == "start":
+                if element.tag == "table" and main_table is None and element.get("id") == RANKING_TABLE_ID:
+                    main_table = element
+                continue
+            if element.tag != "tr" or main_table is None:
+                continue
+            if next(element.iterancestors("table"), None) is not main_table:
+                continue  # A row of a parameter-score sub-table
+            row = _build_row([_lxml_cell(td) for td in element.iterchildren("td")], category)
+            if row:
+                yield row
+            # Drop finished rows so memory stays flat however long the table is
+            element.clear()
+            parent = element.getparent()
+            while element.getprevious() is not None:
+                del parent[0]
+    parser.close()
+
+
+# --- 3. Standard-library Backend ---
+class _RankingTableParser(HTMLParser):
+    """Event-driven parser for the ranking table; completed rows collect in `self.rows`."""
+
+    def __init__(self, category):
+        super().__init__(convert_charrefs=True)
+        self.category = category
+        self.rows = []
+        self.table_depth = 0
+        self.main_depth = None   # table_depth of the ranking table once it has been seen
+        self.cells = None        # Cells of the main-table row being read
+        self.cell = None         # [direct text, text, headers, values] of the cell being read
+        self.cell_depth = 0      # Elements open inside the current cell
+        self.hidden_depth = None  # cell_depth at which the collapsed score <div> opened
+        self.sub_cell = None     # Text of the sub-table <th>/<td> being read
+        self.sub_tag = None
+
+    def _in_main(self):
+        return self.main_depth is not None and self.table_depth == self.main_depth
+
+    def _end_cell(self):
+        if self.cell is not None:
+            self.cells.append(tuple(self.cell))
+            self.cell = None
+
+    def _end_sub_cell(self):
+        if self.sub_cell is not None:
+            self.cell[2 if self.sub_tag == "th" else 3].append(self.sub_cell)
+            self.sub_cell = None
+
+    def _end_row(self):
+        self._end_cell()
+        if self.cells is not None:
+            row = _build_row(self.cells, self.category)
+            if row:
+                self.rows.append(row)
+            self.cells = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "table":
+            self.table_depth += 1
+            if self.main_depth is None and dict(attrs).get("id") == RANKING_TABLE_ID:
+                self.main_depth = self.table_depth
+        if self._in_main():
+            # HTML lets </td> and </tr> be omitted, so a new cell or row closes the last one
+            if tag == "tr":
+                self._end_row()
+                self.cells = []
+                return
+            if tag == "td" and self.cells is not None:
+                self._end_cell()
+                self.cell = ["", "", [], []]
+                self.cell_depth = 0
+                self.hidden_depth = None
+                return
+        if self.cell is None:
+            return
+        if tag not in VOID_ELEMENTS:
+            self.cell_depth += 1
+        if tag == "div" and self.hidden_depth is None and HIDDEN_CLASS in (dict(attrs).get("class") or "").split():
+            self.hidden_depth = self.cell_depth
+        elif tag in ("th", "td") and self.hidden_depth is not None:
+            self._end_sub_cell()
+            self.sub_cell, self.sub_tag = "", tag
+
+    def handle_endtag(self, tag):
+        if self._in_main():
+            if tag == "tr":
+                self._end_row()
+            elif tag == "td":
+                self._end_cell()
+        if tag == "table":
+            if self._in_main():
+                self._end_row()
+            self.table_depth = max(0, self.table_depth - 1)
+            if self.main_depth is not None and self.table_depth < self.main_depth:
+                self.main_depth = -1   # Only the first ranking table on the page is read
+        if self.cell is None or tag in VOID_ELEMENTS:
+            return
+        if tag in ("th", "td", "tr", "table"):
+            self._end_sub_cell()
+        if self.hidden_depth is not None and tag == "div" and self.cell_depth == self.hidden_depth:
+            self.hidden_depth = None
+        self.cell_depth = max(0, self.cell_depth - 1)
+
+    def handle_data(self, data):
+        if self.cell is None:
+            return
+        if self.hidden_depth is not None:
+            if self.sub_cell is not None:
+                self.sub_cell += data
+            return
+        if self.cell_depth == 0:
+            self.cell[0] += data
+        self.cell[1] += data
+
+
+def _iter_rows_stdlib(source, category, chunk_size):
+    parser = _RankingTableParser(category)
+    for chunk in _chunks(source, chunk_size, binary=False):
+        parser.feed(chunk)
+        yield from parser.rows
+        parser.rows = []
+    parser.close()
+    yield from parser.rows
+
+
+class _PDFLinkParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            href = dict(attrs).get("href")
+            if href and href.endswith(".pdf"):
+                self.links.append(href)
+
+
+# --- 4. Public API ---
+def available_backends():
+    """Backends usable here, fastest first."""
+    try:
+        import lxml.etree  # noqa: F401
+    except ImportError:
+        return ["stdlib"]
+    return ["lxml", "stdlib"]
+
+
+def iter_ranking_rows(source, category=None, backend=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yields one dict per institute in a ranking page's main table, as the page is read.
+
+    `source` is the page as str/bytes or an open file. Each row has the
+    main columns (nirf_id, institute_name, city, state, score, rank) plus
+    the parameter scores from the collapsed sub-table (tlr_100, ... or
+    qnr_100, ... for Research). `backend` is "lxml" (default when installed)
+    or "stdlib"; both read the page in chunks instead of building a full
+    document tree.
+    """
+    backend = backend or available_backends()[0]
+    if backend == "lxml":
+        return _iter_rows_lxml(source, category, chunk_size)
+    if backend == "stdlib":
+        return _iter_rows_stdlib(source, category, chunk_size)
+    raise ValueError(f"Unknown backend '{backend}', expected one of {available_backends()}")
+
+
+def parse_ranking_table(source, category=None, backend=None):
+    """All rows of a ranking page as a list; see iter_ranking_rows."""
+    return list(iter_ranking_rows(source, category, backend))
+
+
+def pdf_links(source, chunk_size=DEFAULT_CHUNK_SIZE):
+    """The href of every link to a .pdf on the page, in page order."""
+    parser = _PDFLinkParser()
+    for chunk in _chunks(source, chunk_size, binary=False):
+        parser.feed(chunk)
+    parser.close()
+    return parser.links
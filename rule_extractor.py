@@ -0,0 +1,267 @@
+import re
+
+# --- 1. NIRF Data Capturing System (DCS) Layout ---
+# Section headings as they appear in the PDF text, in document order. Both the
+# rule-based parser and the prompt pre-filter use these to split a report.
+SECTION_HEADINGS = {
+    "intake": r"Sanctioned \(Approved\) Intake",
+    "strength": r"Total Actual Student Strength",
+    "placement": r"Placement & Higher Studies",
+    "phd": r"Ph\.D Student Details",
+    "online": r"Online Education",
+    "capital": r"Financial Resources: Utilised Amount for the Capital expenditure",
+    "operating": r"Financial Resources: Utilised Amount for the Operational expenditure",
+    "ipr": r"\bIPR(?= Calendar year)",
+    "sponsored": r"Sponsored Research Details",
+    "consultancy": r"Consultancy Project Details",
+    "edp": r"Executive Development Program",
+    "pcs": r"PCS Facilities",
+    "accreditation": r"\bAccreditation(?= NBA Accreditation)",
+    "faculty": r"Faculty Details",
+    "sdg": r"Sustainable Development Goals",
+}
+
+# Column order of each programme row in "Total Actual Student Strength"
+STRENGTH_COLUMNS = ["male", "female", "total", "within_state", "outside_state", "outside_country",
+                    "economically_backward", "socially_challenged", "reimbursed_by_government",
+                    "reimbursed_by_institution", "reimbursed_by_private", "not_reimbursed"]
+
+# Year-wise money rows: section -> (row label, JSON key prefix). Keys get a
+# "_YY_YY" suffix from the section's "Financial Year" header.
+YEARLY_AMOUNT_ROWS = {
+    "capital": (r"Total Annual Capital Expenditure", "capital_expenditure"),
+    "operating": (r"Total Annual Operational Expenditure", "operating_expenditure"),
+    "sponsored": (r"Total Amount Received", "sponsored_projects"),
+    "consultancy": (r"Total Amount Received", "consultancy_projects"),
+    "edp": (r"Total Annual Earnings", "edp_earnings"),
+}
+
+# Metrics that the DCS PDF does not contain (they come from the ranking pages
+# and bibliometric databases), matched by key prefix.
+FIELDS_NOT_IN_DCS = ("rank", "publications_", "citations_")
+
+PROGRAM_ROW = re.compile(r"(UG|PG-Integrated|PG)\s*\[\s*(\d+)\s*Years?\s*Program\(s\)\s*\]")
+NUMBER = re.compile(r"\s*(\d[\d,]*(?:\.\d+)?)")
+PARENTHETICAL = re.compile(r"\s*\([^()]*\)")
+ACADEMIC_YEARS = re.compile(r"(?:Academic|Financial) Year((?:\s*20\d\d-\d\d)+)")
+
+
+# --- 2. Text Helpers ---
+def flatten(text):
+    """Collapses PyPDF2's line breaks so labels and values that wrap can be matched."""
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def split_sections(text):
+    """Returns {section name: section text} for every known heading found in the report.
+
+    The "header" section holds everything before the first heading.
+    """
+    flat = flatten(text)
+    starts = []
+    for name, pattern in SECTION_HEADINGS.items():
+        match = re.search(pattern, flat)
+        if match:
+            starts.append((match.start(), name))
+    starts.sort()
+    sections = {"header": flat[:starts[0][0]] if starts else flat}
+    for i, (start, name) in enumerate(starts):
+        end = starts[i + 1][0] if i + 1 < len(starts) else len(flat)
+        sections[name] = flat[start:end]
+    return sections
+
+
+def take_numbers(text, pos):
+    """Reads the run of numbers starting at pos, skipping amounts-in-words like "(Two Crore)"."""
+    values = []
+    while True:
+        number = NUMBER.match(text, pos)
+        if number:
+            raw = number.group(1).replace(",", "")
+            values.append(float(raw) if "." in raw else int(raw))
+            pos = number.end()
+            continue
+        words = PARENTHETICAL.match(text, pos)
+        if words:
+            pos = words.end()
+            continue
+        return values
+
+
+def numbers_after(section, label):
+    """Numbers that follow the first match of the label regex, or [] if the label is absent."""
+    match = re.search(label, section)
+    return take_numbers(section, match.end()) if match else []
+
+
+def year_columns(section):
+    """The "2023-24 2022-23 ..." header of a year-wise table, as a list."""
+    match = ACADEMIC_YEARS.search(section)
+    return match.group(1).split() if match else []
+
+
+def year_suffix(academic_year):
+    """"2023-24" -> "23_24", matching the FIELD_TEMPLATES key convention."""
+    first, second = academic_year.split("-")
+    return f"{first[-2:]}_{second}"
+
+
+def program_rows(section, width):
+    """Returns (level, program years, values) for each UG/PG/PG-Integrated row, keeping the first `width` numbers.
+
+    Returns None instead if any row has a different number of columns, since
+    the table was then not read reliably.
+    """
+    rows = []
+    for match in PROGRAM_ROW.finditer(section):
+        values = take_numbers(section, match.end())
+        if len(values) < width:
+            return None
+        rows.append((match.group(1), int(match.group(2)), values[:width]))
+    return rows
+
+
+# --- 3. Section Parsers ---
+# Each parser only returns fields it could read consistently; anything it
+# is unsure about is left out so the LLM can fill it instead.
+def _parse_header(section):
+    match = re.search(r"Institute Name:\s*(.+?)\s*\[([A-Z]{2}-[A-Z]-[A-Z]-\d+)\]", section)
+    if not match:
+        return {}
+    return {"institute_name": match.group(1), "nirf_id": match.group(2)}
+
+
+def _parse_intake(section):
+    years = year_columns(section)
+    rows = program_rows(section, len(years)) if years else None
+    if not rows:
+        return {}
+    latest = years.index(max(years))
+    totals = {"UG": 0, "PG": 0, "PG-Integrated": 0}
+    for level, _, values in rows:
+        totals[level] += values[latest]
+    return {
+        "approved_intake_ug": totals["UG"],
+        "approved_intake_pg": totals["PG"],
+        "approved_intake_pg_integrated": totals["PG-Integrated"],
+        "total_approved_intake": sum(totals.values()),
+    }
+
+
+def _parse_strength(section):
+    rows = program_rows(section, len(STRENGTH_COLUMNS))
+    if not rows:
+        return {}
+    totals = {"UG": 0, "PG": 0, "PG-Integrated": 0}
+    sums = dict.fromkeys(STRENGTH_COLUMNS, 0)
+    for level, _, values in rows:
+        row = dict(zip(STRENGTH_COLUMNS, values))
+        if row["male"] + row["female"] != row["total"]:
+            return {}  # Columns have shifted; do not trust any of them
+        totals[level] += row["total"]
+        for column in STRENGTH_COLUMNS:
+            sums[column] += row[column]
+    return {
+        "students_ug_strength": totals["UG"],
+        "students_pg_strength": totals["PG"],
+        "students_pg_integrated": totals["PG-Integrated"],
+        "total_students_strength_excluding_phd": sums["total"],
+        "students_economically_backward": sums["economically_backward"],
+        "students_socially_challenged": sums["socially_challenged"],
+        "students_not_receiving_reimbursement": sums["not_reimbursed"],
+    }
+
+
+def _parse_phd(section):
+    data = {}
+    match = re.search(r"Total Students Full Time\s*([\d,]+)\s*Part Time\s*([\d,]+)", section)
+    if match:
+        data["phd_full_time"] = int(match.group(1).replace(",", ""))
+        data["phd_part_time"] = int(match.group(2).replace(",", ""))
+    graduated = re.search(r"graduated \(including Integrated Ph\.D\)((?:\s*20\d\d-\d\d)+)", section)
+    if graduated:
+        width = len(graduated.group(1).split())
+        rest = section[graduated.end():]
+        full_time = numbers_after(rest, r"Full Time")
+        part_time = numbers_after(rest, r"Part Time")
+        if len(full_time) >= width and len(part_time) >= width:
+            data["phd_awarded_full_time_last_3_years"] = sum(full_time[:width])
+            data["phd_awarded_part_time_last_3_years"] = sum(part_time[:width])
+    return data
+
+
+def _parse_online(section):
+    values = numbers_after(section, r"\bSwayam(?= [\d,]+ )")
+    if len(values) < 3:
+        return {}
+    return {
+        "online_education_offered": "Yes" if values[0] > 0 else "No",
+        "online_students_offered_courses": values[0],
+        "online_credits_transferred": values[1],
+        "online_courses_count": values[2],
+    }
+
+
+def _parse_yearly_amounts(section, label, prefix):
+    years = year_columns(section)
+    values = numbers_after(section, label)
+    if not years or len(values) < len(years):
+        return {}
+    return {f"{prefix}_{year_suffix(year)}": value for year, value in zip(years, values)}
+
+
+def _parse_accreditation(section):
+    data = {}
+    for body, key in (("NBA", "nba_accreditation"), ("NAAC", "naac_accreditation")):
+        match = re.search(rf"valid {body} Accreditation\?\s*(YES|NO)\b", section, re.IGNORECASE)
+        if match:
+            data[key] = match.group(1).upper()
+    return data
+
+
+def _parse_faculty(section):
+    match = re.search(r"Number of faculty members entered\s*[:=]?\s*([\d,]+)", section)
+    return {"total_faculty": int(match.group(1).replace(",", ""))} if match else {}
+
+
+# --- 4. Public API ---
+def extract_fields_with_rules(text, category, fields):
+    """Fills as many of `fields` (a FIELD_TEMPLATES dict) as the DCS layout allows.
+
+    Returns a dict containing only the keys that were read with confidence,
+    in template order. Callers should send the remaining keys to the LLM.
+    """
+    if not text:
+        return {}
+    sections = split_sections(text)
+    data = {"category": category}
+    data.update(_parse_header(sections["header"]))
+    parsers = {
+        "intake": _parse_intake,
+        "strength": _parse_strength,
+        "phd": _parse_phd,
+        "online": _parse_online,
+        "accreditation": _parse_accreditation,
+        "faculty": _parse_faculty,
+    }
+    for name, parser in parsers.items():
+        if name in sections:
+            data.update(parser(sections[name]))
+    for name, (label, prefix) in YEARLY_AMOUNT_ROWS.items():
+        if name in sections:
+            data.update(_parse_yearly_amounts(sections[name], label, prefix))
+
+    if all(key in data for key in ("total_students_strength_excluding_phd", "phd_full_time", "phd_part_time")):
+        data["total_students_including_phd"] = (data["total_students_strength_excluding_phd"]
+                                                + data["phd_full_time"] + data["phd_part_time"])
+    return {key: data[key] for key in fields if key in data}
+
+
+def missing_fields(data, fields, include_not_in_dcs=True):
+    """The subset of the `fields` template that `data` does not contain.
+
+    With include_not_in_dcs=False, fields the DCS PDF never holds are left
+    out, since asking the LLM for them cannot succeed.
+    """
+    return {key: desc for key, desc in fields.items()
+            if key not in data and (include_not_in_dcs or not key.startswith(FIELDS_NOT_IN_DCS))}
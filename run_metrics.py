@@ -0,0 +1,223 @@
+import argparse
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+# --- 1. Configuration ---
+DEFAULT_REPORT_DIR = "run_reports"   # One JSON report per run
+PERCENTILES = (50, 95, 99)
+PROFILE_ENV = "NIRF_PROFILE_DIR"     # When set, extraction workers write their cProfile stats here
+
+# Estimated USD per million (prompt, response) tokens, used for the cost line of the report
+LLM_PRICES = {
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-pro": (1.25, 10.00),
+}
+
+
+def percentile(values, p):
+    """The p-th percentile of `values`, interpolating between the closest ranks."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * p / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def doc_key(path):
+    """"nirf_reports/2025/Overall/x.pdf" -> "Overall/x.pdf", the name documents are reported under."""
+    return os.path.join(os.path.basename(os.path.dirname(path)), os.path.basename(path))
+
+
+# --- 2. Collection ---
+class RunMetrics:
+    """Per-document stage timings and run-wide counters for one run.
+
+    Stages call `record` (or use `timer`) once per document; counters hold
+    totals such as bytes downloaded, pages parsed, tokens and cache hits.
+    Safe to update from download threads and the event loop at once.
+    """
+
+    def __init__(self, name, meta=None):
+        self.name = name
+        self.meta = dict(meta or {})
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.timings = defaultdict(list)   # stage -> [seconds]
+        self.failures = Counter()          # stage -> documents that failed there
+        self.documents = defaultdict(dict)  # document -> {stage: seconds}
+        self.counters = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds, doc=None, ok=True):
+        with self._lock:
+            self.timings[stage].append(seconds)
+            if not ok:
+                self.failures[stage] += 1
+            if doc is not None:
+                # A document retried within the run accumulates its time
+                self.documents[doc][stage] = self.documents[doc].get(stage, 0.0) + seconds
+
+    @contextmanager
+    def timer(self, stage, doc=None):
+        """Times the block as one `stage` item; an exception counts it as failed."""
+        start = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.record(stage, time.perf_counter() - start, doc, ok)
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def add_counters(self, values, prefix=""):
+        """Merges a stats mapping (e.g. AsyncLLMExtractor.stats, ExtractionCache.hits) into the counters."""
+        with self._lock:
+            for key, value in values.items():
+                self.counters[f"{prefix}{key}"] += value
+
+    def elapsed(self):
+        return time.perf_counter() - self._start
+
+    def report(self, model_name=None):
+        """The run as a JSON-serialisable dict."""
+        wall = self.elapsed()
+        with self._lock:
+            stages = {}
+            for stage, values in self.timings.items():
+                stages[stage] = {
+                    "count": len(values),
+                    "failed": self.failures[stage],
+                    "total_seconds": sum(values),
+                    "mean": sum(values) / len(values),
+                    **{f"p{p}": percentile(values, p) for p in PERCENTILES},
+                    "max": max(values),
+                    "docs_per_second": len(values) / wall if wall else 0.0,
+                }
+            counters = dict(self.counters)
+            documents = {doc: dict(stage_times) for doc, stage_times in self.documents.items()}
+        report = {"name": self.name, "meta": self.meta,
+                  "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started_at)),
+                  "wall_seconds": wall, "stages": stages, "counters": counters, "documents": documents}
+        prices = LLM_PRICES.get(model_name)
+        if prices:
+            prompt, response = counters.get("llm_prompt_tokens", 0), counters.get("llm_response_tokens", 0)
+            report["cost"] = {"model": model_name, "prompt_tokens": prompt, "response_tokens": response,
+                              "usd": (prompt * prices[0] + response * prices[1]) / 1_000_000}
+        return report
+
+    def write_json(self, path=None, model_name=None):
+        """Writes the report (default: run_reports/<name>-<timestamp>.json) and returns it."""
+        report = self.report(model_name)
+        if path is None:
+            stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started_at))
+            path = os.path.join(DEFAULT_REPORT_DIR, f"{self.name.replace(' ', '-')}-{stamp}.json")
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        report["path"] = path
+        return report
+
+
+def format_summary(report):
+    """Human summary of a report dict: latency percentiles and throughput per stage, then the counters."""
+    lines = [f"\n--- Run Metrics ({report['name']}, {report['wall_seconds']:.1f}s) ---",
+             f"  {'stage':<10} {'docs':>6} {'failed':>6} {'docs/s':>8} "
+             + " ".join(f"{'p' + str(p) + ' ms':>9}" for p in PERCENTILES) + f" {'max ms':>9}"]
+    for stage, s in report["stages"].items():
+        lines.append(f"  {stage:<10} {s['count']:>6} {s['failed']:>6} {s['docs_per_second']:>8.2f} "
+                     + " ".join(f"{s['p' + str(p)] * 1000:>9.1f}" for p in PERCENTILES) + f" {s['max'] * 1000:>9.1f}")
+    if report["counters"]:
+        lines.append("  " + ", ".join(f"{key}={value}" for key, value in sorted(report["counters"].items())))
+    if "cost" in report:
+        cost = report["cost"]
+        lines.append(f"  llm cost: {cost['prompt_tokens']} prompt + {cost['response_tokens']} response tokens "
+                     f"= ~${cost['usd']:.4f} ({cost['model']})")
+    if "path" in report:
+        lines.append(f"  report: {report['path']}")
+    return "\n".join(lines)
+
+
+# --- 3. Profiling ---
+@contextmanager
+def profiled(path):
+    """Profiles the block with cProfile and writes the stats to `path`; a no-op when path is None."""
+    if not path:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        profiler.dump_stats(path)
+
+
+def enable_worker_profiling(directory):
+    """Makes pool processes started after this call profile their work into `directory`."""
+    os.makedirs(directory, exist_ok=True)
+    os.environ[PROFILE_ENV] = os.path.abspath(directory)
+
+
+_worker_profiler = None
+
+
+@contextmanager
+def worker_profile(label):
+    """Adds the block to this process's profile, <$NIRF_PROFILE_DIR>/<label>-<pid>.prof, when profiling is on."""
+    global _worker_profiler
+    directory = os.environ.get(PROFILE_ENV)
+    if not directory:
+        yield
+        return
+    if _worker_profiler is None:
+        _worker_profiler = cProfile.Profile()
+    _worker_profiler.enable()
+    try:
+        yield
+    finally:
+        _worker_profiler.disable()
+        # Rewritten after every call, since pool processes are never told they are about to exit
+        _worker_profiler.dump_stats(os.path.join(directory, f"{label}-{os.getpid()}.prof"))
+
+
+# --- 4. Command Line ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show saved run reports and profiles.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    show_parser = sub.add_parser("show", help="Print the summary of a JSON run report")
+    show_parser.add_argument("report", nargs="?", help="Report file (default: the newest in run_reports/)")
+    profile_parser = sub.add_parser("profile", help="Print the hottest functions of one or more .prof files")
+    profile_parser.add_argument("files", nargs="+")
+    profile_parser.add_argument("--sort", default="cumulative", help="pstats sort key, e.g. tottime")
+    profile_parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args()
+
+    if args.command == "show":
+        path = args.report
+        if path is None:
+            reports = [os.path.join(DEFAULT_REPORT_DIR, f) for f in os.listdir(DEFAULT_REPORT_DIR)
+                       if f.endswith(".json")] if os.path.isdir(DEFAULT_REPORT_DIR) else []
+            if not reports:
+                parser.exit(1, f"No reports in '{DEFAULT_REPORT_DIR}'.\n")
+            path = max(reports, key=os.path.getmtime)
+        with open(path) as f:
+            report = json.load(f)
+        report["path"] = path
+        print(format_summary(report))
+    elif args.command == "profile":
+        pstats.Stats(*args.files).sort_stats(args.sort).print_stats(args.top)
@@ -0,0 +1,244 @@
+import math
+import re
+from dataclasses import dataclass, field
+
+# --- 1. Configuration ---
+DEFAULT_RANGES_PER_REQUEST = 500   # Ranges sent in one values:batchUpdate call
+VALUE_INPUT_OPTION = "USER_ENTERED"  # Same as set_with_dataframe, so numbers stay numbers in the sheet
+# Cells are read back as stored, not as displayed ("1,234", "12.50%", rounded floats), so formats cause no diffs
+VALUE_RENDER_OPTION = "UNFORMATTED_VALUE"
+NUMBER_TEXT = re.compile(r"-?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+
+
+@dataclass
+class SyncResult:
+    cells_changed: int = 0
+    ranges: int = 0
+    requests: int = 0
+    resized: bool = False
+    shape: tuple = (0, 0)
+
+
+# --- 2. DataFrame -> Grid ---
+def cell_text(value):
+    """How a value reads back from the sheet, so unchanged cells compare equal.
+
+    Empty/NaN cells become "", and whole floats are written without ".0"
+    because the sheet displays 1234.0 as 1234.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        if math.isnan(value):
+            return ""
+        if value.is_integer():
+            return str(int(value))
+    return str(value)
+
+
+def normalize_cell(value):
+    """A cell as the sheet stores it, so a value read with VALUE_RENDER_OPTION and the
+    text written with USER_ENTERED compare equal.
+
+    Numbers (and text that USER_ENTERED turns into a number, like "007" or
+    "1.5e3") become their cell_text; booleans and "true"/"false" become
+    TRUE/FALSE. Other text is left as it is.
+    """
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, str):
+        text = value.strip()
+        if text.upper() in ("TRUE", "FALSE"):
+            return text.upper()
+        if not NUMBER_TEXT.fullmatch(text):
+            return value
+        value = float(text)
+    if isinstance(value, int):
+        return str(value)
+    return cell_text(value)
+
+
+def dataframe_to_grid(df):
+    """The cells set_with_dataframe(df, include_index=True) would write, as a list of string rows."""
+    header = [cell_text(df.index.name)] + [cell_text(column) for column in df.columns]
+    rows = [[cell_text(label)] + [cell_text(value) for value in values]
+            for label, values in zip(df.index, df.itertuples(index=False, name=None))]
+    return [header] + rows
+
+
+# --- 3. Diffing ---
+def column_letter(col):
+    """1 -> "A", 27 -> "AA"."""
+    letters = ""
+    while col:
+        col, remainder = divmod(col - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+def a1_range(row, col, last_row, last_col):
+    """A1 notation for the 1-based inclusive rectangle (row, col)..(last_row, last_col)."""
+    start = f"{column_letter(col)}{row}"
+    end = f"{column_letter(last_col)}{last_row}"
+    return start if start == end else f"{start}:{end}"
+
+
+def _cell(grid, r, c):
+    if r < len(grid) and c < len(grid[r]):
+        return grid[r][c]
+    return ""
+
+
+def diff_ranges(old, new):
+    """Returns (ranges, cells_changed) that turn the `old` grid into `new`.
+
+    Changed cells are grouped into runs along each row, and runs covering
+    the same columns in consecutive rows are merged into one rectangle, so a
+    changed institute column becomes a single range. Cells outside `new` are
+    not included; the caller removes them by resizing the sheet.
+    """
+    width = max((len(row) for row in new), default=0)
+    blocks = []   # [first_row, last_row, first_col, last_col] (0-based, inclusive)
+    open_blocks = {}
+    cells_changed = 0
+    for r in range(len(new)):
+        runs = []
+        c = 0
+        while c < width:
+            if _cell(new, r, c) == _cell(old, r, c):
+                c += 1
+                continue
+            start = c
+            while c < width and _cell(new, r, c) != _cell(old, r, c):
+                c += 1
+            runs.append((start, c - 1))
+            cells_changed += c - start
+        next_open = {}
+        for run in runs:
+            block = open_blocks.get(run)
+            if block is not None and block[1] == r - 1:
+                block[1] = r
+            else:
+                block = [r, r, run[0], run[1]]
+                blocks.append(block)
+            next_open[run] = block
+        open_blocks = next_open
+
+    ranges = [{"range": a1_range(r0 + 1, c0 + 1, r1 + 1, c1 + 1),
+               "values": [[_cell(new, r, c) for c in range(c0, c1 + 1)] for r in range(r0, r1 + 1)]}
+              for r0, r1, c0, c1 in blocks]
+    return ranges, cells_changed
+
+
+# --- 4. Sync ---
+def sync_worksheet(worksheet, grid, ranges_per_request=DEFAULT_RANGES_PER_REQUEST):
+    """Makes `worksheet` hold exactly `grid`, writing only the cells that differ.
+
+    Reads the sheet once (unformatted), resizes it to the grid's dimensions
+    (dropping stale rows/columns), and sends the changed ranges in as few
+    batch_update calls as `ranges_per_request` allows. Both sides go through
+    normalize_cell first, so only real value changes are written.
+    """
+    rows = len(grid)
+    cols = max((len(row) for row in grid), default=0)
+    result = SyncResult(shape=(rows, cols))
+
+    grid = [[normalize_cell(value) for value in row] for row in grid]
+    old = [[normalize_cell(value) for value in row]
+           for row in worksheet.get_all_values(value_render_option=VALUE_RENDER_OPTION)]
+    if (worksheet.row_count, worksheet.col_count) != (rows, cols) and rows and cols:
+        worksheet.resize(rows=rows, cols=cols)
+        result.resized = True
+        old = [row[:cols] for row in old[:rows]]
+
+    ranges, result.cells_changed = diff_ranges(old, grid)
+    result.ranges = len(ranges)
+    for start in range(0, len(ranges), ranges_per_request):
+        worksheet.batch_update(ranges[start:start + ranges_per_request], value_input_option=VALUE_INPUT_OPTION)
+        result.requests += 1
+    return result
+
+
+# --- 5. In-memory Worksheet ---
+@dataclass
+class FakeWorksheet:
+    """Implements the slice of gspread.Worksheet used by sync_worksheet, in memory.
+
+    Like the real sheet, USER_ENTERED text that looks like a number is
+    stored as a number, and reads render numbers with `number_format`
+    unless UNFORMATTED_VALUE is asked for. Counts API calls and cells
+    written so uploads can be checked and benchmarked without network access.
+    """
+    title: str = "Sheet1"
+    row_count: int = 1000
+    col_count: int = 26
+    number_format: str = "{}"   # e.g. "{:,}" for a sheet showing thousands separators
+    cells: dict = field(default_factory=dict)   # {(row, col): value}, 1-based
+    calls: dict = field(default_factory=lambda: {"get_all_values": 0, "batch_update": 0, "resize": 0, "clear": 0})
+    cells_written: int = 0
+
+    def get_all_values(self, value_render_option="FORMATTED_VALUE"):
+        """Like the real API, trailing empty rows and columns are not returned."""
+        self.calls["get_all_values"] += 1
+        filled = [key for key, value in self.cells.items() if value != ""]
+        if not filled:
+            return []
+        rows = max(r for r, _ in filled)
+        cols = max(c for _, c in filled)
+        render = (lambda value: value) if value_render_option == "UNFORMATTED_VALUE" else self._formatted
+        return [[render(self.cells.get((r, c), "")) for c in range(1, cols + 1)] for r in range(1, rows + 1)]
+
+    def _formatted(self, value):
+        if isinstance(value, bool):
+            return "TRUE" if value else "FALSE"
+        return self.number_format.format(value) if isinstance(value, (int, float)) else value
+
+    def resize(self, rows=None, cols=None):
+        self.calls["resize"] += 1
+        self.row_count = rows or self.row_count
+        self.col_count = cols or self.col_count
+        self.cells = {(r, c): v for (r, c), v in self.cells.items() if r <= self.row_count and c <= self.col_count}
+
+    def clear(self):
+        self.calls["clear"] += 1
+        self.cells = {}
+
+    def batch_update(self, data, value_input_option=None):
+        self.calls["batch_update"] += 1
+        for entry in data:
+            row, col = _parse_a1(entry["range"].split(":")[0])
+            for r, values in enumerate(entry["values"]):
+                for c, value in enumerate(values):
+                    if row + r > self.row_count or col + c > self.col_count:
+                        raise ValueError(f"Range {entry['range']} exceeds grid limits "
+                                         f"({self.row_count}x{self.col_count})")
+                    if value_input_option == "USER_ENTERED" and isinstance(value, str) \
+                            and NUMBER_TEXT.fullmatch(value.strip()):
+                        number = float(value)
+                        value = int(number) if number.is_integer() and abs(number) < 2 ** 53 else number
+                    self.cells[(row + r, col + c)] = value
+                    self.cells_written += 1
+
+
+@dataclass
+class FakeSpreadsheet:
+    """The gspread.Spreadsheet calls dataframe_converter makes, backed by FakeWorksheets (diff sync only)."""
+    worksheets: dict = field(default_factory=dict)   # {title: FakeWorksheet}
+
+    def worksheet(self, title):
+        if title not in self.worksheets:
+            from gspread import WorksheetNotFound
+            raise WorksheetNotFound(title)
+        return self.worksheets[title]
+
+    def add_worksheet(self, title, rows, cols):
+        self.worksheets[title] = FakeWorksheet(title, rows, cols)
+        return self.worksheets[title]
+
+
+def _parse_a1(cell):
+    letters = "".join(ch for ch in cell if ch.isalpha())
+    col = 0
+    for ch in letters:
+        col = col * 26 + ord(ch) - ord("A") + 1
+    return int(cell[len(letters):]), col
@@ -0,0 +1,30 @@
+from checkpoint_log import CheckpointWriter, iter_checkpoint, processed_sources
+
+
+def test_records_are_readable_as_soon_as_they_are_appended(tmp_path):
+    path = str(tmp_path / "nirf_data_2025.jsonl")
+    with CheckpointWriter(path, fsync_every=1000) as checkpoint:
+        checkpoint.append("Overall", "report_1.pdf", "abc", {"nirf_id": "IR-O-U-0001"})
+        # Flushed per line, so another reader (or a crash right now) sees it before close
+        assert [r["data"] for r in iter_checkpoint(path)] == [{"nirf_id": "IR-O-U-0001"}]
+    assert checkpoint.written == 1
+
+
+def test_resume_after_a_crash_mid_line(tmp_path):
+    path = tmp_path / "nirf_data_2025.jsonl"
+    with CheckpointWriter(str(path)) as checkpoint:
+        checkpoint.append("Overall", "report_1.pdf", "abc", {"nirf_id": "IR-O-U-0001"})
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"category": "Overall", "source": "report_2.pdf", "da')   # Killed while writing
+
+    # The half-written record is skipped, so report_2 is extracted again on the next run
+    assert processed_sources(str(path)) == {("Overall", "report_1.pdf")}
+
+    with CheckpointWriter(str(path)) as checkpoint:
+        checkpoint.append("Overall", "report_2.pdf", "def", {"nirf_id": "IR-O-U-0002"})
+    assert processed_sources(str(path)) == {("Overall", "report_1.pdf"), ("Overall", "report_2.pdf")}
+    assert len(list(iter_checkpoint(str(path)))) == 2
+
+
+def test_missing_log_means_nothing_is_done(tmp_path):
+    assert processed_sources(str(tmp_path / "absent.jsonl")) == set()
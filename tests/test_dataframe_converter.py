@@ -0,0 +1,54 @@
+import json
+
+import checkpoint_log
+from checkpoint_log import CheckpointWriter
+from dataframe_converter import PDF_JSON_FILE, load_checkpoint_records, load_records
+
+
+def write_legacy_file(path):
+    with open(path / PDF_JSON_FILE, "w") as f:
+        json.dump({"Overall": [{"nirf_id": "IR-2025", "institute_name": "From 2025"}]}, f)
+
+
+def test_legacy_file_is_only_read_for_its_own_year(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_legacy_file(tmp_path)
+
+    assert load_records(2025) == {"Overall": [{"nirf_id": "IR-2025", "institute_name": "From 2025"}]}
+    assert load_records(2024) == {}
+
+
+def test_a_year_with_a_checkpoint_log_ignores_the_legacy_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_legacy_file(tmp_path)
+    writer = CheckpointWriter("nirf_data_2024.jsonl")
+    writer.append("Overall", "IR-2024.pdf", "abc", {"nirf_id": "IR-2024"})
+    writer.close()
+
+    assert load_records(2024) == {"Overall": [{"nirf_id": "IR-2024"}]}
+
+
+def test_the_newest_record_of_a_report_wins_across_logs(tmp_path, monkeypatch):
+    main, shard = str(tmp_path / "nirf_data_2025.jsonl"), str(tmp_path / "nirf_data_2025.shard0of2.jsonl")
+    clock = iter([100.0, 200.0, 300.0])
+    monkeypatch.setattr(checkpoint_log.time, "time", lambda: next(clock))
+    with CheckpointWriter(shard) as checkpoint:
+        checkpoint.append("Overall", "a.pdf", "abc", {"nirf_id": "IR-1", "total_faculty": 1})   # stale
+    with CheckpointWriter(main) as checkpoint:
+        checkpoint.append("Overall", "a.pdf", "abc", {"nirf_id": "IR-1", "total_faculty": 2})
+    with CheckpointWriter(shard) as checkpoint:
+        checkpoint.append("Overall", "b.pdf", "def", {"nirf_id": "IR-2"})
+
+    # The shard log sorts last, but its record of a.pdf is older than the main log's
+    assert load_checkpoint_records([main, shard]) == {"Overall": [{"nirf_id": "IR-1", "total_faculty": 2},
+                                                                  {"nirf_id": "IR-2"}]}
+
+
+def test_untimestamped_lines_count_as_oldest(tmp_path):
+    old, new = tmp_path / "old.jsonl", str(tmp_path / "new.jsonl")
+    old.write_text('{"category": "Overall", "source": "a.pdf", "sha256": "abc", "data": {"nirf_id": "old"}}\n'
+                   '{"category": "Overall", "source": "a.pdf", "sha256": "abc", "data": {"nirf_id": "later line"}}\n')
+    with CheckpointWriter(new) as checkpoint:
+        checkpoint.append("Overall", "b.pdf", "def", {"nirf_id": "b"})
+
+    assert load_checkpoint_records([new, str(old)]) == {"Overall": [{"nirf_id": "b"}, {"nirf_id": "later line"}]}
@@ -0,0 +1,121 @@
+import asyncio
+import json
+import subprocess
+import sys
+
+import pytest
+
+import extraction_cache
+from extraction_cache import KIND_LLM, KIND_TEXT, ExtractionCache, file_sha256, llm_cache_key, text_sha256
+from llm_client import AsyncLLMExtractor, FakeLLMBackend
+from pdf_extractor import ExtractedText, extract_record, placeholder_responder
+
+VALUE = {"text": "x" * 80}
+ENTRY_BYTES = len(json.dumps(VALUE))
+
+
+class Clock:
+    """Moves one second per reading, so access order never ties."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        self.now += 1
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(extraction_cache.time, "time", clock)
+    return clock
+
+
+def open_cache(tmp_path, max_bytes=extraction_cache.DEFAULT_MAX_BYTES):
+    return ExtractionCache(str(tmp_path / "cache" / "cache.sqlite3"), max_bytes)
+
+
+def test_file_key_follows_the_content(tmp_path):
+    a, b = tmp_path / "a.pdf", tmp_path / "b.pdf"
+    a.write_bytes(b"%PDF same")
+    b.write_bytes(b"%PDF same")
+
+    assert file_sha256(str(a)) == file_sha256(str(b)) == text_sha256("%PDF same")
+
+
+def test_llm_key_changes_with_pdf_prompt_and_model():
+    key = llm_cache_key("pdf", text_sha256("prompt"), "gemini-2.5-flash")
+
+    assert key == llm_cache_key("pdf", text_sha256("prompt"), "gemini-2.5-flash")
+    assert key != llm_cache_key("other pdf", text_sha256("prompt"), "gemini-2.5-flash")
+    assert key != llm_cache_key("pdf", text_sha256("prompt with another field"), "gemini-2.5-flash")
+    assert key != llm_cache_key("pdf", text_sha256("prompt"), "gemini-2.5-pro")
+
+
+def test_least_recently_read_entry_is_evicted_first(tmp_path, clock):
+    cache = open_cache(tmp_path, max_bytes=3 * ENTRY_BYTES)
+    for key in ("a", "b", "c"):
+        cache.put(KIND_TEXT, key, VALUE)
+    cache.get(KIND_TEXT, "a")  # "b" is now the least recently used
+
+    cache.put(KIND_LLM, "d", VALUE)
+
+    assert sorted(key for _, key, *_ in cache.entries()) == ["a", "c", "d"]
+    assert cache.stats() == {KIND_TEXT: (2, 2 * ENTRY_BYTES), KIND_LLM: (1, ENTRY_BYTES)}
+    cache.close()
+
+
+def test_hit_and_miss_counters(tmp_path):
+    cache = open_cache(tmp_path)
+    cache.put(KIND_TEXT, "a", VALUE)
+
+    assert cache.get(KIND_TEXT, "a") == VALUE
+    assert cache.get(KIND_TEXT, "b") is None
+    assert cache.get(KIND_LLM, "a") is None
+    assert (cache.hits, cache.misses) == ({KIND_TEXT: 1}, {KIND_TEXT: 1, KIND_LLM: 1})
+    assert cache.summary() == "  cache[llm]: 0 hit(s), 1 miss(es)\n  cache[text]: 1 hit(s), 1 miss(es)"
+    cache.close()
+
+
+def test_purge_older_than_days(tmp_path, clock):
+    cache = open_cache(tmp_path)
+    cache.put(KIND_TEXT, "old", VALUE)
+    cache.put(KIND_LLM, "old", VALUE)
+    clock.now += 3 * 86400
+    cache.put(KIND_TEXT, "new", VALUE)
+
+    assert cache.purge(KIND_LLM, older_than_days=2) == 1
+    assert cache.purge(older_than_days=2) == 1
+    assert [(kind, key) for kind, key, *_ in cache.entries()] == [(KIND_TEXT, "new")]
+    cache.close()
+
+
+def test_purge_command(tmp_path):
+    cache = open_cache(tmp_path)
+    cache.put(KIND_TEXT, "a", VALUE)
+    cache.put(KIND_LLM, "b", VALUE)
+    cache.close()
+
+    run = subprocess.run([sys.executable, extraction_cache.__file__, "--cache-file", cache.path, "purge",
+                          "--older-than-days", "0"], capture_output=True, text=True, check=True)
+
+    assert run.stdout == "Purged 2 entries.\n"
+
+
+def test_changing_the_prompt_or_the_model_misses_the_cache(tmp_path):
+    cache = open_cache(tmp_path)
+    extracted = ExtractedText("IR-O-U-0001.pdf", "Institute Name: Synthetic [IR-O-U-0001]", 1, 0.0, 0, sha256="pdf")
+
+    def run(fields, model_name):
+        backend = FakeLLMBackend(placeholder_responder, latency=0, jitter=0, model_name=model_name)
+        asyncio.run(extract_record(extracted, "Overall", AsyncLLMExtractor(backend, backoff=0), cache, fields))
+        return backend.calls
+
+    fields = {"rank": "Rank", "total_faculty": "Number of faculty members"}
+    assert run(fields, "model-a") == 1
+    assert run(fields, "model-a") == 0
+    assert run({**fields, "phd_full_time": "Ph.D Full-time"}, "model-a") == 1
+    assert run(fields, "model-b") == 1
+    assert cache.hits[KIND_LLM] == 1 and cache.misses[KIND_LLM] == 3
+    cache.close()
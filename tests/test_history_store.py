@@ -0,0 +1,47 @@
+from history_store import HistoryStore, split_metric_key
+
+
+def open_store(tmp_path):
+    return HistoryStore(str(tmp_path / "history.sqlite3"))
+
+
+def test_split_metric_key():
+    assert split_metric_key("capital_expenditure_23_24") == ("capital_expenditure", "2023-24")
+    assert split_metric_key("publications_2023") == ("publications", "2023")
+    assert split_metric_key("total_faculty") == ("total_faculty", "")
+
+
+def test_upserting_a_record_again_updates_it_in_place(tmp_path):
+    with open_store(tmp_path) as store:
+        store.upsert(2025, "Overall", [{"nirf_id": "IR-1", "institute_name": "Old", "total_faculty": 10,
+                                        "phd_full_time": 4}])
+        written, skipped = store.upsert(2025, "Overall", [{"nirf_id": "IR-1", "institute_name": "New",
+                                                           "total_faculty": 12}, {"institute_name": "No ID"}])
+
+        assert (written, skipped) == (1, 1)
+        assert store.years() == [(2025, "Overall", 1)]
+        assert store.top(2025, "Overall", "total_faculty") == [("IR-1", "New", 12)]
+        # A field missing from the new record does not linger from the old one
+        assert store.trend("IR-1", "phd_full_time") == []
+
+
+def test_rerunning_a_year_leaves_other_years_intact(tmp_path):
+    with open_store(tmp_path) as store:
+        store.upsert(2024, "Overall", [{"nirf_id": "IR-1", "institute_name": "A", "total_faculty": 9}])
+        store.upsert(2025, "Overall", [{"nirf_id": "IR-1", "institute_name": "A", "total_faculty": 10}])
+        store.upsert(2025, "Overall", [{"nirf_id": "IR-1", "institute_name": "A", "total_faculty": 11}])
+
+        assert store.years() == [(2024, "Overall", 1), (2025, "Overall", 1)]
+        assert store.trend("IR-1", "total_faculty") == [("2024", 9, 2024), ("2025", 11, 2025)]
+
+
+def test_trend_takes_a_period_from_the_newest_report(tmp_path):
+    with open_store(tmp_path) as store:
+        # The 2025 report revises 2022-23, which the 2024 report also covered
+        store.upsert(2025, "Overall", [{"nirf_id": "IR-1", "capital_expenditure_23_24": 300,
+                                        "capital_expenditure_22_23": 210}])
+        store.upsert(2024, "Overall", [{"nirf_id": "IR-1", "capital_expenditure_22_23": 200,
+                                        "capital_expenditure_21_22": 100}])
+
+        assert store.trend("IR-1", "capital_expenditure") == [("2021-22", 100, 2024), ("2022-23", 210, 2025),
+                                                               ("2023-24", 300, 2025)]
@@ -0,0 +1,28 @@
+import asyncio
+
+from llm_client import AsyncLLMExtractor, FakeLLMBackend
+
+
+class RejectingBackend(FakeLLMBackend):
+    """Fails every request with an error that is neither throttling nor a server fault."""
+
+    async def generate(self, prompt, response_schema=None):
+        self.calls += 1
+        raise PermissionError("403 API key not valid")
+
+
+def test_extract_returns_none_on_unexpected_backend_error():
+    backend = RejectingBackend()
+    extractor = AsyncLLMExtractor(backend, backoff=0)
+
+    assert asyncio.run(extractor.extract("prompt")) is None
+    assert backend.calls == 1
+    assert extractor.stats["failed"] == 1
+
+
+def test_extract_retries_unparseable_replies():
+    replies = iter(["not json", '```json\n{"rank": "7"}\n```'])
+    extractor = AsyncLLMExtractor(FakeLLMBackend(lambda prompt: next(replies), latency=0, jitter=0), backoff=0)
+
+    assert asyncio.run(extractor.extract("prompt")) == {"rank": "7"}
+    assert extractor.stats["parse_failures"] == 1
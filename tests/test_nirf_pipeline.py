@@ -0,0 +1,84 @@
+import asyncio
+import json
+from collections import Counter
+
+import pytest
+
+from benchmarks.fake_nirf_server import FakeNIRFServer
+from checkpoint_log import CheckpointWriter, iter_checkpoint
+from download_manifest import DownloadManifest
+from extraction_cache import ExtractionCache
+from llm_client import AsyncLLMExtractor, FakeLLMBackend
+from nirf import Pipeline
+from nirf_scraper import MANIFEST_FILE
+from nirf_years import checkpoint_file, ranking_tables_file
+from pdf_downloader import PDFDownloader
+from pdf_extractor import CACHE_FILE, BatchedLLMExtractor, placeholder_responder
+from run_metrics import RunMetrics
+from sheets_sync import FakeSpreadsheet
+
+YEAR = 2025
+INSTITUTES = 3
+CATEGORIES = ["Overall", "Engineering", "Research"]
+
+
+@pytest.fixture
+def server():
+    server = FakeNIRFServer(num_pdfs=INSTITUTES, latency=0, dcs=True).start()
+    yield server
+    server.stop()
+
+
+def run_pipeline(server, spreadsheet, monkeypatch):
+    """One `nirf run --fake-llm 0 --fake-sheets`; returns (published categories, LLM calls, run metrics)."""
+    published = Counter()
+    publish = Pipeline.publish
+
+    def counting_publish(pipeline, category):
+        published[category] += 1
+        publish(pipeline, category)
+
+    monkeypatch.setattr(Pipeline, "publish", counting_publish)
+    backend = FakeLLMBackend(placeholder_responder, latency=0, jitter=0)
+    extractor = AsyncLLMExtractor(backend, backoff=0)
+    cache = ExtractionCache(CACHE_FILE)
+    metrics = RunMetrics("run", {"year": YEAR})
+    manifest = DownloadManifest(MANIFEST_FILE)
+    downloader = PDFDownloader(max_workers=4, manifest=manifest, backoff=0, metrics=metrics)
+    with CheckpointWriter(checkpoint_file(YEAR)) as checkpoint:
+        pipeline = Pipeline(YEAR, downloader, extractor, cache, checkpoint, spreadsheet, server.base_url,
+                            extract_workers=2, metrics=metrics, batcher=BatchedLLMExtractor(extractor, 4))
+        asyncio.run(pipeline.run(CATEGORIES))
+    downloader.close()
+    manifest.close()
+    cache.close()
+    return published, backend.calls, metrics
+
+
+def test_pipeline_runs_offline_and_a_rerun_reuses_everything(server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    spreadsheet = FakeSpreadsheet()
+
+    published, llm_calls, metrics = run_pipeline(server, spreadsheet, monkeypatch)
+
+    records = list(iter_checkpoint(checkpoint_file(YEAR)))
+    assert Counter(record["category"] for record in records) == {"Overall": INSTITUTES, "Engineering": INSTITUTES}
+    assert all(record["data"]["nirf_id"] for record in records)
+    assert published == {category: 1 for category in CATEGORIES}
+    assert set(spreadsheet.worksheets) == set(CATEGORIES)
+    assert llm_calls > 0
+    assert metrics.counters["bytes_downloaded"] > 0
+    with open(ranking_tables_file(YEAR)) as f:
+        assert set(json.load(f)) == set(CATEGORIES)
+
+    requests_before = server.stats["requests"]
+    published, llm_calls, metrics = run_pipeline(server, spreadsheet, monkeypatch)
+
+    # Unchanged PDFs are only revalidated, and every report is already in the checkpoint log
+    assert server.stats["not_modified"] == 2 * INSTITUTES
+    assert server.stats["requests"] - requests_before == len(CATEGORIES) + 2 * INSTITUTES
+    assert metrics.counters["bytes_downloaded"] == 0
+    assert metrics.counters["downloads_not_modified"] == 2 * INSTITUTES
+    assert llm_calls == 0
+    assert len(list(iter_checkpoint(checkpoint_file(YEAR)))) == len(records)
+    assert published == {category: 1 for category in CATEGORIES}
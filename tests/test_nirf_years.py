@@ -0,0 +1,18 @@
+from nirf_years import checkpoint_file, citation_years, financial_years, period_key, publication_years, yearly_fields
+from pdf_extractor import field_templates
+
+
+def test_periods_follow_the_ranking_year():
+    assert financial_years(2025) == ["2023-24", "2022-23", "2021-22"]
+    assert publication_years(2025) == [2023, 2022, 2021]
+    assert citation_years(2025) == ["2021-22", "2020-21", "2019-20"]
+    assert period_key("2023-24") == "23_24"
+    assert yearly_fields("publications", "Publications", [2023]) == {"publications_2023": "Publications (2023)"}
+
+
+def test_field_templates_for_a_later_year():
+    shared = field_templates(2026)["Shared"]
+
+    assert shared["capital_expenditure_24_25"] == "Annual capital expenditure (2024-25)"
+    assert "capital_expenditure_21_22" not in shared
+    assert checkpoint_file(2026) == "nirf_data_2026.jsonl"
@@ -0,0 +1,180 @@
+import hashlib
+
+import pytest
+import requests
+
+from download_manifest import STATUS_COMPLETE, STATUS_PARTIAL, DownloadManifest, ManifestEntry
+from pdf_downloader import (DOWNLOADED, FAILED, RESUMED, PDFDownloader, content_range_start,
+                            content_range_total)
+
+URL = "http://reports.example/report.pdf"
+BODY = bytes(range(256)) * 4
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, body=b"", headers=None, fail_after=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+        self.fail_after = fail_after   # Bytes streamed before the connection drops
+        self.reason = "fake"
+        self.url = URL
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code}", response=self)
+
+    def iter_content(self, chunk_size):
+        body = self.body if self.fail_after is None else self.body[:self.fail_after]
+        for i in range(0, len(body), chunk_size):
+            yield body[i:i + chunk_size]
+        if self.fail_after is not None:
+            raise requests.exceptions.ChunkedEncodingError("connection dropped")
+
+
+class FakeSession:
+    """Replays canned responses and records the headers of every request."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.sent_headers = []
+
+    def get(self, url, stream=False, timeout=None, headers=None):
+        self.sent_headers.append(headers or {})
+        return self.responses.pop(0)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    manifest = DownloadManifest(str(tmp_path / "manifest.sqlite3"))
+    yield manifest
+    manifest.close()
+
+
+def test_failed_download_without_manifest_removes_part_file(tmp_path):
+    dest = tmp_path / "report.pdf"
+    session = FakeSession(FakeResponse(body=b"x" * 1000, fail_after=400))
+    downloader = PDFDownloader(max_retries=0, chunk_size=100, session=session)
+
+    result = downloader.download(URL, str(dest))
+
+    assert result.status == FAILED
+    assert not (tmp_path / "report.pdf.part").exists()
+
+
+def test_failed_download_keeps_resumable_part_file(tmp_path, manifest):
+    dest = tmp_path / "report.pdf"
+    session = FakeSession(FakeResponse(body=b"x" * 1000, headers={"ETag": '"v1"'}, fail_after=400))
+    downloader = PDFDownloader(max_retries=0, chunk_size=100, session=session, manifest=manifest)
+
+    downloader.download(URL, str(dest))
+
+    assert (tmp_path / "report.pdf.part").read_bytes() == b"x" * 400
+    assert manifest.get(URL).status == STATUS_PARTIAL
+
+
+def test_host_slot_is_free_during_retry_backoff(tmp_path):
+    session = FakeSession(FakeResponse(503), FakeResponse(body=b"%PDF"))
+    downloader = PDFDownloader(per_host_limit=1, max_retries=1, session=session)
+    free_during_sleep = []
+
+    def sleep(attempt, response=None):
+        slot = downloader._slot_for(URL)
+        free_during_sleep.append(slot.acquire(blocking=False))
+        slot.release()
+
+    downloader._sleep_before_retry = sleep
+    result = downloader.download(URL, str(tmp_path / "report.pdf"))
+
+    assert result.ok and result.attempts == 2
+    assert free_during_sleep == [True]
+
+
+def interrupted_download(tmp_path, manifest, received=400):
+    """A report whose first `received` bytes are in its .part file, recorded as partial in the manifest."""
+    dest = tmp_path / "report.pdf"
+    (tmp_path / "report.pdf.part").write_bytes(BODY[:received])
+    manifest.record(ManifestEntry(URL, str(dest), STATUS_PARTIAL, etag='"v1"'))
+    return dest
+
+
+def test_content_range_start():
+    assert content_range_start("bytes 400-1023/1024") == 400
+    assert content_range_start("bytes 0-99/*") == 0
+    assert content_range_start("") is None
+    assert content_range_total("bytes */1024") == 1024
+    assert content_range_total("bytes 0-99/1024") == 1024
+    assert content_range_total("bytes 0-99/*") is None
+
+
+def test_resume_appends_the_requested_range(tmp_path, manifest):
+    dest = interrupted_download(tmp_path, manifest)
+    session = FakeSession(FakeResponse(206, BODY[400:], {"ETag": '"v1"', "Content-Range": "bytes 400-1023/1024"}))
+
+    result = PDFDownloader(session=session, manifest=manifest).download(URL, str(dest))
+
+    assert result.status == RESUMED and result.bytes_written == len(BODY) - 400
+    assert session.sent_headers[0]["Range"] == "bytes=400-"
+    assert dest.read_bytes() == BODY
+    assert manifest.get(URL).status == STATUS_COMPLETE and manifest.get(URL).size == len(BODY)
+
+
+def test_resume_restarts_when_the_206_starts_elsewhere(tmp_path, manifest):
+    dest = interrupted_download(tmp_path, manifest)
+    # The server ignored the offset and sent the file from byte 0 as a 206
+    session = FakeSession(FakeResponse(206, BODY, {"ETag": '"v1"', "Content-Range": "bytes 0-1023/1024"}),
+                          FakeResponse(200, BODY, {"ETag": '"v1"'}))
+
+    result = PDFDownloader(session=session, manifest=manifest).download(URL, str(dest))
+
+    assert result.status == DOWNLOADED
+    assert "Range" not in session.sent_headers[1]
+    assert dest.read_bytes() == BODY
+    assert manifest.get(URL).size == len(BODY)
+
+
+def test_resume_writes_whole_file_when_server_ignores_range(tmp_path, manifest):
+    dest = interrupted_download(tmp_path, manifest)
+    session = FakeSession(FakeResponse(200, BODY, {"ETag": '"v2"'}))
+
+    result = PDFDownloader(session=session, manifest=manifest).download(URL, str(dest))
+
+    assert result.status == DOWNLOADED
+    assert dest.read_bytes() == BODY
+
+
+def test_416_for_a_complete_part_file_finishes_the_download(tmp_path, manifest):
+    # The previous run stopped after the last byte but before the rename
+    dest = interrupted_download(tmp_path, manifest, received=len(BODY))
+    session = FakeSession(FakeResponse(416, headers={"Content-Range": f"bytes */{len(BODY)}"}))
+
+    result = PDFDownloader(session=session, manifest=manifest).download(URL, str(dest))
+
+    assert result.ok and result.status == RESUMED and result.bytes_written == 0
+    assert dest.read_bytes() == BODY
+    assert not (tmp_path / "report.pdf.part").exists()
+    entry = manifest.get(URL)
+    assert (entry.status, entry.size, entry.etag) == (STATUS_COMPLETE, len(BODY), '"v1"')
+    assert entry.sha256 == hashlib.sha256(BODY).hexdigest()
+
+
+def test_416_for_a_part_file_of_another_size_restarts(tmp_path, manifest):
+    dest = interrupted_download(tmp_path, manifest)
+    session = FakeSession(FakeResponse(416, headers={"Content-Range": "bytes */300"}),
+                          FakeResponse(200, BODY, {"ETag": '"v2"'}))
+
+    result = PDFDownloader(session=session, manifest=manifest).download(URL, str(dest))
+
+    assert result.status == DOWNLOADED
+    assert "Range" not in session.sent_headers[1]
+    assert dest.read_bytes() == BODY
+    assert manifest.get(URL).size == len(BODY)
@@ -0,0 +1,183 @@
+import asyncio
+import json
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import PyPDF2
+import pytest
+
+import pdf_extractor
+from benchmarks.synthetic_corpus import text_pdf
+from checkpoint_log import CheckpointWriter
+from extraction_cache import ExtractionCache
+from llm_client import AsyncLLMExtractor, FakeLLMBackend, estimate_tokens, validate_json
+from pdf_extractor import (FIELD_TEMPLATES, PROMPT_FIELD, PROMPT_REPORT, BatchedLLMExtractor, ExtractedText,
+                           batch_schema, build_prompt, extract_record, iter_extracted_texts, placeholder_responder,
+                           record_schema)
+from prompt_filter import PromptStats, filter_text_for_fields
+from rule_extractor import extract_fields_with_rules, missing_fields
+from work_scheduler import WorkQueue, doc_id
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "fixtures", "dcs", "IR-O-U-0456.txt")
+
+FIELDS = {"rank": "Rank", "institute_name": "Institute Name", "approved_intake_ug": "UG intake",
+          "approved_intake_pg": "PG intake", "total_faculty": "Total Faculty"}
+
+
+def subset(*keys):
+    return {key: FIELDS[key] for key in keys}
+
+
+def run_batch(responder, requests, max_docs=8):
+    """Submits (text, category, fields) requests concurrently; returns the results, the batcher and the prompts."""
+    prompts = []
+
+    def respond(prompt):
+        prompts.append(prompt)
+        return responder(prompt)
+
+    backend = FakeLLMBackend(respond, latency=0, jitter=0)
+    batcher = BatchedLLMExtractor(AsyncLLMExtractor(backend, backoff=0), max_docs=max_docs)
+    batcher.batcher.linger = 0.01
+
+    async def main():
+        return await asyncio.gather(*(batcher.extract(*request) for request in requests))
+
+    return asyncio.run(main()), batcher, prompts
+
+
+def test_schema_accepts_typed_and_null_fields_and_rejects_wrong_types():
+    schema = record_schema(subset("rank", "approved_intake_ug"))
+
+    assert validate_json({"rank": "101-150", "approved_intake_ug": 120}, schema) == []
+    assert validate_json({"rank": None, "approved_intake_ug": None}, schema) == []
+    assert validate_json({"rank": 7}, schema)
+    assert validate_json({"approved_intake_ug": "120"}, schema)
+
+
+def test_batch_schema_requires_the_report_label():
+    records = batch_schema(subset("rank"))["properties"]["records"]
+
+    assert validate_json({"doc": "DOC 1", "rank": "7"}, records["items"]) == []
+    assert validate_json({"rank": "7"}, records["items"]) == ["$: missing 'doc'"]
+
+
+def test_reports_with_different_missing_fields_share_one_batch():
+    requests = [("report a", "Overall", subset("rank", "approved_intake_ug")),
+                ("report b", "Overall", subset("approved_intake_pg")),
+                ("report c", "Overall", subset("rank", "total_faculty"))]
+
+    results, batcher, prompts = run_batch(placeholder_responder, requests, max_docs=3)
+
+    assert len(prompts) == 1
+    assert PROMPT_REPORT.findall(prompts[0]) == ["DOC 1", "DOC 2", "DOC 3"]
+    assert set(PROMPT_FIELD.findall(prompts[0])) == {"rank", "approved_intake_ug", "approved_intake_pg",
+                                                     "total_faculty"}
+    # Each report gets back only the fields it was missing
+    assert [set(result) for result in results] == [set(fields) for _, _, fields in requests]
+    assert batcher.stats == {"requeued": 0, "invalid_records": 0}
+
+
+def test_categories_are_batched_separately():
+    requests = [("report a", "Overall", subset("rank")), ("report b", "Engineering", subset("rank"))]
+
+    results, batcher, prompts = run_batch(placeholder_responder, requests, max_docs=2)
+
+    assert len(prompts) == 2
+    assert all(not PROMPT_REPORT.findall(prompt) for prompt in prompts)
+    assert results == [{"rank": results[0]["rank"]}] * 2
+
+
+def test_invalid_and_missing_records_are_requeued_singly():
+    def responder(prompt):
+        if PROMPT_REPORT.findall(prompt):
+            return json.dumps({"records": [{"doc": "DOC 1", "rank": "12", "approved_intake_ug": 60},
+                                           {"doc": "DOC 2", "rank": 40}]})
+        return json.dumps({"rank": "single"})
+
+    requests = [("report a", "Overall", subset("rank")),
+                ("report b", "Overall", subset("rank")),
+                ("report c", "Overall", subset("rank", "approved_intake_ug"))]
+
+    results, batcher, prompts = run_batch(responder, requests, max_docs=3)
+
+    # DOC 2's rank is not text and DOC 3 has no record: both are asked for on their own
+    assert results == [{"rank": "12"}, {"rank": "single"}, {"rank": "single"}]
+    assert len(prompts) == 3
+    assert batcher.stats == {"requeued": 2, "invalid_records": 1}
+
+
+def test_prompt_savings_compare_the_same_fields(tmp_path):
+    with open(FIXTURE) as f:
+        text = f.read()
+    fields = FIELD_TEMPLATES["Shared"]
+    missing = missing_fields(extract_fields_with_rules(text, "Overall", fields), fields)
+    extractor = AsyncLLMExtractor(FakeLLMBackend(placeholder_responder, latency=0, jitter=0), backoff=0)
+    stats = PromptStats()
+
+    cache = ExtractionCache(str(tmp_path / "cache.sqlite3"))
+    record = asyncio.run(extract_record(ExtractedText("IR-O-U-0456.pdf", text, 4, 0.0, 0, sha256="abc"),
+                                        "Overall", extractor, cache, fields, prompt_stats=stats))
+    cache.close()
+
+    assert record["total_faculty"] == 654
+    # The baseline asks for the fields the rules left, so the figure measures section filtering alone
+    assert stats.documents == [("IR-O-U-0456.pdf", estimate_tokens(build_prompt(text, "Overall", missing)),
+                                estimate_tokens(build_prompt(filter_text_for_fields(text, missing), "Overall",
+                                                             missing)))]
+
+
+class HangingReader(PyPDF2.PdfReader):
+    """Never finishes a file named "hang*"; forked pool workers inherit it."""
+
+    def __init__(self, stream, *args, **kwargs):
+        if os.path.basename(stream.name).startswith("hang"):
+            time.sleep(60)
+        super().__init__(stream, *args, **kwargs)
+
+
+def write_pdfs(tmp_path, names):
+    paths = []
+    for name in names:
+        path = tmp_path / f"{name}.pdf"
+        path.write_bytes(text_pdf(f"Institute Name: {name}"))
+        paths.append(str(path))
+    return paths
+
+
+def test_a_hanging_pdf_is_skipped_after_the_timeout(tmp_path, monkeypatch):
+    monkeypatch.setattr(PyPDF2, "PdfReader", HangingReader)
+    paths = write_pdfs(tmp_path, ["a", "hang", "b", "c"])
+
+    start = time.monotonic()
+    results = {os.path.basename(r.pdf_path): r for r in iter_extracted_texts(paths, workers=2, timeout=0.5)}
+
+    assert time.monotonic() - start < 10
+    assert results["hang.pdf"].error == "timed out after 0.5s" and results["hang.pdf"].text == ""
+    assert {name: r.text.strip() for name, r in results.items() if name != "hang.pdf"} == {
+        "a.pdf": "Institute Name: a", "b.pdf": "Institute Name: b", "c.pdf": "Institute Name: c"}
+
+
+def test_an_extraction_pool_failure_fails_the_category(tmp_path, monkeypatch):
+    paths = write_pdfs(tmp_path, ["a", "b"])
+
+    def broken_pool(pdf_paths, **kwargs):
+        pdf_path = next(iter(pdf_paths))
+        yield ExtractedText(pdf_path, "Institute Name: a", 1, 0.0, 0)
+        raise BrokenProcessPool("a worker was killed")
+
+    monkeypatch.setattr(pdf_extractor, "iter_extracted_texts", broken_pool)
+    extractor = AsyncLLMExtractor(FakeLLMBackend(placeholder_responder, latency=0, jitter=0), backoff=0)
+    cache = ExtractionCache(str(tmp_path / "cache.sqlite3"))
+    checkpoint = CheckpointWriter(str(tmp_path / "checkpoint.jsonl"))
+    work_queue = WorkQueue(str(tmp_path / "work"), worker_id="w1")
+
+    with pytest.raises(BrokenProcessPool):
+        asyncio.run(pdf_extractor.process_category("Overall", paths, subset("rank"), extractor, cache, checkpoint,
+                                                   work_queue, None))
+    checkpoint.close()
+    cache.close()
+
+    # The record extracted before the failure is still kept
+    assert work_queue.summary([doc_id("Overall", path) for path in paths]) == "1 pending, 0 in_progress, 1 done, 0 failed"
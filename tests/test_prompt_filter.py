@@ -0,0 +1,23 @@
+from prompt_filter import normalize_section
+
+SPONSORED = """Total Amount Received (Amount in
+Rupees)4621800000 4012300000 3786500000
+Amount Received in Words Four Hundred Sixty Two Crore Eighteen
+LakhsFour Hundred One Crore Twenty Three
+LakhsThree Hundred Seventy Eight Crore Sixty
+Five Lakhs
+Consultancy Project Details
+Total no. of Consultancy Projects 1,412 1,387 1,240"""
+
+
+def test_amounts_in_words_rows_are_dropped_even_when_wrapped():
+    text = normalize_section(SPONSORED)
+
+    assert "Words" not in text and "Crore" not in text
+    assert "4621800000 4012300000 3786500000" in text
+    assert "Consultancy Project Details" in text
+
+
+def test_indian_grouped_numbers_lose_their_commas():
+    assert normalize_section("Total no. of Consultancy Projects 1,412 1,387") == \
+        "Total no. of Consultancy Projects 1412 1387"
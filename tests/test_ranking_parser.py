@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+from ranking_parser import available_backends, iter_ranking_rows, parse_ranking_table
+
+# Hand-written in the markup of nirfindia.org's ranking pages (scripts and layout tables around the
+# ranking table, entities, <br />, CRLF line endings, non-ASCII text), unlike the generated pages
+# in benchmarks/fixtures/html/
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+BACKENDS = available_backends()
+
+
+def read_page(name):
+    with open(os.path.join(FIXTURE_DIR, name), "rb") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_engineering_page_rows(backend):
+    rows = parse_ranking_table(read_page("EngineeringRanking.html"), "Engineering", backend)
+
+    assert [row["nirf_id"] for row in rows] == ["IR-E-U-0456", "IR-E-U-0306", "IR-E-U-0053", "IR-E-U-0439"]
+    assert rows[0] == {"nirf_id": "IR-E-U-0456", "institute_name": "Indian Institute of Technology Madras",
+                       "city": "Chennai", "state": "Tamil Nadu", "score": "89.46", "rank": "1",
+                       "tlr_100": "95.70", "rpc_100": "90.07", "go_100": "81.16", "oi_100": "64.02",
+                       "perception_100": "100.00"}
+    # The name is the cell's own text: no "More Details" link, no sub-table scores, entities decoded
+    assert [row["institute_name"] for row in rows[2:]] == ["Vellore Institute of Technology – Vellore",
+                                                           "Birla Institute of Technology & Science–Pilani"]
+    assert rows[3]["state"] == "Rājasthān"
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_research_parameter_columns(backend):
+    rows = parse_ranking_table(read_page("ResearchRanking.html"), "Research", backend)
+
+    assert [{key: row[key] for key in ("qnr_100", "qlr_100", "sfc_100", "oi_100", "perception_100")}
+            for row in rows] == [
+        {"qnr_100": "92.41", "qlr_100": "96.08", "sfc_100": "87.32", "oi_100": "60.57", "perception_100": "100.00"},
+        # No header row in this sub-table, so the Research column order applies
+        {"qnr_100": "88.05", "qlr_100": "80.67", "sfc_100": "92.18", "oi_100": "58.31", "perception_100": "91.46"}]
+    assert all("tlr_100" not in row for row in rows)
+
+
+@pytest.mark.parametrize("page,category", [("EngineeringRanking.html", "Engineering"),
+                                           ("ResearchRanking.html", "Research")])
+@pytest.mark.parametrize("chunk_size", [1, 7, 64])
+def test_backends_agree_when_fed_in_small_chunks(page, category, chunk_size):
+    pytest.importorskip("lxml")
+    html = read_page(page)
+    expected = parse_ranking_table(html, category, "stdlib")
+
+    for backend in BACKENDS:
+        # Chunk boundaries split tags, entities and multi-byte characters
+        assert list(iter_ranking_rows(html, category, backend, chunk_size)) == expected
+        assert list(iter_ranking_rows(html.decode("utf-8"), category, backend, chunk_size)) == expected
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        parse_ranking_table("<table></table>", backend="bs4")
@@ -0,0 +1,173 @@
+import glob
+import json
+import os
+
+import pytest
+
+from rule_extractor import (_parse_accreditation, _parse_faculty, _parse_header, _parse_intake, _parse_online,
+                            _parse_phd, _parse_strength, _parse_yearly_amounts, extract_fields_with_rules,
+                            missing_fields, split_sections)
+
+PYPDF2_FIXTURES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "..", "benchmarks", "fixtures", "dcs",
+                                               "pypdf2", "*.txt")))
+
+HEADER = "Submitted Institute Data for NIRF'2025'\nInstitute Name: Indian Institute of\nScience [IR-O-U-0220]\n"
+
+INTAKE = """Sanctioned (Approved) Intake
+Academic Year 2023-24 2022-23 2021-22
+UG [4 Years Program(s)] 400 380 360
+UG [5 Years Program(s)] 50 50 50
+PG [2 Year Program(s)] 300 300 280
+"""
+
+# PyPDF2 runs a wrapped label into its first value ("Program(s)]300")
+STRENGTH = """Total Actual Student Strength (Programme(s) Offered by Your Institution)
+UG [4 Years
+Program(s)]300 100 400 200 190 10 30 120 80 5 1 314
+PG [2 Year
+Program(s)]150 50 200 90 105 5 12 60 40 2 0 158
+"""
+
+PHD = """Ph.D Student Details
+Total Students Full Time 1,200 Part Time 80
+No. of Ph.D students graduated (including Integrated Ph.D) 2023-24 2022-23 2021-22
+Full Time 100 90 80
+Part Time 10 9 8
+"""
+
+ONLINE = "Online Education\nPortal Name No. of students offered online courses Swayam 1380 3720 104\n"
+
+CAPITAL = """Financial Resources: Utilised Amount for the Capital expenditure for previous 3 years
+Financial Year 2023-24 2022-23 2021-22
+Total Annual Capital Expenditure 2196924000 (Two Hundred Nineteen Crore)1903000000 (One Hundred Ninety Crore)
+1664700000 (One Hundred Sixty Six Crore)
+"""
+
+ACCREDITATION = ("Accreditation NBA Accreditation 1. Does your institution have a valid NBA Accreditation? NO\n"
+                 "NAAC Accreditation 1. Does your institution have a valid NAAC Accreditation? yes\n")
+
+FACULTY = "Faculty Details\n1. Number of faculty members entered\n654\n"
+
+REPORT = HEADER + INTAKE + STRENGTH + PHD + ONLINE + CAPITAL + ACCREDITATION + FACULTY
+
+FIELDS = dict.fromkeys(["rank", "institute_name", "nirf_id", "category", "approved_intake_ug",
+                        "total_approved_intake", "students_ug_strength", "total_students_strength_excluding_phd",
+                        "phd_full_time", "total_students_including_phd", "total_faculty",
+                        "capital_expenditure_23_24", "nba_accreditation", "publications_2023"], "description")
+
+
+def test_split_sections_finds_headings_in_document_order():
+    sections = split_sections(REPORT)
+
+    assert list(sections) == ["header", "intake", "strength", "phd", "online", "capital", "accreditation",
+                              "faculty"]
+    assert sections["header"].startswith("Submitted Institute Data")
+    assert sections["faculty"] == "Faculty Details 1. Number of faculty members entered 654"
+
+
+def test_split_sections_without_headings_is_all_header():
+    assert split_sections("just\nsome text") == {"header": "just some text"}
+
+
+def test_header_joins_a_wrapped_institute_name():
+    assert _parse_header(split_sections(HEADER)["header"]) == {"institute_name": "Indian Institute of Science",
+                                                               "nirf_id": "IR-O-U-0220"}
+    assert _parse_header("Institute Name: no ID here") == {}
+
+
+def test_intake_sums_programmes_for_the_latest_year():
+    assert _parse_intake(split_sections(INTAKE)["intake"]) == {
+        "approved_intake_ug": 450, "approved_intake_pg": 300, "approved_intake_pg_integrated": 0,
+        "total_approved_intake": 750}
+
+
+def test_intake_with_a_short_row_is_left_to_the_llm():
+    short = INTAKE.replace("300 300 280", "300 300")
+
+    assert _parse_intake(split_sections(short)["intake"]) == {}
+
+
+def test_strength_reads_wrapped_programme_rows():
+    assert _parse_strength(split_sections(STRENGTH)["strength"]) == {
+        "students_ug_strength": 400, "students_pg_strength": 200, "students_pg_integrated": 0,
+        "total_students_strength_excluding_phd": 600, "students_economically_backward": 42,
+        "students_socially_challenged": 180, "students_not_receiving_reimbursement": 472}
+
+
+def test_strength_with_shifted_columns_is_left_to_the_llm():
+    # A dropped cell shifts every later column, so male + female no longer equals the total
+    shifted = STRENGTH.replace("300 100 400", "300 400")
+
+    assert _parse_strength(split_sections(shifted)["strength"]) == {}
+
+
+def test_phd_totals_and_graduates():
+    assert _parse_phd(split_sections(PHD)["phd"]) == {
+        "phd_full_time": 1200, "phd_part_time": 80,
+        "phd_awarded_full_time_last_3_years": 270, "phd_awarded_part_time_last_3_years": 27}
+
+
+def test_phd_graduates_with_missing_years_are_skipped():
+    partial = PHD.replace("Part Time 10 9 8", "Part Time 10")
+
+    assert _parse_phd(split_sections(partial)["phd"]) == {"phd_full_time": 1200, "phd_part_time": 80}
+
+
+def test_online_reads_the_swayam_row():
+    assert _parse_online(split_sections(ONLINE)["online"]) == {
+        "online_education_offered": "Yes", "online_students_offered_courses": 1380,
+        "online_credits_transferred": 3720, "online_courses_count": 104}
+    assert _parse_online("Online Education Swayam 0 0") == {}
+
+
+def test_yearly_amounts_skip_amounts_in_words():
+    section = split_sections(CAPITAL)["capital"]
+
+    assert _parse_yearly_amounts(section, r"Total Annual Capital Expenditure", "capital_expenditure") == {
+        "capital_expenditure_23_24": 2196924000, "capital_expenditure_22_23": 1903000000,
+        "capital_expenditure_21_22": 1664700000}
+    assert _parse_yearly_amounts(section, r"Total Annual Operational Expenditure", "operating_expenditure") == {}
+
+
+def test_accreditation_and_faculty():
+    assert _parse_accreditation(split_sections(ACCREDITATION)["accreditation"]) == {
+        "nba_accreditation": "NO", "naac_accreditation": "YES"}
+    assert _parse_faculty(split_sections(FACULTY)["faculty"]) == {"total_faculty": 654}
+
+
+def test_full_report_fills_the_template_in_order():
+    data = extract_fields_with_rules(REPORT, "Overall", FIELDS)
+
+    assert list(data) == [key for key in FIELDS if key in data]
+    assert data["total_students_including_phd"] == 600 + 1200 + 80
+    assert missing_fields(data, FIELDS) == {"rank": "description", "publications_2023": "description"}
+    assert missing_fields(data, FIELDS, include_not_in_dcs=False) == {}
+
+
+def test_missing_and_unreadable_sections_stay_missing():
+    # No PhD section, and a strength table whose columns have shifted
+    report = HEADER + INTAKE + STRENGTH.replace("300 100 400", "300 400") + FACULTY
+    data = extract_fields_with_rules(report, "Overall", FIELDS)
+
+    assert data["approved_intake_ug"] == 450
+    assert {"students_ug_strength", "total_students_strength_excluding_phd", "phd_full_time",
+            "total_students_including_phd", "capital_expenditure_23_24", "nba_accreditation"} \
+        <= missing_fields(data, FIELDS, include_not_in_dcs=False).keys()
+
+
+def test_empty_text_fills_nothing():
+    assert extract_fields_with_rules("", "Overall", FIELDS) == {}
+    assert missing_fields({}, FIELDS) == FIELDS
+
+
+@pytest.mark.parametrize("text_path", PYPDF2_FIXTURES, ids=os.path.basename)
+def test_rules_read_pypdf2_output_of_the_fixture_reports(text_path):
+    with open(text_path) as f:
+        text = f.read()
+    with open(text_path[:-len(".txt")] + ".json") as f:
+        expected = {key: value for key, value in json.load(f).items() if value is not None and key != "_origin"}
+    data = extract_fields_with_rules(text, expected["category"], dict.fromkeys(expected, ""))
+
+    # Everything the rules fill must be right; what they leave out goes to the LLM
+    assert {key: expected[key] for key in data} == data
+    assert data["nirf_id"] == expected["nirf_id"]
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from run_metrics import RunMetrics, doc_key, format_summary, percentile
+
+
+def test_percentile_interpolates_between_ranks():
+    assert percentile([], 50) == 0.0
+    assert percentile([7], 99) == 7
+    assert percentile([4, 1, 3, 2], 50) == 2.5
+    assert percentile([1, 2, 3, 4], 100) == 4
+
+
+def test_report_percentiles_throughput_and_cost(tmp_path):
+    metrics = RunMetrics("extract", {"year": 2025})
+    metrics.elapsed = lambda: 10.0
+    # 1 ms .. 100 ms, recorded out of order
+    for ms in [*range(100, 50, -1), *range(1, 51)]:
+        metrics.record("llm", ms / 1000, f"Overall/{ms}.pdf", ok=ms != 100)
+    metrics.record("text", 0.5, "Overall/1.pdf")
+    metrics.record("text", 0.25, "Overall/1.pdf")
+    metrics.add_counters({"prompt_tokens": 1_000_000, "response_tokens": 200_000}, prefix="llm_")
+
+    report = metrics.write_json(str(tmp_path / "report.json"), "gemini-2.5-flash")
+    with open(tmp_path / "report.json") as f:
+        saved = json.load(f)
+
+    llm = saved["stages"]["llm"]
+    assert (llm["count"], llm["failed"]) == (100, 1)
+    assert llm["p50"] == pytest.approx(0.0505)
+    assert llm["p95"] == pytest.approx(0.09505)
+    assert llm["p99"] == pytest.approx(0.09901)
+    assert llm["max"] == pytest.approx(0.1)
+    assert llm["docs_per_second"] == pytest.approx(10.0)
+    assert saved["stages"]["text"]["docs_per_second"] == pytest.approx(0.2)
+    # A document's time in a stage accumulates over retries
+    assert saved["documents"]["Overall/1.pdf"] == {"llm": pytest.approx(0.001), "text": pytest.approx(0.75)}
+    assert saved["cost"] == {"model": "gemini-2.5-flash", "prompt_tokens": 1_000_000, "response_tokens": 200_000,
+                             "usd": pytest.approx(0.80)}
+    assert report["path"] == str(tmp_path / "report.json")
+
+
+def test_no_cost_for_an_unpriced_model():
+    metrics = RunMetrics("extract")
+    metrics.count("llm_prompt_tokens", 500)
+
+    assert "cost" not in metrics.report("fake")
+
+
+def test_format_summary():
+    metrics = RunMetrics("extract")
+    metrics.elapsed = lambda: 2.0
+    for seconds in (0.1, 0.2, 0.3):
+        metrics.record("llm", seconds)
+    metrics.count("pages_parsed", 12)
+    report = metrics.report("gemini-2.5-flash")
+
+    lines = format_summary(report).splitlines()
+
+    assert lines[1] == "--- Run Metrics (extract, 2.0s) ---"
+    assert lines[3].split() == ["llm", "3", "0", "1.50", "200.0", "290.0", "298.0", "300.0"]
+    assert lines[4] == "  pages_parsed=12"
+    assert lines[5] == "  llm cost: 0 prompt + 0 response tokens = ~$0.0000 (gemini-2.5-flash)"
+
+
+def test_doc_key():
+    assert doc_key("nirf_reports/2025/Overall/IR-O-U-0456.pdf") == "Overall/IR-O-U-0456.pdf"
@@ -0,0 +1,64 @@
+import pandas as pd
+
+from sheets_sync import FakeWorksheet, dataframe_to_grid, diff_ranges, normalize_cell, sync_worksheet
+
+
+def wide_frame():
+    df = pd.DataFrame({"IIT A": [1, 1234.5, 1259.0, "Yes"], "IIT B": [2, 99.25, 1562.0, "No"]},
+                      index=["rank", "score", "approved_intake_ug", "nba_accreditation"])
+    df.index.name = "metric"
+    return df
+
+
+def test_changed_column_becomes_one_range():
+    old = [["metric", "A", "B"], ["x", "1", "2"], ["y", "3", "4"], ["z", "5", "6"]]
+    new = [["metric", "A", "B"], ["x", "1", "9"], ["y", "3", "9"], ["z", "5", "6"]]
+
+    ranges, changed = diff_ranges(old, new)
+
+    assert changed == 2
+    assert ranges == [{"range": "C2:C3", "values": [["9"], ["9"]]}]
+
+
+def test_resync_of_formatted_sheet_changes_nothing():
+    # The sheet displays numbers as "1,234.50", which must not count as a change
+    worksheet = FakeWorksheet(row_count=10, col_count=5, number_format="{:,.2f}")
+    grid = dataframe_to_grid(wide_frame())
+    sync_worksheet(worksheet, grid)
+    assert worksheet.get_all_values()[2][1] == "1,234.50"
+
+    again = sync_worksheet(worksheet, grid)
+
+    assert again.cells_changed == 0 and again.requests == 0
+
+
+def test_only_real_changes_are_written():
+    worksheet = FakeWorksheet(row_count=10, col_count=5, number_format="{:,}")
+    sync_worksheet(worksheet, dataframe_to_grid(wide_frame()))
+    worksheet.cells_written = 0
+    updated = wide_frame()
+    updated.loc["score", "IIT B"] = 101.0
+
+    result = sync_worksheet(worksheet, dataframe_to_grid(updated))
+
+    assert result.cells_changed == 1 and worksheet.cells_written == 1
+    assert worksheet.get_all_values(value_render_option="UNFORMATTED_VALUE")[2][2] == 101
+
+
+def test_sheet_is_resized_to_drop_stale_rows():
+    worksheet = FakeWorksheet(row_count=10, col_count=5)
+    sync_worksheet(worksheet, dataframe_to_grid(wide_frame()))
+
+    result = sync_worksheet(worksheet, dataframe_to_grid(wide_frame().iloc[:2]))
+
+    assert result.resized and (worksheet.row_count, worksheet.col_count) == (3, 3)
+    assert len(worksheet.get_all_values()) == 3
+
+
+def test_normalize_cell_matches_how_user_entered_values_are_stored():
+    assert normalize_cell("007") == normalize_cell(7) == "7"
+    assert normalize_cell("1.5e3") == normalize_cell(1500.0) == "1500"
+    assert normalize_cell(12.5) == "12.5"
+    assert normalize_cell("true") == normalize_cell(True) == "TRUE"
+    assert normalize_cell("") == "" and normalize_cell(float("nan")) == ""
+    assert normalize_cell("101-150") == "101-150"
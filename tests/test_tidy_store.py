@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+
+from tidy_store import build_schema, load_tidy, typed_frame, wide_view, write_tidy
+
+MAPPING = {"rank": "rank", "institute_name": "Name of the Institute", "nirf_id": "Institute ID",
+           "total_faculty": "Number of faculty members", "capital_expenditure_23_24": "Capital expenditure (2023-24)",
+           "nba_accreditation": "Valid NBA Accreditation"}
+RECORDS = [
+    {"rank": "101-150", "institute_name": " Institute A ", "nirf_id": "IR-O-U-0001", "total_faculty": "1,234",
+     "capital_expenditure_23_24": "₹ 1,23,45,678.50 (One Crore ...)", "nba_accreditation": "Yes"},
+    {"rank": 7.0, "institute_name": "Institute B", "nirf_id": "IR-O-U-0002", "total_faculty": 88,
+     "capital_expenditure_23_24": None, "nba_accreditation": "No"},
+    {"rank": None, "institute_name": "Institute C", "nirf_id": "IR-O-U-0003", "total_faculty": "not reported"},
+]
+
+
+def test_schema_types():
+    schema = build_schema(MAPPING)
+
+    assert schema["rank"] == "string" and schema["institute_name"] == "string"
+    assert schema["total_faculty"] == "Int64"
+    assert schema["capital_expenditure_23_24"] == "Float64"
+
+
+def test_typed_frame_coerces_values_and_keeps_rank_bands():
+    df = typed_frame(RECORDS, build_schema(MAPPING))
+
+    assert list(df["rank"].astype(object).where(df["rank"].notna(), None)) == ["101-150", "7", None]
+    assert list(df["rank_lower"].astype(object).where(df["rank_lower"].notna(), None)) == [101, 7, None]
+    assert str(df["rank_lower"].dtype) == "Int64"
+    assert df["total_faculty"].tolist()[:2] == [1234, 88] and df["total_faculty"].isna()[2]
+    assert df["capital_expenditure_23_24"][0] == pytest.approx(12345678.5)
+    assert df["institute_name"][0] == "Institute A"
+
+
+def test_wide_view_shows_the_rank_band():
+    df = typed_frame(RECORDS, build_schema(MAPPING))
+    order = ["rank", "Institute ID", "Number of faculty members"]
+
+    wide = wide_view(df, order, MAPPING)
+
+    assert wide.loc["rank", "Institute A"] == "101-150"
+    assert wide.loc["Number of faculty members", "Institute C"] is None
+    assert list(wide.index) == order   # rank_lower is for sorting, not a sheet row
+
+
+def test_store_reads_old_integer_ranks_with_new_text_ranks(tmp_path):
+    pytest.importorskip("pyarrow")
+    old = pd.DataFrame({"rank": pd.array([5, 9], dtype="Int64"), "nirf_id": ["IR-O-U-0001", "IR-O-U-0002"]})
+    write_tidy({"Overall": old}, 2024, root=str(tmp_path))
+    write_tidy({"Overall": typed_frame(RECORDS, build_schema(MAPPING))}, 2025, root=str(tmp_path))
+
+    df = load_tidy(str(tmp_path), columns=["rank", "rank_lower", "nirf_id"]).sort_values(["year", "nirf_id"])
+
+    assert df["rank"].tolist()[:3] == ["5", "9", "101-150"]
+    assert df["rank_lower"].tolist()[2] == 101
@@ -0,0 +1,143 @@
+import asyncio
+import json
+import os
+import threading
+
+from pdf_extractor import renew_lease
+from work_scheduler import DONE, FAILED, IN_PROGRESS, PENDING, WorkQueue
+
+DOC = "Overall/report_1.pdf"
+
+
+def lease_owner(queue, doc=DOC):
+    with open(queue._path(doc, "lease")) as f:
+        return json.load(f)["worker"]
+
+
+def crashed_worker(state_dir):
+    """A worker whose lease on DOC has already run out."""
+    queue = WorkQueue(str(state_dir), "crashed", lease_seconds=-1)
+    assert queue.claim(DOC)
+    return queue
+
+
+def test_only_one_worker_claims_a_document(tmp_path):
+    a, b = WorkQueue(str(tmp_path), "a"), WorkQueue(str(tmp_path), "b")
+
+    assert a.claim(DOC)
+    assert not b.claim(DOC)
+    assert a.state(DOC) == IN_PROGRESS
+
+
+def test_complete_and_fail_settle_the_document(tmp_path):
+    queue = WorkQueue(str(tmp_path), "a", max_attempts=2)
+    other = "Overall/report_2.pdf"
+
+    assert queue.claim(DOC)
+    queue.complete(DOC)
+    assert queue.state(DOC) == DONE and not queue.claim(DOC)
+
+    for _ in range(2):
+        assert queue.claim(other)
+        queue.fail(other, "no data extracted")
+    assert queue.state(other) == FAILED and queue.attempts(other) == 2
+    assert not queue.claim(other)   # Out of attempts
+
+
+def test_expired_lease_is_taken_over(tmp_path):
+    crashed_worker(tmp_path)
+    b = WorkQueue(str(tmp_path), "b")
+
+    assert b.claim(DOC)
+    assert lease_owner(b) == "b"
+    assert sorted(os.listdir(tmp_path)) == [f"{DOC.replace('/', '__')}.lease"]   # Nothing left aside
+
+
+def test_racing_takeovers_have_one_winner(tmp_path):
+    for _ in range(20):
+        crashed_worker(tmp_path)
+        workers = [WorkQueue(str(tmp_path), f"w{i}") for i in range(8)]
+        results = [None] * len(workers)
+        start = threading.Barrier(len(workers))
+
+        def take(i):
+            start.wait()
+            results[i] = workers[i].claim(DOC)
+
+        threads = [threading.Thread(target=take, args=(i,)) for i in range(len(workers))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results.count(True) == 1
+        assert lease_owner(workers[0]) == f"w{results.index(True)}"
+        os.remove(workers[0]._path(DOC, "lease"))
+
+
+def test_takeover_based_on_a_stale_look_gives_the_fresh_lease_back(tmp_path):
+    crashed_worker(tmp_path)
+    b, c = WorkQueue(str(tmp_path), "b"), WorkQueue(str(tmp_path), "c")
+    expired_lease = c._read(c._path(DOC, "lease"))
+    assert b.claim(DOC)
+
+    # c looked at the lease before b took it over, so c still believes it expired
+    c._read = lambda path, real=c._read: expired_lease if path.endswith(".lease") else real(path)
+    c._lease_expiry = lambda path: 0
+
+    assert not c.claim(DOC)
+    assert lease_owner(b) == "b"
+
+
+def test_workers_only_release_and_renew_their_own_lease(tmp_path):
+    crashed = crashed_worker(tmp_path)
+    b = WorkQueue(str(tmp_path), "b")
+    assert b.claim(DOC)
+
+    # The crashed worker comes back and gives up on the document
+    assert not crashed.renew(DOC)
+    crashed.fail(DOC, "timed out")
+
+    assert lease_owner(b) == "b"
+    assert b.renew(DOC)
+    b.complete(DOC)
+    assert not os.path.exists(b._path(DOC, "lease"))
+    assert b.state(DOC) == DONE
+
+
+def test_renew_lease_keeps_a_slow_document_claimed(tmp_path):
+    a = WorkQueue(str(tmp_path), "a", lease_seconds=0.3)
+    b = WorkQueue(str(tmp_path), "b")
+    assert a.claim(DOC)
+
+    async def slow_llm_call():
+        heartbeat = asyncio.create_task(renew_lease(a, DOC))
+        await asyncio.sleep(0.6)   # Twice the lease period
+        claimed_by_b = b.claim(DOC)
+        heartbeat.cancel()
+        return claimed_by_b
+
+    assert not asyncio.run(slow_llm_call())
+    assert lease_owner(a) == "a"
+    a.complete(DOC)
+    assert a.state(DOC) == DONE and b.state(DOC) == DONE and a.state("Overall/other.pdf") == PENDING
+
+
+def test_renew_never_overwrites_a_lease_taken_over_after_its_check(tmp_path):
+    a = WorkQueue(str(tmp_path), "a", lease_seconds=-1)
+    b = WorkQueue(str(tmp_path), "b")
+    assert a.claim(DOC)
+
+    # a's lease expires and b takes it over right after a checked that it still owns it
+    def owns_then_lose_it(path, owns=a._owns):
+        result = owns(path)
+        if path.endswith(".lease") and not hasattr(a, "checked"):
+            a.checked = True
+            assert b.claim(DOC)
+        return result
+
+    a._owns = owns_then_lose_it
+
+    assert not a.renew(DOC)
+    assert lease_owner(b) == "b"
+    assert sorted(os.listdir(tmp_path)) == [f"{DOC.replace('/', '__')}.lease"]   # Nothing left aside
@@ -0,0 +1,197 @@
+import argparse
+import json
+import os
+
+import pandas as pd
+
+# --- 1. Configuration ---
+DEFAULT_STORE_DIR = "nirf_store"  # Parquet dataset laid out as year=YYYY/category=NAME/
+PARTITION_COLUMNS = ["year", "category"]
+
+# Fields kept as text; every other mapped field is numeric. Rank is text because it can be a band like "101-150"
+TEXT_FIELDS = ("rank", "institute_name", "nirf_id", "category", "online_education_offered",
+               "nba_accreditation", "naac_accreditation")
+# Numeric columns derived from text ones, for sorting: a rank band's lower bound
+DERIVED_FIELDS = {"rank_lower": "rank"}
+# Rupee amounts may carry paise, and Research scores are out of 100 with decimals
+FLOAT_PREFIXES = ("capital_expenditure_", "operating_expenditure_", "sponsored_projects_",
+                  "consultancy_projects_", "edp_earnings_")
+FLOAT_SUFFIXES = ("_100",)
+
+# Currency symbols, Indian digit grouping, whitespace and amounts in words like "(Two Crore)"
+NON_NUMERIC = r"₹|Rs\.?|INR|\([^)]*\)|,|\s"
+LEADING_NUMBER = r"^(-?\d+(?:\.\d+)?)"
+
+
+# --- 2. Typed Schema ---
+def build_schema(mapping):
+    """Maps every JSON key of `mapping` (JSON_TO_USER_MAPPING) to a nullable pandas dtype."""
+    schema = {}
+    for key in mapping:
+        if key in TEXT_FIELDS:
+            schema[key] = "string"
+        elif key.startswith(FLOAT_PREFIXES) or key.endswith(FLOAT_SUFFIXES):
+            schema[key] = "Float64"
+        else:
+            schema[key] = "Int64"
+    return schema
+
+
+def as_text(series):
+    """Text column; whole numbers read "5", not "5.0" (a numeric column with gaps arrives as floats)."""
+    series = series.map(lambda value: str(int(value)) if isinstance(value, float) and value.is_integer() else value)
+    return series.astype("string").str.strip()
+
+
+def parse_numbers(series):
+    """Vectorised parse of values like "₹ 1,23,45,678", "1,234 (One Thousand ...)" or "101-150".
+
+    Values that are already numeric pass through; a rank band yields its
+    lower bound; anything without a leading number becomes missing.
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype("Float64")
+    text = series.astype("string").str.replace(NON_NUMERIC, "", regex=True)
+    return pd.to_numeric(text.str.extract(LEADING_NUMBER, expand=False), errors="coerce").astype("Float64")
+
+
+def typed_frame(records, schema):
+    """Builds the tidy table (one row per institute) with one typed column per schema field.
+
+    Each of DERIVED_FIELDS whose source is in the schema is added as an
+    Int64 column, e.g. rank_lower = 101 for rank "101-150".
+    """
+    df = pd.DataFrame.from_records(records).reindex(columns=list(schema))
+    for key, dtype in schema.items():
+        if dtype == "string":
+            df[key] = as_text(df[key])
+        elif dtype == "Int64":
+            df[key] = parse_numbers(df[key]).round().astype("Int64")
+        else:
+            df[key] = parse_numbers(df[key])
+    for key, source in DERIVED_FIELDS.items():
+        if source in schema:
+            df[key] = parse_numbers(df[source]).round().astype("Int64")
+    return df
+
+
+def wide_view(df, metric_order, mapping):
+    """Renders the sheet layout (metrics as rows, institutes as columns) from a tidy table.
+
+    Missing values come back as None so they show as empty cells.
+    """
+    wide = df.rename(columns=mapping).set_index(mapping["institute_name"]).T.reindex(metric_order)
+    return wide.astype(object).where(wide.notna(), None)
+
+
+# --- 3. Parquet Store ---
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.fs
+    except ImportError as e:
+        raise ImportError("The Parquet store needs pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+def write_tidy(frames, year, root=DEFAULT_STORE_DIR):
+    """Writes {category: tidy DataFrame} for one ranking year, replacing those partitions.
+
+    Returns the number of rows written.
+    """
+    pa = _pyarrow()
+    tables = [pa.Table.from_pandas(df.assign(year=year, category=category).astype({"year": "int32"}),
+                                   preserve_index=False)
+              for category, df in frames.items() if len(df)]
+    if not tables:
+        return 0
+    table = pa.concat_tables(tables)
+    partitioning = pa.dataset.partitioning(
+        pa.schema([("year", pa.int32()), ("category", pa.string())]), flavor="hive")
+    pa.dataset.write_dataset(table, root, format="parquet", partitioning=partitioning,
+                             existing_data_behavior="delete_matching")
+    return table.num_rows
+
+
+def open_dataset(root=DEFAULT_STORE_DIR):
+    """The store as a pyarrow Dataset; files are memory-mapped rather than read into buffers.
+
+    Year-wise columns differ between ranking years (capital_expenditure_23_24
+    in 2025, _24_25 in 2026), so the dataset schema is the union of every
+    file's schema; years without a column read it as null. Text fields are
+    read as strings even from files that stored them as numbers (rank was
+    an integer column in older stores).
+    """
+    pa = _pyarrow()
+    filesystem = pa.fs.LocalFileSystem(use_mmap=True)
+    dataset = pa.dataset.dataset(root, format="parquet", partitioning="hive", filesystem=filesystem)
+    schemas = [fragment.physical_schema for fragment in dataset.get_fragments()]
+    schema = pa.unify_schemas([_text_as_string(pa, s) for s in (dataset.schema, *schemas)])
+    return pa.dataset.dataset(root, schema=schema, format="parquet", partitioning="hive", filesystem=filesystem)
+
+
+def _text_as_string(pa, schema):
+    """`schema` with every text field typed as string, in the Arrow types and the pandas metadata."""
+    for name in TEXT_FIELDS:
+        index = schema.get_field_index(name)
+        if index >= 0:
+            schema = schema.set(index, pa.field(name, pa.string()))
+    pandas_metadata = (schema.metadata or {}).get(b"pandas")
+    if pandas_metadata:
+        metadata = json.loads(pandas_metadata)
+        for column in metadata["columns"]:
+            if column["name"] in TEXT_FIELDS:
+                column.update(pandas_type="object", numpy_type="string")
+        schema = schema.with_metadata({**schema.metadata, b"pandas": json.dumps(metadata).encode()})
+    return schema
+
+
+def load_tidy(root=DEFAULT_STORE_DIR, years=None, categories=None, columns=None):
+    """Loads the tidy tables for the given years/categories (all by default) as one DataFrame.
+
+    Partition filters mean only the matching files are opened.
+    """
+    pa = _pyarrow()
+    dataset = open_dataset(root)
+    condition = None
+    if years is not None:
+        condition = pa.dataset.field("year").isin(list(years))
+    if categories is not None:
+        in_categories = pa.dataset.field("category").isin(list(categories))
+        condition = in_categories if condition is None else condition & in_categories
+    if columns is not None:
+        columns = list(dict.fromkeys([*columns, *PARTITION_COLUMNS]))
+    table = dataset.to_table(columns=columns, filter=condition)
+    return table.to_pandas()
+
+
+# --- 4. Command Line ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect the Parquet store or render its sheet view.")
+    parser.add_argument("--store", default=DEFAULT_STORE_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("summary", help="Row counts per year and category")
+    wide_parser = sub.add_parser("wide", help="Render the metrics x institutes view for one year and category")
+    wide_parser.add_argument("--year", type=int, required=True)
+    wide_parser.add_argument("--category", required=True)
+    wide_parser.add_argument("--out", help="Write CSV here instead of printing")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.store):
+        parser.exit(1, f"No store at '{args.store}'. Run dataframe_converter.py first.\n")
+    if args.command == "summary":
+        df = load_tidy(args.store, columns=["nirf_id"])
+        counts = df.groupby(PARTITION_COLUMNS, observed=True).size()
+        for (year, category), rows in counts.items():
+            print(f"{year} {category:<12} {rows} institute(s)")
+    elif args.command == "wide":
+        from dataframe_converter import json_to_user_mapping, row_templates
+        df = load_tidy(args.store, years=[args.year], categories=[args.category])
+        templates = row_templates(args.year)
+        wide = wide_view(df, templates.get(args.category, templates["Overall"]), json_to_user_mapping(args.year))
+        if args.out:
+            wide.to_csv(args.out)
+            print(f"Wrote {wide.shape[1]} institute(s) to '{args.out}'.")
+        else:
+            print(wide.to_string())
@@ -0,0 +1,237 @@
+import hashlib
+import json
+import os
+import socket
+import time
+from collections import Counter
+
+# --- 1. Configuration ---
+DEFAULT_STATE_DIR = os.path.join("nirf_reports", ".work")  # Must be on a filesystem all workers share
+DEFAULT_LEASE_SECONDS = 900   # A claimed document is reassigned if its worker goes quiet for this long
+DEFAULT_MAX_ATTEMPTS = 3      # Failed documents are retried by later runs up to this many times
+
+PENDING = "pending"
+IN_PROGRESS = "in_progress"
+DONE = "done"
+FAILED = "failed"
+
+
+# --- 2. Sharding ---
+def parse_shard(spec):
+    """Parses "k/N" (0 <= k < N) into (k, N)."""
+    try:
+        index, count = (int(part) for part in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{spec}', expected k/N such as 0/4")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard '{spec}': k must be between 0 and N-1")
+    return index, count
+
+
+def doc_id(category, pdf_path):
+    """Stable identifier of a report across machines: "<category>/<file name>"."""
+    return f"{category}/{os.path.basename(pdf_path)}"
+
+
+def shard_of(key, num_shards):
+    """Maps a key onto one of num_shards hash ranges (stable across runs and machines)."""
+    return int(hashlib.sha1(key.encode("utf-8")).hexdigest()[:8], 16) % num_shards
+
+
+def in_shard(category, pdf_path, shard, by="hash"):
+    """True if the report belongs to shard (k, N); `by` is "hash" (per document) or "category"."""
+    index, count = shard
+    key = category if by == "category" else doc_id(category, pdf_path)
+    return shard_of(key, count) == index
+
+
+# --- 3. Lease-based Work Queue ---
+class WorkQueue:
+    """Tracks each document's state with small files in a shared directory.
+
+    A worker claims a document by creating "<doc>.lease" exclusively, so two
+    workers (even on different machines sharing the directory) never process
+    the same document at once. Finishing writes "<doc>.done" or "<doc>.failed".
+    Leases that have run out are taken over, so a crashed worker's documents
+    are picked up again: the stale lease is renamed aside (only one rename
+    can win) and a new one created exclusively. Workers renew() the leases
+    of documents still in progress, and only ever replace or remove their
+    own.
+    """
+
+    def __init__(self, state_dir=DEFAULT_STATE_DIR, worker_id=None, lease_seconds=DEFAULT_LEASE_SECONDS,
+                 max_attempts=DEFAULT_MAX_ATTEMPTS):
+        self.state_dir = state_dir
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        os.makedirs(state_dir, exist_ok=True)
+
+    def _path(self, doc, suffix):
+        safe = doc.replace("/", "__")
+        return os.path.join(self.state_dir, f"{safe}.{suffix}")
+
+    def _read(self, path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_atomic(self, path, payload):
+        tmp_path = f"{path}.{self.worker_id}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
+
+    def _lease_payload(self):
+        return {"worker": self.worker_id, "expires": time.time() + self.lease_seconds}
+
+    def _lease_expiry(self, lease_path):
+        """When the lease on lease_path runs out; 0 if there is none."""
+        lease = self._read(lease_path)
+        if lease:
+            return lease.get("expires", 0)
+        try:
+            # Being written right now by its owner: judge it by its age instead
+            return os.path.getmtime(lease_path) + self.lease_seconds
+        except FileNotFoundError:
+            return 0
+
+    def state(self, doc):
+        if os.path.exists(self._path(doc, "done")):
+            return DONE
+        if self._lease_expiry(self._path(doc, "lease")) > time.time():
+            return IN_PROGRESS
+        if os.path.exists(self._path(doc, "failed")):
+            return FAILED
+        return PENDING
+
+    def attempts(self, doc):
+        failed = self._read(self._path(doc, "failed"))
+        return failed.get("attempts", 0) if failed else 0
+
+    def claim(self, doc):
+        """Tries to take the lease on doc; returns True if this worker now owns it."""
+        if os.path.exists(self._path(doc, "done")) or self.attempts(doc) >= self.max_attempts:
+            return False
+        lease_path = self._path(doc, "lease")
+        # Linking a finished file means no worker ever reads a lease created but not yet written
+        fresh = f"{lease_path}.{self.worker_id}.tmp"
+        with open(fresh, "w") as f:
+            json.dump(self._lease_payload(), f)
+        try:
+            os.link(fresh, lease_path)
+            linked = True
+        except FileExistsError:
+            linked = False
+        os.remove(fresh)
+        if not linked:
+            return self._take_over(doc, lease_path)
+        # A document finished by another worker between our check and the claim
+        if os.path.exists(self._path(doc, "done")):
+            self._release(doc)
+            return False
+        return True
+
+    def _take_over(self, doc, lease_path):
+        """Replaces an expired lease; of several workers trying at once, at most one succeeds."""
+        lease = self._read(lease_path)
+        if self._lease_expiry(lease_path) > time.time():
+            return False
+        # Only one worker's rename of the lease file can succeed...
+        moved = self._move_aside(lease_path)
+        if moved is None:
+            return False
+        if self._read(moved) != lease:
+            # ...but it may have moved a lease renewed or re-created since we looked: give it back
+            self._restore(moved, lease_path)
+            return False
+        os.remove(moved)
+        return self.claim(doc)
+
+    def _move_aside(self, lease_path):
+        """Atomically renames the lease to a name only this worker uses; None if it is gone."""
+        moved = f"{lease_path}.{self.worker_id}.{time.monotonic_ns()}"
+        try:
+            os.rename(lease_path, moved)
+        except FileNotFoundError:
+            return None
+        return moved
+
+    def _restore(self, moved, lease_path):
+        try:
+            os.link(moved, lease_path)   # Unlike rename, never replaces a lease created meanwhile
+        except FileExistsError:
+            pass
+        os.remove(moved)
+
+    def _owns(self, lease_path):
+        lease = self._read(lease_path)
+        return bool(lease) and lease.get("worker") == self.worker_id
+
+    def renew(self, doc):
+        """Extends this worker's lease on doc; False if the lease has been taken over meanwhile."""
+        lease_path = self._path(doc, "lease")
+        if not self._owns(lease_path):
+            return False
+        fresh = f"{lease_path}.{self.worker_id}.tmp"
+        with open(fresh, "w") as f:
+            json.dump(self._lease_payload(), f)
+        try:
+            # Writing over the lease could clobber one taken over since the check, so swap it like _release
+            moved = self._move_aside(lease_path)
+            if moved is None:
+                return False
+            if not self._owns(moved):
+                self._restore(moved, lease_path)   # Taken over between the check and the rename
+                return False
+            os.remove(moved)
+            try:
+                os.link(fresh, lease_path)
+            except FileExistsError:
+                return False   # Claimed by another worker while it was aside
+            return True
+        finally:
+            os.remove(fresh)
+
+    def _release(self, doc):
+        """Removes the lease on doc if it is still this worker's, never one taken over by another."""
+        lease_path = self._path(doc, "lease")
+        if not self._owns(lease_path):
+            return
+        moved = self._move_aside(lease_path)
+        if moved is None:
+            return
+        if self._owns(moved):
+            os.remove(moved)
+        else:
+            self._restore(moved, lease_path)   # Taken over between the check and the rename
+
+    def complete(self, doc):
+        self._write_atomic(self._path(doc, "done"), {"worker": self.worker_id, "finished": time.time()})
+        try:
+            os.remove(self._path(doc, "failed"))
+        except FileNotFoundError:
+            pass
+        self._release(doc)
+
+    def fail(self, doc, error):
+        self._write_atomic(self._path(doc, "failed"), {"worker": self.worker_id, "error": str(error),
+                                                        "attempts": self.attempts(doc) + 1})
+        self._release(doc)
+
+    def iter_claimed(self, items, key):
+        """Lazily yields the items whose key(item) this worker managed to claim.
+
+        Claims happen as the consumer pulls items, so several workers given the
+        same shard share it without overlapping.
+        """
+        for item in items:
+            if self.claim(key(item)):
+                yield item
+
+    def summary(self, docs):
+        """Counts of pending / in progress / done / failed for the given document ids."""
+        counts = Counter(self.state(doc) for doc in docs)
+        return ", ".join(f"{counts[state]} {state}" for state in (PENDING, IN_PROGRESS, DONE, FAILED))